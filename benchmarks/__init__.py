@@ -0,0 +1 @@
+"""Offline benchmarks: synthetic HN/RSS served locally and a fake LLM client (fake_llm)."""
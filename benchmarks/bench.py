@@ -0,0 +1,180 @@
+"""
+Offline pipeline benchmark: synthetic HN stories and RSS feeds served from a local HTTP stand-in,
+a fake LLM client (benchmarks.fake_llm, via llm.set_client) and a fresh SQLite DB per corpus size.
+
+    python -m benchmarks.bench --sizes 1000,10000,100000 [--llm-latency-ms 50] [--llm-docs 500]
+
+Runs ingest → dedup/filter → extract → trends/contradictions → synthesis per size and reports
+wall time, docs/sec, CPU time and peak RSS per stage; results are also written as JSON
+(default data/benchmarks/bench_<stamp>.json) to compare across commits.
+"""
+
+import argparse
+import json
+import logging
+import os
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+from pathlib import Path
+
+# Read at import by the modules below: take up to 500 HN stories and 500 entries per feed, and
+# never reuse cached LLM answers between sizes.
+os.environ.setdefault("HN_LIMIT", "500")
+os.environ.setdefault("RSS_ITEMS_PER_FEED", "500")
+os.environ.setdefault("LLM_CACHE", "0")
+
+_root = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(_root))
+
+import yaml
+
+import llm
+from benchmarks.fake_llm import FakeClient
+from benchmarks.stub_server import StubServer, SyntheticCorpus
+from config import set_config_path
+from ingestion import pipeline
+from ingestion.storage import get_connection, get_db_path, get_topic_doc_count, init_schema, set_db_path
+from processing.dedup_filter import run_dedup_and_filter
+from processing.extract import run_extraction
+from processing.trends import run_trends_and_contradictions
+from reasoning.source_weighting import apply_source_weighting
+from report.synthesis import run_synthesis
+from tracking import PeakRSS
+
+logger = logging.getLogger("benchmarks")
+
+
+def _stage(results: list[dict], name: str, docs, fn, heap: bool):
+    """Run fn() as one measured stage; docs is the stage's input size (int, or callable → int after fn)."""
+    if heap:
+        tracemalloc.reset_peak()
+    with PeakRSS(interval=0.005) as rss:
+        t0, c0 = time.perf_counter(), time.process_time()
+        out = fn()
+        wall, cpu = time.perf_counter() - t0, time.process_time() - c0
+    n = docs() if callable(docs) else docs
+    row = {
+        "stage": name,
+        "docs": n,
+        "wall_sec": round(wall, 3),
+        "docs_per_sec": round(n / wall, 1) if wall > 0 else None,
+        "cpu_sec": round(cpu, 3),
+        "peak_rss_mb": round(rss.peak_mb, 1) if rss.peak_mb is not None else None,
+    }
+    if heap:
+        row["py_heap_peak_mb"] = round(tracemalloc.get_traced_memory()[1] / (1024 * 1024), 1)
+    results.append(row)
+    logger.info("%s: %s docs in %.2fs", name, n, wall)
+    return out
+
+
+def run_size(size: int, workdir: Path, topic: str, llm_docs: int, backend: str, seed: int, heap: bool) -> list[dict]:
+    """One benchmark pass over a synthetic corpus of about size docs, in its own DB under workdir."""
+    n_hn = min(pipeline.HN_LIMIT, max(1, size // 10))
+    corpus = SyntheticCorpus(n_hn, size - n_hn, pipeline.RSS_ITEMS_PER_FEED, topic.split()[0], seed=seed)
+    server = StubServer(corpus).start()
+    run_dir = workdir / f"size_{size}"
+    run_dir.mkdir(parents=True, exist_ok=True)
+    config_path = run_dir / "bench_config.yaml"
+    config_path.write_text(yaml.safe_dump({
+        "report": {"time_window_days": 30},
+        "sources": {"hn": True, "rss_feeds": server.feed_urls(), "news_api": False},
+    }))
+    os.environ["HN_API_BASE"] = server.hn_api
+    set_config_path(config_path)
+    set_db_path(run_dir / "bench.db")
+    llm.set_cache_path(run_dir / "llm_cache.db")
+    conn = get_connection()
+    init_schema(conn)
+    results: list[dict] = []
+    count = lambda sql: conn.execute(sql).fetchone()[0]
+    try:
+        _stage(results, "ingest", lambda: count("SELECT COUNT(*) FROM raw_docs"),
+               lambda: pipeline.run_ingestion(conn=conn, topics=[topic]), heap)
+        _stage(results, "dedup_filter", count("SELECT COUNT(*) FROM raw_docs"),
+               lambda: run_dedup_and_filter(conn=conn), heap)
+        n_docs = get_topic_doc_count(conn, topic)
+        _stage(results, "extract", n_docs,
+               lambda: run_extraction(max_docs=llm_docs, backend=backend, conn=conn, topic=topic), heap)
+        trend_summary, contradictions = _stage(
+            results, "trends_contradictions", n_docs,
+            lambda: run_trends_and_contradictions(conn=conn, topic=topic), heap,
+        )
+        docs = [dict(r) for r in conn.execute(
+            "SELECT p.id, p.source_tier FROM doc_topics t JOIN processed_docs p ON p.id = t.doc_id WHERE t.topic = ?",
+            (topic,),
+        )]
+        weighting = apply_source_weighting(docs, [], contradictions)
+        _stage(results, "synthesis", n_docs,
+               lambda: run_synthesis(trend_summary, contradictions, weighting, conn=conn, topic=topic), heap)
+    finally:
+        conn.close()
+        server.stop()
+    for row in results:
+        row["size"] = size
+    return results
+
+
+def _table(results: list[dict]) -> str:
+    heap = any("py_heap_peak_mb" in r for r in results)
+    head = f"{'size':>8} {'stage':<22} {'docs':>8} {'wall_sec':>9} {'docs/sec':>10} {'cpu_sec':>8} {'peak_rss_mb':>11}"
+    lines = [head + (f" {'py_heap_mb':>10}" if heap else "")]
+    for r in results:
+        line = (
+            f"{r['size']:>8} {r['stage']:<22} {r['docs']:>8} {r['wall_sec']:>9.2f} {r['docs_per_sec'] or 0:>10.1f} "
+            f"{r['cpu_sec']:>8.2f} {r['peak_rss_mb'] if r['peak_rss_mb'] is not None else '-':>11}"
+        )
+        lines.append(line + (f" {r.get('py_heap_peak_mb', '-'):>10}" if heap else ""))
+    return "\n".join(lines)
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Offline pipeline benchmark with local HN/RSS and a fake LLM.")
+    parser.add_argument("--sizes", default="1000,10000,100000", help="comma-separated corpus sizes")
+    parser.add_argument("--topic", default="battery supply chain", help="topic; its first word is in every title")
+    parser.add_argument("--backend", default="hybrid", choices=["llm", "local", "hybrid"], help="extraction backend")
+    parser.add_argument("--llm-docs", type=int, default=500, help="max docs sent to the (fake) LLM for extraction")
+    parser.add_argument("--llm-latency-ms", type=float, default=50.0, help="simulated latency per LLM call")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--tracemalloc", action="store_true", help="also report Python heap peak (slower)")
+    parser.add_argument("--workdir", help="keep DBs here (default: a temp dir, removed afterwards)")
+    parser.add_argument("--out", help="results JSON (default data/benchmarks/bench_<stamp>.json)")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=os.environ.get("LOG_LEVEL", "WARNING").upper(), format="%(levelname)s %(name)s %(message)s")
+    client = FakeClient(args.llm_latency_ms)
+    llm.set_client(client)
+    sizes = [int(s) for s in args.sizes.split(",") if s.strip()]
+    out = Path(args.out) if args.out else get_db_path().parent / "benchmarks" / f"bench_{datetime.utcnow():%Y%m%d_%H%M%S}.json"
+    workdir = Path(args.workdir) if args.workdir else Path(tempfile.mkdtemp(prefix="mi_bench_"))
+
+    if args.tracemalloc:
+        tracemalloc.start()
+    results = []
+    try:
+        for size in sizes:
+            rows = run_size(size, workdir, args.topic, args.llm_docs, args.backend, args.seed, args.tracemalloc)
+            if client.unknown:
+                # A prompt the fake cannot place would be timed as a failed call: results are not comparable.
+                raise RuntimeError(f"fake LLM did not recognize {len(client.unknown)} prompts, e.g. {client.unknown[0]!r}")
+            results += rows
+            print(_table(rows), flush=True)
+    finally:
+        llm.set_client(None)
+        if not args.workdir:
+            shutil.rmtree(workdir, ignore_errors=True)
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(json.dumps({
+        "generated_at": datetime.utcnow().isoformat() + "Z",
+        "settings": {k: v for k, v in vars(args).items() if k not in ("out", "workdir")},
+        "results": results,
+    }, indent=2))
+    print(f"\n{_table(results)}\n\nResults: {out}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
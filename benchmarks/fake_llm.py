@@ -0,0 +1,104 @@
+"""
+Offline stand-in for the OpenAI client, installed with llm.set_client(FakeClient()). Answers each
+pipeline prompt in the shape it asks for, deterministically, with usage counts and simulated latency.
+
+Prompts are recognized by the fixed text the pipeline's own prompt builders put after their last
+argument, rendered once with sentinel arguments, so rewording a prompt keeps the fake in step.
+A prompt nothing matches is counted in FakeClient.unknown (the benchmark fails on any).
+"""
+
+import hashlib
+import json
+import re
+import threading
+import time
+from types import SimpleNamespace
+
+from processing import extract, trends
+from processing.extract import SIGNAL_TAGS
+from reasoning import self_critique
+from report import synthesis
+
+_A, _B, _C = "\x00a\x00", "\x00b\x00", "\x00c\x00"
+_SENTINEL = re.compile("\x00[abc]\x00")
+_NAME = re.compile(r"\b[A-Z][A-Za-z0-9]{2,}\b")
+_CITE = re.compile(r"\[doc_id=(\d+)\]")  # evidence header written by report.synthesis.run_synthesis
+
+
+def _after(rendered: str, sentinel: str) -> str:
+    """Fixed template text between sentinel and the next sentinel (or the end)."""
+    return _SENTINEL.split(rendered.split(sentinel, 1)[1])[0]
+
+
+def _between(rendered: str, first: str, second: str) -> str:
+    return rendered.split(first, 1)[1].split(second, 1)[0]
+
+
+class _Templates:
+    """Fixed pieces of each pipeline prompt, taken from the real builders."""
+
+    def __init__(self):
+        single = extract._prompt(_A, _B)
+        self.extract_head, self.extract_tail = _between(single, _B, _A), _after(single, _A)
+        batch = extract._batch_prompt([(101, _A), (202, _C)], _B)
+        self.batch_tail = _after(batch, _C)
+        header = _between(batch, _A, _C).lstrip()
+        self.batch_header = re.compile(re.escape(header).replace("202", r"(\d+)"))
+        self.contradiction_tail = _after(trends._contradiction_prompt(_A, _C, _B), _C)
+        self.critique_tail = _after(self_critique._prompt(_A, _B), _A)
+        self.section_tail = _after(synthesis._section_prompt(_B, "", "", {}, [], "", _A), _A)
+
+
+def _hash(text: str) -> int:
+    return int(hashlib.sha256(text.encode("utf-8")).hexdigest()[:8], 16)
+
+
+def _extraction(text: str) -> dict:
+    h = _hash(text)
+    first = text.strip().split(".")[0].replace("\n", " ")[:160]
+    return {
+        "entities": list(dict.fromkeys(_NAME.findall(text)))[:8],
+        "events": [first] if first else [],
+        "signal_tags": sorted({SIGNAL_TAGS[h % len(SIGNAL_TAGS)], SIGNAL_TAGS[(h // 7) % len(SIGNAL_TAGS)]}),
+    }
+
+
+class FakeClient:
+    """Minimal chat.completions.create with deterministic answers; latency_ms of sleep per call."""
+
+    def __init__(self, latency_ms: float = 50.0):
+        self.latency = latency_ms / 1000
+        self.chat = SimpleNamespace(completions=self)
+        self.calls = 0
+        self.unknown: list[str] = []
+        self._t = _Templates()
+        self._lock = threading.Lock()
+
+    def answer(self, prompt: str) -> str:
+        t = self._t
+        if prompt.endswith(t.batch_tail):
+            parts = t.batch_header.split(prompt[: -len(t.batch_tail)])[1:]
+            return json.dumps({parts[i]: _extraction(parts[i + 1]) for i in range(0, len(parts) - 1, 2)})
+        if prompt.endswith(t.extract_tail) and t.extract_head in prompt:
+            return json.dumps(_extraction(prompt.split(t.extract_head, 1)[1][: -len(t.extract_tail)]))
+        if prompt.endswith(t.contradiction_tail):
+            return "YES" if _hash(prompt) % 4 == 0 else "NO"
+        if prompt.endswith(t.critique_tail):
+            return json.dumps({"confidence": 0.7, "critique": "Synthetic critique (benchmark)."})
+        if prompt.endswith(t.section_tail):
+            cites = list(dict.fromkeys(_CITE.findall(prompt)))[:3]
+            return " ".join(f"Synthetic finding [{c}]." for c in cites) or "No evidence."
+        with self._lock:
+            self.unknown.append(prompt[:200])
+        return ""
+
+    def create(self, model: str, messages: list[dict], temperature: float = 0.2, **kwargs) -> SimpleNamespace:
+        prompt = messages[-1]["content"]
+        time.sleep(self.latency)
+        content = self.answer(prompt)
+        with self._lock:
+            self.calls += 1
+        return SimpleNamespace(
+            choices=[SimpleNamespace(message=SimpleNamespace(content=content))],
+            usage=SimpleNamespace(prompt_tokens=len(prompt) // 4 + 1, completion_tokens=len(content) // 4 + 1),
+        )
@@ -0,0 +1,173 @@
+"""Local HTTP stand-in for the Hacker News API and RSS feeds, serving deterministic synthetic stories."""
+
+import json
+import random
+import re
+import threading
+import time
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from xml.sax.saxutils import escape
+
+COMPANIES = [
+    "Nvidia", "TSMC", "Samsung", "Intel", "AMD", "CATL", "BYD", "Panasonic", "Tesla", "OpenAI", "Anthropic",
+    "Google", "Microsoft", "Amazon", "Apple", "Meta", "Mistral", "IBM", "Oracle", "Stripe", "Northvolt",
+    "LG Energy Solution", "SK Hynix", "Micron", "Qualcomm", "Arm", "Rivian", "Ford", "Toyota", "Siemens",
+]
+REGULATORS = ["FTC", "SEC", "European Commission", "DOJ", "FCC", "CFPB", "Federal Reserve"]
+PLACES = ["China", "United States", "Germany", "Japan", "India", "Taiwan", "South Korea", "France", "Brazil"]
+VERBS = ["announced", "delayed", "expanded", "cut", "raised", "launched", "acquired", "paused", "doubled", "warned about"]
+NOUNS = [
+    "production", "pricing", "capacity", "revenue guidance", "a partnership", "a new plant", "layoffs", "funding",
+    "a recall", "an investigation", "export controls", "a lawsuit", "demand forecasts", "a research benchmark",
+]
+MONTHS = ["January", "February", "March", "April", "May", "June", "July", "August", "September", "October"]
+
+
+class SyntheticCorpus:
+    """
+    n_hn HN stories plus n_rss RSS entries split into feeds of per_feed entries. Every story
+    mentions topic_word in its title; about dup_rate of them reuse an earlier story's text
+    under a new URL (syndicated copies for near-dup detection). Same arguments → same corpus.
+    """
+
+    def __init__(self, n_hn: int, n_rss: int, per_feed: int, topic_word: str, seed: int = 0, dup_rate: float = 0.05):
+        self.n_hn = n_hn
+        self.n_rss = n_rss
+        self.per_feed = max(1, per_feed)
+        self.topic_word = topic_word
+        self.seed = seed
+        self.dup_every = int(1 / dup_rate) if dup_rate > 0 else 0
+        self.now = int(time.time())
+
+    @property
+    def n_feeds(self) -> int:
+        return -(-self.n_rss // self.per_feed)
+
+    def story(self, i: int) -> tuple[str, str, int]:
+        """(title, body, published unix time) of story i (HN stories first, then RSS entries)."""
+        published = self.now - 3600 - (i * 7919) % (25 * 86400)  # spread over the last ~25 days
+        if self.dup_every and i >= self.dup_every and i % self.dup_every == 0:
+            i = random.Random(f"{self.seed}:dup:{i}").randrange(i)  # syndicated copy of an earlier story
+        rng = random.Random(f"{self.seed}:{i}")
+        company, other = rng.sample(COMPANIES, 2)
+        title = f"{company} {rng.choice(VERBS)} {self.topic_word} {rng.choice(NOUNS)} ({i})"
+        sentences = [
+            f"{company} {rng.choice(VERBS)} {rng.choice(NOUNS)} in {rng.choice(PLACES)} on "
+            f"{rng.choice(MONTHS)} {rng.randint(1, 28)}, 2026.",
+            f"The {rng.choice(REGULATORS)} {rng.choice(VERBS)} {rng.choice(NOUNS)} tied to {other}.",
+            f"Analysts said {self.topic_word} demand in {rng.choice(PLACES)} could shift {rng.randint(2, 40)}% "
+            f"as {other} {rng.choice(VERBS)} {rng.choice(NOUNS)}.",
+        ]
+        sentences += [
+            f"{rng.choice(COMPANIES)} {rng.choice(VERBS)} {rng.choice(NOUNS)} while "
+            f"{rng.choice(COMPANIES)} {rng.choice(VERBS)} {rng.choice(NOUNS)} (item {i}-{k})."
+            for k in range(rng.randint(2, 6))
+        ]
+        return title, " ".join(sentences), published
+
+    def hn_item(self, id: int) -> dict | None:
+        if not 1 <= id <= self.n_hn:
+            return None
+        title, body, published = self.story(id - 1)
+        return {"id": id, "type": "story", "title": title, "text": body, "time": published,
+                "url": f"https://bench.local/hn/{id}"}
+
+    def rss_feed(self, k: int) -> str | None:
+        if not 0 <= k < self.n_feeds:
+            return None
+        start = k * self.per_feed
+        items = []
+        for j in range(start, min(start + self.per_feed, self.n_rss)):
+            title, body, published = self.story(self.n_hn + j)
+            items.append(
+                f"<item><title>{escape(title)}</title><link>https://bench.local/rss/{j}</link>"
+                f"<guid>bench-rss-{j}</guid><description>{escape(body)}</description>"
+                f"<pubDate>{formatdate(published, usegmt=True)}</pubDate></item>"
+            )
+        return (
+            '<?xml version="1.0" encoding="UTF-8"?><rss version="2.0"><channel>'
+            f"<title>Bench feed {k}</title><link>https://bench.local/rss</link><description>synthetic</description>"
+            + "".join(items)
+            + "</channel></rss>"
+        )
+
+
+_HN_ITEM = re.compile(r"^/v0/item/(\d+)\.json$")
+_RSS_FEED = re.compile(r"^/rss/(\d+)\.xml$")
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, like the real APIs
+
+    def do_GET(self):
+        corpus: SyntheticCorpus = self.server.corpus
+        path = self.path.split("?")[0]
+        if path == "/v0/topstories.json":
+            return self._send(200, json.dumps(list(range(1, corpus.n_hn + 1))).encode(), "application/json")
+        m = _HN_ITEM.match(path)
+        if m:
+            item = corpus.hn_item(int(m.group(1)))
+            return self._send(200, json.dumps(item).encode(), "application/json")
+        m = _RSS_FEED.match(path)
+        if m:
+            k = int(m.group(1))
+            etag = f'"bench-{corpus.seed}-{k}-{corpus.n_rss}"'
+            if self.headers.get("If-None-Match") == etag:
+                return self._send(304, b"", "application/rss+xml", etag)
+            body = self.server.feed_bytes(k)
+            if body is None:
+                return self._send(404, b"not found", "text/plain")
+            return self._send(200, body, "application/rss+xml", etag)
+        self._send(404, b"not found", "text/plain")
+
+    def _send(self, status: int, body: bytes, content_type: str, etag: str | None = None) -> None:
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        if etag:
+            self.send_header("ETag", etag)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class StubServer(ThreadingHTTPServer):
+    """Serves one SyntheticCorpus on 127.0.0.1 from a background thread."""
+
+    daemon_threads = True
+
+    def __init__(self, corpus: SyntheticCorpus, port: int = 0):
+        super().__init__(("127.0.0.1", port), _Handler)
+        self.corpus = corpus
+        self._feeds: dict[int, bytes | None] = {}
+        self._lock = threading.Lock()
+        self._thread = threading.Thread(target=self.serve_forever, name="bench-http", daemon=True)
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+    @property
+    def hn_api(self) -> str:
+        return self.base_url + "/v0"
+
+    def feed_urls(self) -> list[str]:
+        return [f"{self.base_url}/rss/{k}.xml" for k in range(self.corpus.n_feeds)]
+
+    def feed_bytes(self, k: int) -> bytes | None:
+        with self._lock:
+            if k not in self._feeds:
+                xml = self.corpus.rss_feed(k)
+                self._feeds[k] = xml.encode("utf-8") if xml is not None else None
+            return self._feeds[k]
+
+    def start(self) -> "StubServer":
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.shutdown()
+        self.server_close()
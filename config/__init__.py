@@ -7,9 +7,19 @@ from typing import Any
 import yaml
 
 _CONFIG: dict[str, Any] | None = None
+_CONFIG_PATH: Path | None = None
+
+
+def set_config_path(path: str | Path | None) -> None:
+    """Load config from another YAML file (None = config/topic_config.yaml); drops the loaded config."""
+    global _CONFIG, _CONFIG_PATH
+    _CONFIG_PATH = Path(path) if path else None
+    _CONFIG = None
 
 
 def _config_path() -> Path:
+    if _CONFIG_PATH is not None:
+        return _CONFIG_PATH
     path = Path(__file__).resolve().parent / "topic_config.yaml"
     if not path.exists():
         path = Path(__file__).resolve().parent / "topic_config.example.yaml"
@@ -53,3 +63,32 @@ def get_sources() -> dict[str, Any]:
 
 def get_advanced_reasoning() -> list[str]:
     return load_config().get("advanced_reasoning", ["contradiction_detection", "source_weighting"])
+
+
+def get_topics() -> list[str]:
+    """Topic portfolio for batch runs (python run.py --batch), from the topics list in config."""
+    return [str(t).strip() for t in load_config().get("topics") or [] if str(t).strip()]
+
+
+def get_schedule() -> dict[str, Any]:
+    """
+    Daemon polling schedule in seconds: hn, rss (default per feed), rss_feeds ({url: seconds}
+    overrides), news_api, report, plus report_min_new_docs, max_backoff and max_idle_interval.
+    """
+    schedule = {
+        "hn": 900,
+        "rss": 1800,
+        "rss_feeds": {},
+        "news_api": 3600,
+        "report": 21600,
+        "report_min_new_docs": 50,
+        "max_backoff": 21600,
+        "max_idle_interval": 21600,
+    }
+    schedule.update(load_config().get("schedule") or {})
+    return schedule
+
+
+def get_gazetteer() -> list[str]:
+    """Extra entity names for the local (rule-based) extraction backend."""
+    return load_config().get("extraction", {}).get("gazetteer", []) or []
@@ -8,6 +8,8 @@ from .storage import (
     get_raw_docs,
     init_schema,
     insert_raw_doc,
+    insert_raw_docs_bulk,
+    search_docs,
     set_db_path,
 )
 
@@ -19,5 +21,7 @@ __all__ = [
     "get_raw_docs",
     "init_schema",
     "insert_raw_doc",
+    "insert_raw_docs_bulk",
+    "search_docs",
     "set_db_path",
 ]
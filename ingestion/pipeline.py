@@ -1,47 +1,101 @@
 """Fetch from configured sources and store in raw_docs."""
 
 import logging
-from ingestion.storage import get_connection, init_schema, insert_raw_doc
+import os
+import sqlite3
+from itertools import islice
+from typing import Any, Callable, Iterable
+from ingestion.storage import get_connection, init_schema, insert_raw_docs_bulk
 from ingestion.sources.hn import fetch_hn
 from ingestion.sources.rss import fetch_rss_feeds
 from ingestion.sources.news_api import fetch_news_api
 from config import get_sources, get_topic_name
 
 logger = logging.getLogger(__name__)
-TOPIC_WORD = lambda: (get_topic_name() or "").split()[0] or None
+TOPIC_WORD = lambda topic=None: (topic or get_topic_name() or "").split()[0] or None
+INGEST_BATCH = 200
+# Items taken per run: HN top stories, and RSS entries per feed per topic.
+HN_LIMIT = int(os.environ.get("HN_LIMIT", "25"))
+RSS_ITEMS_PER_FEED = int(os.environ.get("RSS_ITEMS_PER_FEED", "10"))
 
 
-def _ingest_from(conn, items, max_docs: int | None, inserted: int) -> int:
-    """Insert items into raw_docs; return new inserted count."""
-    for item in items:
-        if max_docs and inserted >= max_docs:
+def _ingest_from(
+    conn, items, max_docs: int | None, inserted: int, run_id: int | None = None, topic: str | None = None
+) -> int:
+    """Insert items into raw_docs in batched transactions (joining topic's partition); return new inserted count."""
+    items = iter(items)
+    while not (max_docs and inserted >= max_docs):
+        size = min(INGEST_BATCH, max_docs - inserted) if max_docs else INGEST_BATCH
+        batch = list(islice(items, size))
+        if not batch:
             break
-        doc_id = insert_raw_doc(
-            conn, item["url"], item["title"], item["body"],
-            item["source_type"], item.get("published_at"),
-        )
-        if doc_id:
-            inserted += 1
+        new_ids, existing_ids = insert_raw_docs_bulk(conn, batch, run_id=run_id, topic=topic)
+        inserted += len(new_ids) + len(existing_ids)
     return inserted
 
 
-def run_ingestion(max_docs: int | None = None) -> int:
-    """Fetch from config sources → raw_docs. Returns total inserted."""
-    conn = get_connection()
-    init_schema(conn)
+def source_fetchers(
+    strict: bool = False,
+    split_feeds: bool = False,
+    topics: list[str] | None = None,
+) -> dict[str, Callable[[sqlite3.Connection | None], Iterable[dict[str, Any]]]]:
+    """
+    Configured sources as name → fetch(conn) returning that source's item iterator.
+    conn is only used for source-side state (RSS conditional-GET cache) and may be None.
+    strict makes fetch errors raise; split_feeds gives each RSS feed its own "rss:<url>" entry.
+    topics defaults to [get_topic_name()]. With one topic, HN/RSS items are filtered by its first
+    word; with several, HN/RSS are fetched once unfiltered (relevance is decided per topic later)
+    and News API is asked for any of the topics. The RSS feed cache is kept per topic (per topic
+    set when shared), so topics starting with the same word don't share seen entries.
+    """
     sources = get_sources()
-    topic = get_topic_name()
-    q = TOPIC_WORD()
-    inserted = 0
-
+    topics = topics or [get_topic_name()]
+    shared = len(topics) > 1
+    q = None if shared else TOPIC_WORD(topics[0])
+    cache_key = " | ".join(sorted(t or "" for t in topics))
+    per_feed = RSS_ITEMS_PER_FEED * len(topics)
+    news_query = " OR ".join(f'"{t}"' for t in topics) if shared else (topics[0] or "AI")
+    feeds = sources.get("rss_feeds") or []
+    fetchers = {}
     if sources.get("hn"):
-        inserted = _ingest_from(conn, fetch_hn(limit=25, query=q), max_docs, inserted)
-    inserted = _ingest_from(
-        conn, fetch_rss_feeds(sources.get("rss_feeds") or [], limit_per_feed=10, query=q), max_docs, inserted
-    )
+        fetchers["hn"] = lambda conn: fetch_hn(limit=HN_LIMIT, query=q, strict=strict)
+    if feeds and split_feeds:
+        for url in feeds:
+            fetchers[f"rss:{url}"] = lambda conn, url=url: fetch_rss_feeds(
+                [url], limit_per_feed=per_feed, query=q, conn=conn, workers=1, strict=strict, cache_key=cache_key
+            )
+    elif feeds:
+        fetchers["rss"] = lambda conn: fetch_rss_feeds(
+            feeds, limit_per_feed=per_feed, query=q, conn=conn, strict=strict, cache_key=cache_key
+        )
     if sources.get("news_api"):
-        inserted = _ingest_from(conn, fetch_news_api(topic or "AI", limit=20), max_docs, inserted)
+        fetchers["news_api"] = lambda conn: fetch_news_api(news_query, limit=min(100, 20 * len(topics)), strict=strict)
+    return fetchers
+
+
+def run_ingestion(
+    max_docs: int | None = None,
+    conn: sqlite3.Connection | None = None,
+    topics: list[str] | None = None,
+    run_id: int | None = None,
+) -> int:
+    """
+    Fetch from config sources → raw_docs. Returns total inserted. With conn, it is used and left open.
+    topics: see source_fetchers(); several topics share one fetch per source. With a single topic the
+    fetched docs join its partition (doc_topics); shared fetches are partitioned later by relevance.
+    run_id is recorded on new raw_docs rows.
+    """
+    own = conn is None
+    if own:
+        conn = get_connection()
+        init_schema(conn)
+    topics = topics or [get_topic_name()]
+    topic = topics[0] if len(topics) == 1 else None
+    inserted = 0
+    for fetch in source_fetchers(topics=topics).values():
+        inserted = _ingest_from(conn, fetch(conn), max_docs, inserted, run_id, topic)
 
-    conn.close()
+    if own:
+        conn.close()
     logger.info("Ingestion done: %s docs", inserted)
     return inserted
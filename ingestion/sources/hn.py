@@ -1,50 +1,100 @@
 """Hacker News API fetcher."""
 
 import logging
+import os
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
 from typing import Iterator
-import requests
+
+from ingestion.sources.http import get_session
 
 logger = logging.getLogger(__name__)
 
-HN_TOP = "https://hacker-news.firebaseio.com/v0/topstories.json"
-HN_ITEM = "https://hacker-news.firebaseio.com/v0/item/{id}.json"
+# HN_API_BASE points the fetcher at another host with the same API (e.g. the benchmarks stand-in).
+HN_API = "https://hacker-news.firebaseio.com/v0"
+HN_WORKERS = int(os.environ.get("HN_FETCH_WORKERS", "8"))
+
+
+def _url(path: str) -> str:
+    return os.environ.get("HN_API_BASE", HN_API).rstrip("/") + path
+
+
+def _fetch_item(id: int) -> dict | None:
+    """One HN item → raw JSON, or None if missing/failed (errors stay per item)."""
+    try:
+        r = get_session().get(_url(f"/item/{id}.json"), timeout=5)
+        r.raise_for_status()
+        return r.json()
+    except Exception as e:
+        logger.debug("HN item %s failed: %s", id, e)
+        return None
+
 
+def _fetch_items(ids: list[int], workers: int) -> Iterator[tuple[int, dict | None]]:
+    """Yield (id, item) in the order of ids, with at most `workers` requests in flight."""
+    if workers <= 1:
+        for id in ids:
+            yield id, _fetch_item(id)
+        return
+    pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="hn")
+    pending = deque()
+    try:
+        it = iter(ids)
+        for id in it:
+            pending.append((id, pool.submit(_fetch_item, id)))
+            if len(pending) >= workers * 2:
+                break
+        while pending:
+            id, fut = pending.popleft()
+            nxt = next(it, None)
+            if nxt is not None:
+                pending.append((nxt, pool.submit(_fetch_item, nxt)))
+            yield id, fut.result()
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
 
-def fetch_hn(limit: int = 30, query: str | None = None) -> Iterator[dict]:
+
+def fetch_hn(
+    limit: int = 30,
+    query: str | None = None,
+    workers: int | None = None,
+    strict: bool = False,
+) -> Iterator[dict]:
     """
     Yield items from HN top stories. Each item: url, title, body, source_type, published_at.
     If query is set, we filter by title (simple substring) for topic relevance.
+    Items are fetched concurrently (workers, default HN_FETCH_WORKERS) but yielded in rank order.
+    With strict, a failed top-stories request raises instead of yielding nothing.
     """
     try:
-        r = requests.get(HN_TOP, timeout=10)
+        r = get_session().get(_url("/topstories.json"), timeout=10)
         r.raise_for_status()
         ids = r.json()[:limit]
     except Exception as e:
+        if strict:
+            raise
         logger.warning("HN fetch failed: %s", e)
         return
-    for id in ids:
+    for id, item in _fetch_items(ids, HN_WORKERS if workers is None else workers):
+        if not item:
+            continue
         try:
-            r = requests.get(HN_ITEM.format(id=id), timeout=5)
-            r.raise_for_status()
-            item = r.json()
-            if not item:
-                continue
             title = item.get("title") or ""
             if query and query.lower() not in title.lower():
                 continue
             url = item.get("url") or f"https://news.ycombinator.com/item?id={id}"
             text = item.get("text") or ""
             body = title + "\n\n" + text if text else title
-            from datetime import datetime
             ts = item.get("time")
             published_at = datetime.utcfromtimestamp(ts).isoformat() + "Z" if ts else None
-            yield {
-                "url": url,
-                "title": title,
-                "body": body[:50000],
-                "source_type": "hn",
-                "published_at": published_at,
-            }
         except Exception as e:
             logger.debug("HN item %s failed: %s", id, e)
             continue
+        yield {
+            "url": url,
+            "title": title,
+            "body": body[:50000],
+            "source_type": "hn",
+            "published_at": published_at,
+        }
@@ -0,0 +1,25 @@
+"""Shared HTTP session for source fetchers (keep-alive, pooled connections)."""
+
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter
+
+_SESSION: requests.Session | None = None
+_LOCK = threading.Lock()
+POOL_SIZE = 32
+
+
+def get_session() -> requests.Session:
+    """Return the process-wide requests.Session, creating it on first use."""
+    global _SESSION
+    if _SESSION is not None:
+        return _SESSION
+    with _LOCK:
+        if _SESSION is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=POOL_SIZE, pool_maxsize=POOL_SIZE)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            _SESSION = session
+    return _SESSION
@@ -7,10 +7,10 @@ from typing import Iterator
 logger = logging.getLogger(__name__)
 
 
-def fetch_news_api(query: str, limit: int = 20, api_key: str | None = None) -> Iterator[dict]:
+def fetch_news_api(query: str, limit: int = 20, api_key: str | None = None, strict: bool = False) -> Iterator[dict]:
     """
     Yield articles from NewsAPI.org. Each item: url, title, body, source_type, published_at.
-    If no API key, yields nothing.
+    If no API key, yields nothing. With strict, a failed request raises instead of yielding nothing.
     """
     try:
         import requests
@@ -27,6 +27,8 @@ def fetch_news_api(query: str, limit: int = 20, api_key: str | None = None) -> I
         r.raise_for_status()
         data = r.json()
     except Exception as e:
+        if strict:
+            raise
         logger.warning("News API request failed: %s", e)
         return
     for art in data.get("articles") or []:
@@ -1,12 +1,21 @@
 """RSS feed fetcher."""
 
 import logging
+import os
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
 from typing import Iterator
 import feedparser
 from datetime import datetime, timezone
 
+from ingestion.sources.http import get_session
+from ingestion.storage import get_feed_cache, save_feed_cache
+
 logger = logging.getLogger(__name__)
 
+RSS_WORKERS = int(os.environ.get("RSS_FETCH_WORKERS", "8"))
+MAX_SEEN_IDS = 500
+
 
 def _parse_date(entry: dict) -> str | None:
     for key in ("published_parsed", "updated_parsed"):
@@ -20,38 +29,112 @@ def _parse_date(entry: dict) -> str | None:
     return None
 
 
+def _entry_id(entry: dict) -> str:
+    return entry.get("id") or entry.get("link") or entry.get("title") or ""
+
+
+def _poll_feed(
+    feed_url: str,
+    cached: dict | None,
+    strict: bool = False,
+) -> tuple[int, dict | None, str | None, str | None]:
+    """
+    Conditional GET for one feed. Returns (status, parsed, etag, last_modified);
+    status 304 means unchanged (parsed is None), 0 means the request failed (raised if strict).
+    """
+    headers = {}
+    if cached:
+        if cached.get("etag"):
+            headers["If-None-Match"] = cached["etag"]
+        if cached.get("last_modified"):
+            headers["If-Modified-Since"] = cached["last_modified"]
+    try:
+        r = get_session().get(feed_url, headers=headers, timeout=15)
+        if r.status_code == 304:
+            return 304, None, None, None
+        r.raise_for_status()
+        parsed = feedparser.parse(r.content, response_headers=dict(r.headers))
+        return r.status_code, parsed, r.headers.get("ETag"), r.headers.get("Last-Modified")
+    except Exception as e:
+        if strict:
+            raise
+        logger.warning("RSS fetch %s failed: %s", feed_url, e)
+        return 0, None, None, None
+
+
 def fetch_rss_feeds(
     feeds: list[str],
     limit_per_feed: int = 15,
     query: str | None = None,
+    conn: sqlite3.Connection | None = None,
+    workers: int | None = None,
+    strict: bool = False,
+    cache_key: str | None = None,
 ) -> Iterator[dict]:
     """
     Yield entries from RSS feeds. Each item: url, title, body, source_type, published_at.
     source_type is "rss". If query is set, filter by title/summary.
+    Feeds are polled concurrently (workers, default RSS_FETCH_WORKERS) and yielded in config order.
+    With conn, ETag/Last-Modified and last-seen entry ids are kept in feed_cache under cache_key
+    (default: query): unchanged feeds short-circuit on 304 and entries already stored on an earlier
+    run are skipped. Each item then carries its feed's updated cache row in "feed_cache", which
+    insert_raw_docs_bulk saves with the item, so entries are only marked seen once stored.
+    With strict, a failed feed request raises (when its turn comes) instead of being skipped.
     """
-    for feed_url in feeds:
-        try:
-            parsed = feedparser.parse(feed_url)
-        except Exception as e:
-            logger.warning("RSS fetch %s failed: %s", feed_url, e)
-            continue
-        count = 0
-        for entry in parsed.entries:
-            if limit_per_feed and count >= limit_per_feed:
-                break
-            title = entry.get("title") or ""
-            link = entry.get("link") or ""
-            summary = entry.get("summary", "") or ""
-            body = (title + "\n\n" + summary)[:50000]
-            text = (title + " " + summary).lower()
-            if query and query.lower() not in text:
+    if not feeds:
+        return
+    key = query if cache_key is None else cache_key
+    cache = get_feed_cache(conn, key) if conn is not None else {}
+    pool = ThreadPoolExecutor(max_workers=max(1, RSS_WORKERS if workers is None else workers), thread_name_prefix="rss")
+    try:
+        results = pool.map(lambda u: (u, _poll_feed(u, cache.get(u), strict)), feeds)
+        for feed_url, (status, parsed, etag, last_modified) in results:
+            if status == 304:
+                logger.debug("RSS %s not modified", feed_url)
+                continue
+            if parsed is None:
+                continue
+            seen = list((cache.get(feed_url) or {}).get("seen_ids") or [])
+            seen_set = set(seen)
+            items, truncated = [], False
+            for entry in parsed.entries:
+                entry_id = _entry_id(entry)
+                if entry_id and entry_id in seen_set:
+                    continue
+                title = entry.get("title") or ""
+                summary = entry.get("summary", "") or ""
+                text = (title + " " + summary).lower()
+                if query and query.lower() not in text:
+                    continue
+                if limit_per_feed and len(items) >= limit_per_feed:
+                    truncated = True
+                    break
+                items.append((entry_id, {
+                    "url": entry.get("link") or "",
+                    "title": title,
+                    "body": (title + "\n\n" + summary)[:50000],
+                    "source_type": "rss",
+                    "published_at": _parse_date(entry),
+                }))
+            if conn is None:
+                yield from (item for _, item in items)
+                continue
+            if not items:  # nothing pending: the validators can be kept right away
+                save_feed_cache(conn, feed_url, key, etag, last_modified, seen[-MAX_SEEN_IDS:])
                 continue
-            published_at = _parse_date(entry)
-            count += 1
-            yield {
-                "url": link,
-                "title": title,
-                "body": body,
-                "source_type": "rss",
-                "published_at": published_at,
-            }
+            for i, (entry_id, item) in enumerate(items):
+                if entry_id:
+                    seen.append(entry_id)
+                # Validators only with the feed's last item, and not when entries were left for the
+                # next run (a 304 would hide them); earlier items just advance seen_ids.
+                complete = i == len(items) - 1 and not truncated
+                item["feed_cache"] = {
+                    "feed_url": feed_url,
+                    "query": key,
+                    "etag": etag if complete else None,
+                    "last_modified": last_modified if complete else None,
+                    "seen_ids": seen[-MAX_SEEN_IDS:],
+                }
+                yield item
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
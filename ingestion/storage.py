@@ -3,9 +3,9 @@
 import json
 import logging
 import sqlite3
-from datetime import datetime
+from datetime import datetime, timedelta
 from pathlib import Path
-from typing import Any
+from typing import Any, Iterable
 
 logger = logging.getLogger(__name__)
 
@@ -27,12 +27,29 @@ def get_db_path() -> Path:
 def get_connection() -> sqlite3.Connection:
     path = get_db_path()
     path.parent.mkdir(parents=True, exist_ok=True)
-    conn = sqlite3.connect(str(path))
+    conn = sqlite3.connect(str(path), timeout=30)
     conn.row_factory = sqlite3.Row
+    # WAL + NORMAL: commits no longer fsync the main DB file; safe against app crashes.
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
     return conn
 
 
+def _chunks(seq: list, size: int = 500) -> Iterable[list]:
+    for i in range(0, len(seq), size):
+        yield seq[i : i + size]
+
+
+def _add_missing_columns(conn: sqlite3.Connection, table: str, columns: dict[str, str]) -> None:
+    """ALTER TABLE ADD COLUMN for columns missing from a DB created by an older version."""
+    have = {r["name"] for r in conn.execute(f"PRAGMA table_info({table})")}
+    for name, decl in columns.items():
+        if name not in have:
+            conn.execute(f"ALTER TABLE {table} ADD COLUMN {name} {decl}")
+
+
 def init_schema(conn: sqlite3.Connection) -> None:
+    _drop_untopical_daily(conn)
     conn.executescript("""
         CREATE TABLE IF NOT EXISTS raw_docs (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -78,6 +95,154 @@ def init_schema(conn: sqlite3.Connection) -> None:
             FOREIGN KEY (doc_id_b) REFERENCES raw_docs(id)
         );
 
+        CREATE TABLE IF NOT EXISTS contradiction_verdicts (
+            pair_key TEXT PRIMARY KEY,
+            hash_a TEXT NOT NULL,
+            hash_b TEXT NOT NULL,
+            topic TEXT,
+            verdict INTEGER NOT NULL,
+            prompt_version TEXT,
+            model TEXT,
+            created_at TEXT NOT NULL
+        );
+
+        CREATE TABLE IF NOT EXISTS feed_cache (
+            feed_url TEXT NOT NULL,
+            query TEXT NOT NULL DEFAULT '',
+            etag TEXT,
+            last_modified TEXT,
+            seen_ids_json TEXT,
+            checked_at TEXT NOT NULL,
+            PRIMARY KEY (feed_url, query)
+        );
+
+        CREATE TABLE IF NOT EXISTS doc_minhash (
+            doc_id INTEGER PRIMARY KEY,
+            signature BLOB NOT NULL,
+            FOREIGN KEY (doc_id) REFERENCES raw_docs(id)
+        );
+
+        CREATE TABLE IF NOT EXISTS minhash_bands (
+            band INTEGER NOT NULL,
+            bucket TEXT NOT NULL,
+            doc_id INTEGER NOT NULL,
+            PRIMARY KEY (band, bucket, doc_id)
+        ) WITHOUT ROWID;
+
+        CREATE TABLE IF NOT EXISTS near_duplicates (
+            doc_id INTEGER PRIMARY KEY,
+            canonical_id INTEGER NOT NULL,
+            similarity REAL,
+            created_at TEXT NOT NULL,
+            FOREIGN KEY (doc_id) REFERENCES raw_docs(id)
+        );
+        CREATE INDEX IF NOT EXISTS idx_near_duplicates_canonical ON near_duplicates(canonical_id);
+
+        CREATE TABLE IF NOT EXISTS bm25_docs (
+            doc_id INTEGER PRIMARY KEY,
+            length INTEGER NOT NULL
+        );
+
+        CREATE TABLE IF NOT EXISTS bm25_postings (
+            term TEXT NOT NULL,
+            doc_id INTEGER NOT NULL,
+            tf INTEGER NOT NULL,
+            PRIMARY KEY (term, doc_id)
+        ) WITHOUT ROWID;
+        CREATE INDEX IF NOT EXISTS idx_bm25_postings_doc ON bm25_postings(doc_id);
+
+        CREATE TABLE IF NOT EXISTS entities (
+            id INTEGER PRIMARY KEY,
+            name TEXT NOT NULL UNIQUE COLLATE NOCASE
+        );
+
+        CREATE TABLE IF NOT EXISTS doc_entities (
+            extraction_id INTEGER NOT NULL,
+            entity_id INTEGER NOT NULL,
+            doc_id INTEGER NOT NULL,
+            topic TEXT NOT NULL DEFAULT '',
+            PRIMARY KEY (extraction_id, entity_id)
+        ) WITHOUT ROWID;
+        CREATE INDEX IF NOT EXISTS idx_doc_entities_entity ON doc_entities(entity_id, doc_id);
+        CREATE INDEX IF NOT EXISTS idx_doc_entities_doc ON doc_entities(doc_id);
+
+        CREATE TABLE IF NOT EXISTS events (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            extraction_id INTEGER NOT NULL,
+            doc_id INTEGER NOT NULL,
+            text TEXT NOT NULL,
+            topic TEXT NOT NULL DEFAULT ''
+        );
+        CREATE INDEX IF NOT EXISTS idx_events_extraction ON events(extraction_id);
+        CREATE INDEX IF NOT EXISTS idx_events_doc ON events(doc_id);
+
+        CREATE TABLE IF NOT EXISTS doc_signal_tags (
+            extraction_id INTEGER NOT NULL,
+            tag TEXT NOT NULL,
+            doc_id INTEGER NOT NULL,
+            topic TEXT NOT NULL DEFAULT '',
+            PRIMARY KEY (extraction_id, tag)
+        ) WITHOUT ROWID;
+        CREATE INDEX IF NOT EXISTS idx_doc_signal_tags_tag ON doc_signal_tags(tag, doc_id);
+
+        CREATE TABLE IF NOT EXISTS entity_daily (
+            topic TEXT NOT NULL,
+            day TEXT NOT NULL,
+            entity_id INTEGER NOT NULL,
+            n INTEGER NOT NULL,
+            PRIMARY KEY (topic, day, entity_id)
+        ) WITHOUT ROWID;
+
+        CREATE TABLE IF NOT EXISTS signal_daily (
+            topic TEXT NOT NULL,
+            day TEXT NOT NULL,
+            tag TEXT NOT NULL,
+            n INTEGER NOT NULL,
+            PRIMARY KEY (topic, day, tag)
+        ) WITHOUT ROWID;
+
+        CREATE TABLE IF NOT EXISTS runs (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            topic TEXT NOT NULL DEFAULT '',
+            mode TEXT,
+            status TEXT NOT NULL,
+            error TEXT,
+            started_at TEXT NOT NULL,
+            finished_at TEXT
+        );
+        CREATE INDEX IF NOT EXISTS idx_runs_topic ON runs(topic, started_at);
+
+        CREATE TABLE IF NOT EXISTS run_steps (
+            id INTEGER PRIMARY KEY,
+            run_id INTEGER NOT NULL,
+            step TEXT NOT NULL,
+            status TEXT NOT NULL,
+            started_at TEXT NOT NULL,
+            duration_sec REAL NOT NULL,
+            cpu_sec REAL,
+            peak_rss_mb REAL,
+            counts_json TEXT,
+            llm_json TEXT,
+            error TEXT
+        );
+        CREATE INDEX IF NOT EXISTS idx_run_steps_run ON run_steps(run_id);
+        CREATE INDEX IF NOT EXISTS idx_run_steps_step ON run_steps(step, run_id);
+
+        CREATE TABLE IF NOT EXISTS doc_topics (
+            topic TEXT NOT NULL,
+            doc_id INTEGER NOT NULL,
+            run_id INTEGER,
+            added_at TEXT NOT NULL,
+            PRIMARY KEY (topic, doc_id)
+        ) WITHOUT ROWID;
+        CREATE INDEX IF NOT EXISTS idx_doc_topics_doc ON doc_topics(doc_id);
+
+        CREATE TABLE IF NOT EXISTS stage_state (
+            stage TEXT PRIMARY KEY,
+            state_json TEXT NOT NULL,
+            updated_at TEXT NOT NULL
+        );
+
         CREATE TABLE IF NOT EXISTS reports (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
             report_json TEXT NOT NULL,
@@ -86,9 +251,227 @@ def init_schema(conn: sqlite3.Connection) -> None:
             generated_at TEXT NOT NULL
         );
     """)
+    _add_missing_columns(conn, "extractions", {
+        "topic": "TEXT",
+        "content_hash": "TEXT",
+        "prompt_version": "TEXT",
+        "model": "TEXT",
+        "extraction_key": "TEXT",
+        "run_id": "INTEGER",
+        "llm_failures": "INTEGER NOT NULL DEFAULT 0",
+    })
+    _add_missing_columns(conn, "raw_docs", {"run_id": "INTEGER"})
+    _add_missing_columns(conn, "runs", {
+        "duration_sec": "REAL",
+        "cpu_sec": "REAL",
+        "peak_rss_mb": "REAL",
+        "llm_cost_usd": "REAL",
+    })
+    _add_missing_columns(conn, "contradictions", {"topic": "TEXT NOT NULL DEFAULT ''", "run_id": "INTEGER"})
+    _add_missing_columns(conn, "reports", {"topic": "TEXT NOT NULL DEFAULT ''", "run_id": "INTEGER"})
+    for table in ("doc_entities", "events", "doc_signal_tags"):
+        _add_missing_columns(conn, table, {"topic": "TEXT NOT NULL DEFAULT ''"})
+    conn.executescript("""
+        CREATE UNIQUE INDEX IF NOT EXISTS idx_extractions_key ON extractions(extraction_key);
+        CREATE INDEX IF NOT EXISTS idx_extractions_doc_topic ON extractions(doc_id, topic);
+        CREATE INDEX IF NOT EXISTS idx_doc_entities_topic ON doc_entities(topic, entity_id, doc_id);
+        CREATE INDEX IF NOT EXISTS idx_events_topic ON events(topic, doc_id);
+        CREATE INDEX IF NOT EXISTS idx_doc_signal_tags_topic ON doc_signal_tags(topic, tag);
+        CREATE INDEX IF NOT EXISTS idx_reports_topic ON reports(topic, generated_at);
+
+        -- A doc whose title/body changes under the same id leaves the BM25 index, so
+        -- report.retrieval.update_index re-indexes it (BEFORE INSERT: INSERT OR REPLACE
+        -- fires no delete triggers).
+        CREATE TRIGGER IF NOT EXISTS processed_docs_bm25_bi BEFORE INSERT ON processed_docs BEGIN
+            DELETE FROM bm25_docs WHERE doc_id = new.id AND EXISTS (
+                SELECT 1 FROM processed_docs WHERE id = new.id AND (title IS NOT new.title OR body IS NOT new.body)
+            );
+        END;
+        CREATE TRIGGER IF NOT EXISTS processed_docs_bm25_au AFTER UPDATE OF title, body ON processed_docs
+        WHEN old.title IS NOT new.title OR old.body IS NOT new.body BEGIN
+            DELETE FROM bm25_docs WHERE doc_id = new.id;
+        END;
+
+        CREATE TRIGGER IF NOT EXISTS extractions_ad AFTER DELETE ON extractions BEGIN
+            DELETE FROM doc_entities WHERE extraction_id = old.id;
+            DELETE FROM events WHERE extraction_id = old.id;
+            DELETE FROM doc_signal_tags WHERE extraction_id = old.id;
+        END;
+    """)
+    _init_daily_triggers(conn)
+    version = conn.execute("PRAGMA user_version").fetchone()[0]
+    if version < 1:
+        _backfill_extraction_parts(conn)
+    if version < 3:
+        # v3: entity/event/tag rows and the daily aggregates carry their extraction's topic.
+        for table in ("doc_entities", "events", "doc_signal_tags"):
+            conn.execute(
+                f"UPDATE {table} SET topic = COALESCE((SELECT topic FROM extractions x WHERE x.id = extraction_id), '')"
+            )
+        _rebuild_daily(conn)
+        # Docs already extracted for a topic start out in its partition.
+        conn.execute(
+            """INSERT OR IGNORE INTO doc_topics (topic, doc_id, run_id, added_at)
+               SELECT topic, doc_id, run_id, created_at FROM extractions WHERE topic IS NOT NULL AND topic != ''"""
+        )
+        conn.execute("PRAGMA user_version = 3")
+    if not conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'idx_contradictions_topic_pair'").fetchone():
+        # Older runs could store the same pair once per run; keep the first before enforcing uniqueness.
+        conn.execute(
+            "DELETE FROM contradictions WHERE id NOT IN "
+            "(SELECT MIN(id) FROM contradictions GROUP BY topic, doc_id_a, doc_id_b)"
+        )
+        conn.execute("DROP INDEX IF EXISTS idx_contradictions_pair")
+        conn.execute("CREATE UNIQUE INDEX idx_contradictions_topic_pair ON contradictions(topic, doc_id_a, doc_id_b)")
+    _init_fts(conn)
     conn.commit()
 
 
+def _drop_untopical_daily(conn: sqlite3.Connection) -> None:
+    """Daily aggregates from before topic partitioning are keyed without topic: drop them to be rebuilt."""
+    cols = {r["name"] for r in conn.execute("PRAGMA table_info(entity_daily)")}
+    if cols and "topic" not in cols:
+        conn.executescript("""
+            DROP TRIGGER IF EXISTS doc_entities_daily_ai;
+            DROP TRIGGER IF EXISTS doc_entities_daily_ad;
+            DROP TRIGGER IF EXISTS doc_signal_tags_daily_ai;
+            DROP TRIGGER IF EXISTS doc_signal_tags_daily_ad;
+            DROP TABLE IF EXISTS entity_daily;
+            DROP TABLE IF EXISTS signal_daily;
+        """)
+
+
+def _backfill_extraction_parts(conn: sqlite3.Connection) -> None:
+    """Fill the normalized entity/event/tag tables from extractions stored before they existed."""
+    n = 0
+    for r in conn.cursor().execute(
+        "SELECT id, doc_id, entities_json, events_json, signal_tags_json, topic FROM extractions"
+    ):
+        _insert_extraction_parts(
+            conn, r["id"], r["doc_id"], json.loads(r["entities_json"] or "[]"),
+            json.loads(r["events_json"] or "[]"), json.loads(r["signal_tags_json"] or "[]"), r["topic"],
+        )
+        n += 1
+    if n:
+        logger.info("Normalized %s stored extractions into entity/event/tag tables", n)
+
+
+# Day bucket of a doc: its publication date, else the fetch date, else today (UTC).
+_DOC_DAY = (
+    "(SELECT COALESCE(date(NULLIF(published_at, '')), date(fetched_at)) FROM raw_docs WHERE id = {doc_id})"
+)
+
+
+def _init_daily_triggers(conn: sqlite3.Connection) -> None:
+    """Keep entity_daily / signal_daily in step with doc_entities / doc_signal_tags."""
+    new_day = f"COALESCE({_DOC_DAY.format(doc_id='new.doc_id')}, date('now'))"
+    old_day = f"COALESCE({_DOC_DAY.format(doc_id='old.doc_id')}, date('now'))"
+    conn.executescript(f"""
+        CREATE TRIGGER IF NOT EXISTS doc_entities_daily_ai AFTER INSERT ON doc_entities BEGIN
+            INSERT INTO entity_daily (topic, day, entity_id, n) VALUES (new.topic, {new_day}, new.entity_id, 1)
+            ON CONFLICT(topic, day, entity_id) DO UPDATE SET n = n + 1;
+        END;
+        CREATE TRIGGER IF NOT EXISTS doc_entities_daily_ad AFTER DELETE ON doc_entities BEGIN
+            UPDATE entity_daily SET n = n - 1
+            WHERE topic = old.topic AND day = {old_day} AND entity_id = old.entity_id;
+            DELETE FROM entity_daily
+            WHERE topic = old.topic AND day = {old_day} AND entity_id = old.entity_id AND n <= 0;
+        END;
+        CREATE TRIGGER IF NOT EXISTS doc_signal_tags_daily_ai AFTER INSERT ON doc_signal_tags BEGIN
+            INSERT INTO signal_daily (topic, day, tag, n) VALUES (new.topic, {new_day}, new.tag, 1)
+            ON CONFLICT(topic, day, tag) DO UPDATE SET n = n + 1;
+        END;
+        CREATE TRIGGER IF NOT EXISTS doc_signal_tags_daily_ad AFTER DELETE ON doc_signal_tags BEGIN
+            UPDATE signal_daily SET n = n - 1 WHERE topic = old.topic AND day = {old_day} AND tag = old.tag;
+            DELETE FROM signal_daily WHERE topic = old.topic AND day = {old_day} AND tag = old.tag AND n <= 0;
+        END;
+    """)
+
+
+def _rebuild_daily(conn: sqlite3.Connection) -> None:
+    """Recompute the daily aggregates from scratch (migration; triggers maintain them afterwards)."""
+    day = f"COALESCE({_DOC_DAY.format(doc_id='x.doc_id')}, date('now'))"
+    conn.execute("DELETE FROM entity_daily")
+    conn.execute("DELETE FROM signal_daily")
+    conn.execute(
+        f"INSERT INTO entity_daily (topic, day, entity_id, n) SELECT x.topic, {day} AS d, x.entity_id, COUNT(*) "
+        "FROM doc_entities x GROUP BY x.topic, d, x.entity_id"
+    )
+    conn.execute(
+        f"INSERT INTO signal_daily (topic, day, tag, n) SELECT x.topic, {day} AS d, x.tag, COUNT(*) "
+        "FROM doc_signal_tags x GROUP BY x.topic, d, x.tag"
+    )
+
+
+def _init_fts(conn: sqlite3.Connection) -> None:
+    """
+    FTS5 index mirroring processed_docs(title, body), kept in sync by triggers.
+    The BEFORE INSERT trigger removes the old entry, because INSERT OR REPLACE does not fire
+    delete triggers (recursive_triggers is off). Skipped if SQLite lacks FTS5.
+    """
+    if conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'processed_docs_fts'").fetchone():
+        return
+    try:
+        conn.executescript("""
+            CREATE VIRTUAL TABLE processed_docs_fts USING fts5(
+                title, body, content='processed_docs', content_rowid='id', tokenize='porter unicode61'
+            );
+            CREATE TRIGGER processed_docs_fts_bi BEFORE INSERT ON processed_docs BEGIN
+                INSERT INTO processed_docs_fts(processed_docs_fts, rowid, title, body)
+                SELECT 'delete', id, title, body FROM processed_docs WHERE id = new.id;
+            END;
+            CREATE TRIGGER processed_docs_fts_ai AFTER INSERT ON processed_docs BEGIN
+                INSERT INTO processed_docs_fts(rowid, title, body) VALUES (new.id, new.title, new.body);
+            END;
+            CREATE TRIGGER processed_docs_fts_ad AFTER DELETE ON processed_docs BEGIN
+                INSERT INTO processed_docs_fts(processed_docs_fts, rowid, title, body)
+                VALUES ('delete', old.id, old.title, old.body);
+            END;
+            CREATE TRIGGER processed_docs_fts_au AFTER UPDATE ON processed_docs BEGIN
+                INSERT INTO processed_docs_fts(processed_docs_fts, rowid, title, body)
+                VALUES ('delete', old.id, old.title, old.body);
+                INSERT INTO processed_docs_fts(rowid, title, body) VALUES (new.id, new.title, new.body);
+            END;
+            INSERT INTO processed_docs_fts(processed_docs_fts) VALUES ('rebuild');
+        """)
+    except sqlite3.OperationalError as e:
+        logger.warning("SQLite FTS5 unavailable; search_docs falls back to a full scan: %s", e)
+
+
+def _fts_query(query: str, match_any: bool = False) -> str:
+    """Quote each word so user text is matched literally (implicit AND, or OR with match_any), not parsed as FTS syntax."""
+    return (" OR " if match_any else " ").join('"' + w.replace('"', '""') + '"' for w in query.split())
+
+
+def search_docs(conn: sqlite3.Connection, query: str, limit: int = 20, match_any: bool = False) -> list[dict[str, Any]]:
+    """
+    Full-text search over processed_docs title/body. Returns ranked
+    [{id, title, url, snippet, score}] (lower score = better match, FTS5 bm25).
+    By default every word must match; match_any ranks docs matching any of the words.
+    """
+    if not query.strip():
+        return []
+    has_fts = conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'processed_docs_fts'").fetchone()
+    if has_fts:
+        rows = conn.execute(
+            """SELECT p.id, p.title, p.url,
+                      snippet(processed_docs_fts, 1, '[', ']', '...', 12) AS snippet,
+                      bm25(processed_docs_fts, 2.0, 1.0) AS score
+               FROM processed_docs_fts JOIN processed_docs p ON p.id = processed_docs_fts.rowid
+               WHERE processed_docs_fts MATCH ? ORDER BY score LIMIT ?""",
+            (_fts_query(query, match_any), int(limit)),
+        ).fetchall()
+        return [dict(r) for r in rows]
+    words = query.lower().split()
+    where = (" OR " if match_any else " AND ").join("(LOWER(title) LIKE ? OR LOWER(body) LIKE ?)" for _ in words)
+    params = [p for w in words for p in (f"%{w}%", f"%{w}%")]
+    rows = conn.execute(
+        f"SELECT id, title, url, substr(body, 1, 120) AS snippet, 0.0 AS score FROM processed_docs WHERE {where} ORDER BY id DESC LIMIT ?",
+        (*params, int(limit)),
+    ).fetchall()
+    return [dict(r) for r in rows]
+
+
 def insert_raw_doc(
     conn: sqlite3.Connection,
     url: str,
@@ -97,17 +480,51 @@ def insert_raw_doc(
     source_type: str,
     published_at: str | None = None,
 ) -> int:
+    inserted, existing = insert_raw_docs_bulk(conn, [{
+        "url": url, "title": title, "body": body, "source_type": source_type, "published_at": published_at,
+    }])
+    return (inserted or existing or [0])[0]
+
+
+def insert_raw_docs_bulk(
+    conn: sqlite3.Connection,
+    items: Iterable[dict[str, Any]],
+    run_id: int | None = None,
+    topic: str | None = None,
+) -> tuple[list[int], list[int]]:
+    """
+    Insert many docs (dicts with url, title, body, source_type, published_at) in one transaction.
+    Returns (inserted_ids, existing_ids); a URL already in raw_docs is reported, not rewritten.
+    New rows record run_id; with topic, all the docs (new and existing) join that topic's partition.
+    An item's "feed_cache" row (RSS, see fetch_rss_feeds) is saved in the same transaction.
+    """
     fetched_at = datetime.utcnow().isoformat() + "Z"
-    cur = conn.execute(
-        "INSERT OR IGNORE INTO raw_docs (url, title, body, source_type, published_at, fetched_at) VALUES (?, ?, ?, ?, ?, ?)",
-        (url, title, body, source_type, published_at or fetched_at, fetched_at),
-    )
-    conn.commit()
-    if cur.lastrowid and cur.lastrowid > 0:
-        return cur.lastrowid
-    cur = conn.execute("SELECT id FROM raw_docs WHERE url = ?", (url,))
-    row = cur.fetchone()
-    return row["id"] if row else 0
+    inserted: list[int] = []
+    existing_urls: list[str] = []
+    feed_caches: dict[str, dict[str, Any]] = {}
+    with conn:
+        for item in items:
+            if item.get("feed_cache"):
+                feed_caches[item["feed_cache"]["feed_url"]] = item["feed_cache"]
+            row = conn.execute(
+                """INSERT INTO raw_docs (url, title, body, source_type, published_at, fetched_at, run_id)
+                   VALUES (?, ?, ?, ?, ?, ?, ?) ON CONFLICT(url) DO NOTHING RETURNING id""",
+                (item["url"], item["title"], item["body"], item["source_type"],
+                 item.get("published_at") or fetched_at, fetched_at, run_id),
+            ).fetchone()
+            if row:
+                inserted.append(row["id"])
+            else:
+                existing_urls.append(item["url"])
+        for fc in feed_caches.values():  # items of one feed come in order: the last carries its state
+            _upsert_feed_cache(conn, fc["feed_url"], fc["query"], fc["etag"], fc["last_modified"], fc["seen_ids"])
+    existing: list[int] = []
+    for chunk in _chunks(existing_urls):
+        marks = ",".join("?" * len(chunk))
+        existing.extend(r["id"] for r in conn.execute(f"SELECT id FROM raw_docs WHERE url IN ({marks})", chunk))
+    if topic:
+        add_doc_topics(conn, topic, inserted + existing, run_id)
+    return inserted, existing
 
 
 def get_raw_docs(conn: sqlite3.Connection, limit: int | None = None) -> list[dict[str, Any]]:
@@ -118,6 +535,66 @@ def get_raw_docs(conn: sqlite3.Connection, limit: int | None = None) -> list[dic
     return [dict(r) for r in rows]
 
 
+def get_feed_cache(conn: sqlite3.Connection, query: str | None = None) -> dict[str, dict[str, Any]]:
+    """Per-feed HTTP validators and last-seen entry ids for this cache key (topic), keyed by feed URL."""
+    rows = conn.execute(
+        "SELECT feed_url, etag, last_modified, seen_ids_json FROM feed_cache WHERE query = ?",
+        (query or "",),
+    ).fetchall()
+    return {
+        r["feed_url"]: {
+            "etag": r["etag"],
+            "last_modified": r["last_modified"],
+            "seen_ids": json.loads(r["seen_ids_json"] or "[]"),
+        }
+        for r in rows
+    }
+
+
+def save_feed_cache(
+    conn: sqlite3.Connection,
+    feed_url: str,
+    query: str | None,
+    etag: str | None,
+    last_modified: str | None,
+    seen_ids: list[str],
+) -> None:
+    _upsert_feed_cache(conn, feed_url, query, etag, last_modified, seen_ids)
+    conn.commit()
+
+
+def _upsert_feed_cache(
+    conn: sqlite3.Connection,
+    feed_url: str,
+    query: str | None,
+    etag: str | None,
+    last_modified: str | None,
+    seen_ids: list[str],
+) -> None:
+    checked_at = datetime.utcnow().isoformat() + "Z"
+    conn.execute(
+        """INSERT OR REPLACE INTO feed_cache (feed_url, query, etag, last_modified, seen_ids_json, checked_at)
+           VALUES (?, ?, ?, ?, ?, ?)""",
+        (feed_url, query or "", etag, last_modified, json.dumps(seen_ids), checked_at),
+    )
+
+
+def get_stage_state(conn: sqlite3.Connection, stage: str) -> dict[str, Any]:
+    """Watermarks and settings a stage saved on its last run ({} if none)."""
+    row = conn.execute("SELECT state_json FROM stage_state WHERE stage = ?", (stage,)).fetchone()
+    return json.loads(row["state_json"]) if row else {}
+
+
+def set_stage_state(conn: sqlite3.Connection, stage: str, state: dict[str, Any], commit: bool = True) -> None:
+    updated_at = datetime.utcnow().isoformat() + "Z"
+    conn.execute(
+        "INSERT OR REPLACE INTO stage_state (stage, state_json, updated_at) VALUES (?, ?, ?)",
+        (stage, json.dumps(state), updated_at),
+    )
+    if commit:
+        conn.commit()
+
+
 def insert_processed_doc(
     conn: sqlite3.Connection,
     doc_id: int,
@@ -137,45 +614,429 @@ def insert_processed_doc(
     conn.commit()
 
 
-def get_processed_docs(conn: sqlite3.Connection) -> list[dict[str, Any]]:
-    rows = conn.execute(
-        "SELECT id, url, title, body, source_type, source_tier, published_at, fetched_at FROM processed_docs ORDER BY id"
-    ).fetchall()
+def get_processed_docs(conn: sqlite3.Connection, topic: str | None = None) -> list[dict[str, Any]]:
+    """All processed docs, or only those in topic's partition (doc_topics)."""
+    cols = "p.id, p.url, p.title, p.body, p.source_type, p.source_tier, p.published_at, p.fetched_at"
+    if topic is None:
+        rows = conn.execute(f"SELECT {cols} FROM processed_docs p ORDER BY p.id").fetchall()
+    else:
+        rows = conn.execute(
+            f"SELECT {cols} FROM doc_topics t JOIN processed_docs p ON p.id = t.doc_id WHERE t.topic = ? ORDER BY p.id",
+            (topic,),
+        ).fetchall()
     return [dict(r) for r in rows]
 
 
+def add_doc_topics(
+    conn: sqlite3.Connection,
+    topic: str,
+    doc_ids: Iterable[int],
+    run_id: int | None = None,
+    commit: bool = True,
+) -> int:
+    """Add docs to topic's partition (a doc can belong to several topics). Returns how many were new."""
+    added_at = datetime.utcnow().isoformat() + "Z"
+    n = conn.executemany(
+        "INSERT OR IGNORE INTO doc_topics (topic, doc_id, run_id, added_at) VALUES (?, ?, ?, ?)",
+        [(topic, d, run_id, added_at) for d in doc_ids],
+    ).rowcount
+    if commit:
+        conn.commit()
+    return max(n, 0)
+
+
+def get_topic_doc_count(conn: sqlite3.Connection, topic: str) -> int:
+    """Processed docs in topic's partition."""
+    return conn.execute(
+        "SELECT COUNT(*) FROM doc_topics t JOIN processed_docs p ON p.id = t.doc_id WHERE t.topic = ?", (topic,)
+    ).fetchone()[0]
+
+
+def start_run_record(conn: sqlite3.Connection, topic: str | None, mode: str) -> int:
+    """Insert a runs row (status running); returns the run id."""
+    cur = conn.execute(
+        "INSERT INTO runs (topic, mode, status, started_at) VALUES (?, ?, 'running', ?)",
+        (topic or "", mode, datetime.utcnow().isoformat() + "Z"),
+    )
+    conn.commit()
+    return cur.lastrowid
+
+
+def finish_run_record(conn: sqlite3.Connection, run_id: int, success: bool = True, error: str | None = None) -> None:
+    conn.execute(
+        "UPDATE runs SET status = ?, error = ?, finished_at = ? WHERE id = ?",
+        ("done" if success else "failed", error, datetime.utcnow().isoformat() + "Z", run_id),
+    )
+    conn.commit()
+
+
+def insert_run_step(
+    conn: sqlite3.Connection,
+    run_id: int,
+    step: str,
+    status: str,
+    started_at: str,
+    duration_sec: float,
+    cpu_sec: float | None = None,
+    peak_rss_mb: float | None = None,
+    counts: dict[str, Any] | None = None,
+    llm: dict[str, Any] | None = None,
+    error: str | None = None,
+) -> None:
+    """One finished step of a run (timing, resource usage, stage counts and LLM usage) for the run history."""
+    conn.execute(
+        """INSERT INTO run_steps (run_id, step, status, started_at, duration_sec, cpu_sec, peak_rss_mb,
+                                  counts_json, llm_json, error)
+           VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+        (run_id, step, status, started_at, duration_sec, cpu_sec, peak_rss_mb,
+         json.dumps(counts, default=str) if counts else None, json.dumps(llm) if llm else None, error),
+    )
+    conn.commit()
+
+
+def update_run_usage(
+    conn: sqlite3.Connection,
+    run_id: int,
+    duration_sec: float,
+    cpu_sec: float | None = None,
+    peak_rss_mb: float | None = None,
+    llm_cost_usd: float | None = None,
+) -> None:
+    conn.execute(
+        "UPDATE runs SET duration_sec = ?, cpu_sec = ?, peak_rss_mb = ?, llm_cost_usd = ? WHERE id = ?",
+        (duration_sec, cpu_sec, peak_rss_mb, llm_cost_usd, run_id),
+    )
+    conn.commit()
+
+
+def get_run_history(
+    conn: sqlite3.Connection,
+    last: int = 10,
+    topic: str | None = None,
+    mode: str | None = None,
+) -> list[dict[str, Any]]:
+    """
+    The last finished runs (newest first, optionally one topic/mode), each with its steps:
+    [{id, topic, mode, status, started_at, duration_sec, cpu_sec, peak_rss_mb, llm_cost_usd, steps: {name: row}}].
+    """
+    where, params = ["finished_at IS NOT NULL"], []
+    if topic is not None:
+        where.append("topic = ?")
+        params.append(topic)
+    if mode is not None:
+        where.append("mode = ?")
+        params.append(mode)
+    runs = [dict(r) for r in conn.execute(
+        f"""SELECT id, topic, mode, status, error, started_at, finished_at, duration_sec, cpu_sec, peak_rss_mb,
+                   llm_cost_usd
+            FROM runs WHERE {" AND ".join(where)} ORDER BY id DESC LIMIT ?""",
+        (*params, int(last)),
+    )]
+    by_id = {r["id"]: dict(r, steps={}) for r in runs}
+    for chunk in _chunks(list(by_id)):
+        marks = ",".join("?" * len(chunk))
+        for r in conn.execute(f"SELECT * FROM run_steps WHERE run_id IN ({marks}) ORDER BY id", chunk):
+            step = dict(r)
+            step["counts"] = json.loads(step.pop("counts_json") or "{}")
+            step["llm"] = json.loads(step.pop("llm_json") or "{}")
+            by_id[r["run_id"]]["steps"][r["step"]] = step
+    return [by_id[r["id"]] for r in runs]
+
+
+def get_processed_docs_by_ids(conn: sqlite3.Connection, ids: list[int]) -> dict[int, dict[str, Any]]:
+    """processed_docs rows for the given ids, keyed by id (ids no longer present are omitted)."""
+    out: dict[int, dict[str, Any]] = {}
+    for chunk in _chunks(list(ids)):
+        marks = ",".join("?" * len(chunk))
+        for r in conn.execute(
+            f"""SELECT id, url, title, body, source_type, source_tier, published_at, fetched_at
+                FROM processed_docs WHERE id IN ({marks})""",
+            chunk,
+        ):
+            out[r["id"]] = dict(r)
+    return out
+
+
 def insert_extraction(
     conn: sqlite3.Connection,
     doc_id: int,
     entities: list[Any],
     events: list[Any],
     signal_tags: list[str],
+    topic: str | None = None,
+    extraction_key: str | None = None,
+    content_hash: str | None = None,
+    prompt_version: str | None = None,
+    model: str | None = None,
+    commit: bool = True,
+    run_id: int | None = None,
+    llm_failures: int = 0,
 ) -> int:
+    """
+    Store one extraction. With topic set, earlier extractions of the same doc for that topic
+    (including legacy rows without a topic) are replaced. A row whose extraction_key already
+    exists is left alone and its id returned. llm_failures counts failed LLM attempts behind a
+    keyless provisional row.
+    """
     created_at = datetime.utcnow().isoformat() + "Z"
-    cur = conn.execute(
-        """INSERT INTO extractions (doc_id, entities_json, events_json, signal_tags_json, created_at)
-           VALUES (?, ?, ?, ?, ?)""",
-        (doc_id, json.dumps(entities), json.dumps(events), json.dumps(signal_tags), created_at),
+    if topic is not None:
+        conn.execute(
+            """DELETE FROM extractions WHERE doc_id = ? AND (topic = ? OR topic IS NULL)
+               AND (extraction_key IS NULL OR extraction_key IS NOT ?)""",
+            (doc_id, topic, extraction_key),
+        )
+    row = conn.execute(
+        """INSERT INTO extractions (doc_id, entities_json, events_json, signal_tags_json, created_at,
+                                    topic, content_hash, prompt_version, model, extraction_key, run_id,
+                                    llm_failures)
+           VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+           ON CONFLICT(extraction_key) DO NOTHING RETURNING id""",
+        (doc_id, json.dumps(entities), json.dumps(events), json.dumps(signal_tags), created_at,
+         topic, content_hash, prompt_version, model, extraction_key, run_id, llm_failures),
+    ).fetchone()
+    if row is None:
+        row = conn.execute("SELECT id FROM extractions WHERE extraction_key = ?", (extraction_key,)).fetchone()
+    else:
+        _insert_extraction_parts(conn, row["id"], doc_id, entities, events, signal_tags, topic)
+    if commit:
+        conn.commit()
+    return row["id"] if row else 0
+
+
+def _entity_id(conn: sqlite3.Connection, name: str) -> int:
+    row = conn.execute("SELECT id FROM entities WHERE name = ?", (name,)).fetchone()
+    if row:
+        return row[0]
+    return conn.execute("INSERT INTO entities (name) VALUES (?)", (name,)).lastrowid
+
+
+def _insert_extraction_parts(
+    conn: sqlite3.Connection,
+    extraction_id: int,
+    doc_id: int,
+    entities: list[Any],
+    events: list[Any],
+    signal_tags: list[str],
+    topic: str | None = None,
+) -> None:
+    """Rows in doc_entities / events / doc_signal_tags for one extraction (names matched case-insensitively)."""
+    topic = topic or ""
+    names: dict[str, str] = {}
+    for x in entities or []:
+        name = str(x).strip()[:200]
+        if name:
+            names.setdefault(name.lower(), name)
+    conn.executemany(
+        "INSERT OR IGNORE INTO doc_entities (extraction_id, entity_id, doc_id, topic) VALUES (?, ?, ?, ?)",
+        [(extraction_id, _entity_id(conn, name), doc_id, topic) for name in names.values()],
     )
-    conn.commit()
-    return cur.lastrowid or 0
+    conn.executemany(
+        "INSERT INTO events (extraction_id, doc_id, text, topic) VALUES (?, ?, ?, ?)",
+        [(extraction_id, doc_id, str(ev).strip(), topic) for ev in events or [] if str(ev).strip()],
+    )
+    conn.executemany(
+        "INSERT OR IGNORE INTO doc_signal_tags (extraction_id, tag, doc_id, topic) VALUES (?, ?, ?, ?)",
+        [(extraction_id, str(t), doc_id, topic) for t in signal_tags or []],
+    )
+
+
+def get_extraction_keys(conn: sqlite3.Connection, keys: list[str]) -> set[str]:
+    """Subset of keys that already have a stored extraction."""
+    found: set[str] = set()
+    for chunk in _chunks(keys):
+        marks = ",".join("?" * len(chunk))
+        found.update(
+            r["extraction_key"]
+            for r in conn.execute(f"SELECT extraction_key FROM extractions WHERE extraction_key IN ({marks})", chunk)
+        )
+    return found
+
+
+def get_extraction_failures(conn: sqlite3.Connection, doc_ids: list[int], topic: str) -> dict[int, tuple[int, str]]:
+    """doc_id → (failed LLM attempts, time of the last one) for docs whose provisional row records failures."""
+    found: dict[int, tuple[int, str]] = {}
+    for chunk in _chunks(doc_ids):
+        marks = ",".join("?" * len(chunk))
+        for r in conn.execute(
+            f"""SELECT doc_id, llm_failures, created_at FROM extractions
+                WHERE topic = ? AND extraction_key IS NULL AND llm_failures > 0 AND doc_id IN ({marks})""",
+            [topic, *chunk],
+        ):
+            found[r["doc_id"]] = (r["llm_failures"], r["created_at"])
+    return found
+
 
+def _topic_filter(topic: str | None, column: str = "topic") -> tuple[str, tuple]:
+    """SQL condition (and its params) restricting a normalized/daily table to one topic; all topics when None."""
+    return (f"{column} = ?", (topic,)) if topic else ("1", ())
 
-def get_extractions(conn: sqlite3.Connection) -> list[dict[str, Any]]:
+
+def get_signal_counts(conn: sqlite3.Connection, topic: str | None = None) -> dict[str, int]:
+    """Number of extractions carrying each signal tag (of one topic, or all)."""
+    where, params = _topic_filter(topic)
+    return {
+        r["tag"]: r["n"]
+        for r in conn.execute(f"SELECT tag, COUNT(*) AS n FROM doc_signal_tags WHERE {where} GROUP BY tag", params)
+    }
+
+
+def get_top_entities(conn: sqlite3.Connection, limit: int = 25, topic: str | None = None) -> list[tuple[str, int]]:
+    """Most-mentioned entities as (name, number of extractions naming it), most frequent first."""
+    where, params = _topic_filter(topic)
     rows = conn.execute(
-        "SELECT id, doc_id, entities_json, events_json, signal_tags_json, created_at FROM extractions ORDER BY doc_id"
+        f"""SELECT e.name, c.n FROM (
+               SELECT entity_id, COUNT(*) AS n FROM doc_entities WHERE {where}
+               GROUP BY entity_id ORDER BY n DESC LIMIT ?
+           ) c JOIN entities e ON e.id = c.entity_id
+           ORDER BY c.n DESC, e.name""",
+        (*params, int(limit)),
     ).fetchall()
+    return [(r["name"], r["n"]) for r in rows]
+
+
+def get_events_sample(conn: sqlite3.Connection, limit: int = 30, topic: str | None = None) -> list[str]:
+    """First extracted events in doc order."""
+    where, params = _topic_filter(topic)
     return [
-        {
-            "id": r["id"], "doc_id": r["doc_id"], "created_at": r["created_at"],
-            "entities": json.loads(r["entities_json"] or "[]"),
-            "events": json.loads(r["events_json"] or "[]"),
-            "signal_tags": json.loads(r["signal_tags_json"] or "[]"),
-        }
-        for r in rows
+        r["text"]
+        for r in conn.execute(f"SELECT text FROM events WHERE {where} ORDER BY doc_id, id LIMIT ?", (*params, int(limit)))
     ]
 
 
+def _window_bounds(window_days: int, baseline_days: int, as_of: str | None) -> tuple[str, str, str]:
+    end = datetime.fromisoformat(as_of[:10]) if as_of else datetime.utcnow()
+    window_start = end - timedelta(days=window_days)
+    baseline_start = window_start - timedelta(days=baseline_days)
+    return end.date().isoformat(), window_start.date().isoformat(), baseline_start.date().isoformat()
+
+
+def _window_scores(current: int, baseline: int, window_days: int, baseline_days: int) -> dict[str, float]:
+    """velocity: change in mentions/day vs the baseline; burst: observed / expected (add-one smoothed)."""
+    expected = baseline * window_days / baseline_days
+    return {
+        "current": current,
+        "baseline": baseline,
+        "velocity": round(current / window_days - baseline / baseline_days, 3),
+        "burst": round((current + 1) / (expected + 1), 3),
+    }
+
+
+def get_rising_entities(
+    conn: sqlite3.Connection,
+    window_days: int = 7,
+    baseline_days: int = 28,
+    limit: int = 15,
+    min_count: int = 3,
+    as_of: str | None = None,
+    topic: str | None = None,
+) -> list[dict[str, Any]]:
+    """
+    Entities whose mentions in the last window_days outpace the preceding baseline_days, from
+    entity_daily. Returns [{name, current, baseline, velocity, burst}], highest burst first.
+    as_of (YYYY-MM-DD, default today UTC) is the last day of the current window.
+    """
+    end, window_start, baseline_start = _window_bounds(window_days, baseline_days, as_of)
+    rows = conn.execute(
+        f"""SELECT e.name, a.cur, a.base FROM (
+               SELECT entity_id, SUM(CASE WHEN day > :ws THEN n ELSE 0 END) AS cur,
+                      SUM(CASE WHEN day <= :ws THEN n ELSE 0 END) AS base
+               FROM entity_daily WHERE day > :bs AND day <= :end {"AND topic = :topic" if topic else ""}
+               GROUP BY entity_id
+           ) a JOIN entities e ON e.id = a.entity_id
+           WHERE a.cur >= :min""",
+        {"ws": window_start, "bs": baseline_start, "end": end, "min": min_count, "topic": topic},
+    ).fetchall()
+    scored = [
+        {"name": r["name"], **_window_scores(r["cur"], r["base"], window_days, baseline_days)} for r in rows
+    ]
+    scored = [x for x in scored if x["velocity"] > 0]
+    scored.sort(key=lambda x: (-x["burst"], -x["current"], x["name"]))
+    return scored[:limit]
+
+
+def get_signal_trends(
+    conn: sqlite3.Connection,
+    window_days: int = 7,
+    baseline_days: int = 28,
+    as_of: str | None = None,
+    topic: str | None = None,
+) -> dict[str, dict[str, float]]:
+    """Per signal tag: {current, baseline, velocity, burst} over the same windows as get_rising_entities()."""
+    end, window_start, baseline_start = _window_bounds(window_days, baseline_days, as_of)
+    rows = conn.execute(
+        f"""SELECT tag, SUM(CASE WHEN day > :ws THEN n ELSE 0 END) AS cur,
+                  SUM(CASE WHEN day <= :ws THEN n ELSE 0 END) AS base
+           FROM signal_daily WHERE day > :bs AND day <= :end {"AND topic = :topic" if topic else ""}
+           GROUP BY tag ORDER BY tag""",
+        {"ws": window_start, "bs": baseline_start, "end": end, "topic": topic},
+    ).fetchall()
+    return {r["tag"]: _window_scores(r["cur"], r["base"], window_days, baseline_days) for r in rows}
+
+
+def get_daily_series(
+    conn: sqlite3.Connection,
+    entity: str | None = None,
+    tag: str | None = None,
+    days: int = 30,
+    as_of: str | None = None,
+    topic: str | None = None,
+) -> list[tuple[str, int]]:
+    """
+    (day, count) for one entity (by name) or one signal tag over the last days, within one topic
+    or summed over all; days without mentions are omitted.
+    """
+    end, start, _ = _window_bounds(days, 0, as_of)
+    where, params = _topic_filter(topic, "d.topic")
+    if entity is not None:
+        rows = conn.execute(
+            f"""SELECT d.day, SUM(d.n) AS n FROM entity_daily d JOIN entities e ON e.id = d.entity_id
+               WHERE e.name = ? AND d.day > ? AND d.day <= ? AND {where} GROUP BY d.day ORDER BY d.day""",
+            (entity, start, end, *params),
+        )
+    else:
+        rows = conn.execute(
+            f"""SELECT d.day, SUM(d.n) AS n FROM signal_daily d
+               WHERE d.tag = ? AND d.day > ? AND d.day <= ? AND {where} GROUP BY d.day ORDER BY d.day""",
+            (tag, start, end, *params),
+        )
+    return [(r["day"], r["n"]) for r in rows]
+
+
+def get_entity_postings(
+    conn: sqlite3.Connection,
+    min_docs: int = 2,
+    max_docs: int | None = None,
+    topic: str | None = None,
+) -> tuple[dict[int, tuple[str, list[int]]], int]:
+    """
+    Inverted index over processed docs: entity_id → (name, sorted doc ids) for entities named by
+    between min_docs and max_docs processed docs. Also returns the number of processed docs
+    that have any entity (the IDF denominator). With topic, only that topic's extractions count.
+    """
+    where, params = _topic_filter(topic, "de.topic")
+    n_docs = conn.execute(
+        f"""SELECT COUNT(DISTINCT de.doc_id) FROM doc_entities de
+            WHERE de.doc_id IN (SELECT id FROM processed_docs) AND {where}""",
+        params,
+    ).fetchone()[0]
+    postings: dict[int, tuple[str, list[int]]] = {}
+    rows = conn.execute(
+        f"""WITH live AS (
+               SELECT DISTINCT de.entity_id, de.doc_id FROM doc_entities de JOIN processed_docs p ON p.id = de.doc_id
+               WHERE {where}
+           ), df AS (
+               SELECT entity_id FROM live GROUP BY entity_id HAVING COUNT(*) BETWEEN ? AND ?
+           )
+           SELECT live.entity_id, e.name, live.doc_id
+           FROM live JOIN df ON df.entity_id = live.entity_id JOIN entities e ON e.id = live.entity_id
+           ORDER BY live.entity_id, live.doc_id""",
+        (*params, min_docs, max_docs if max_docs is not None else n_docs),
+    )
+    for entity_id, name, doc_id in rows:
+        postings.setdefault(entity_id, (name, []))[1].append(doc_id)
+    return postings, n_docs
+
+
 def insert_contradiction(
     conn: sqlite3.Connection,
     focus: str,
@@ -183,21 +1044,69 @@ def insert_contradiction(
     doc_id_b: int,
     snippet_a: str,
     snippet_b: str,
+    commit: bool = True,
+    topic: str | None = None,
+    run_id: int | None = None,
 ) -> int:
+    """Store a contradiction once per (topic, doc pair); returns its id (existing row's id if already stored)."""
     created_at = datetime.utcnow().isoformat() + "Z"
-    cur = conn.execute(
-        """INSERT INTO contradictions (focus, doc_id_a, doc_id_b, snippet_a, snippet_b, created_at)
-           VALUES (?, ?, ?, ?, ?, ?)""",
-        (focus, doc_id_a, doc_id_b, snippet_a, snippet_b, created_at),
+    topic = topic or ""
+    row = conn.execute(
+        """INSERT INTO contradictions (focus, doc_id_a, doc_id_b, snippet_a, snippet_b, created_at, topic, run_id)
+           VALUES (?, ?, ?, ?, ?, ?, ?, ?) ON CONFLICT(topic, doc_id_a, doc_id_b) DO NOTHING RETURNING id""",
+        (focus, doc_id_a, doc_id_b, snippet_a, snippet_b, created_at, topic, run_id),
+    ).fetchone()
+    if row is None:
+        row = conn.execute(
+            "SELECT id FROM contradictions WHERE topic = ? AND doc_id_a = ? AND doc_id_b = ?",
+            (topic, doc_id_a, doc_id_b),
+        ).fetchone()
+    if commit:
+        conn.commit()
+    return row["id"] if row else 0
+
+
+def get_contradiction_verdicts(conn: sqlite3.Connection, pair_keys: list[str]) -> dict[str, bool]:
+    """Stored YES/NO verdicts for the given pair keys (missing keys were never judged)."""
+    found: dict[str, bool] = {}
+    for chunk in _chunks(pair_keys):
+        marks = ",".join("?" * len(chunk))
+        for r in conn.execute(
+            f"SELECT pair_key, verdict FROM contradiction_verdicts WHERE pair_key IN ({marks})", chunk
+        ):
+            found[r["pair_key"]] = bool(r["verdict"])
+    return found
+
+
+def save_contradiction_verdict(
+    conn: sqlite3.Connection,
+    pair_key: str,
+    hash_a: str,
+    hash_b: str,
+    topic: str,
+    verdict: bool,
+    prompt_version: str,
+    model: str,
+    commit: bool = True,
+) -> None:
+    created_at = datetime.utcnow().isoformat() + "Z"
+    conn.execute(
+        """INSERT OR REPLACE INTO contradiction_verdicts
+               (pair_key, hash_a, hash_b, topic, verdict, prompt_version, model, created_at)
+           VALUES (?, ?, ?, ?, ?, ?, ?, ?)""",
+        (pair_key, hash_a, hash_b, topic, int(verdict), prompt_version, model, created_at),
     )
-    conn.commit()
-    return cur.lastrowid or 0
+    if commit:
+        conn.commit()
 
 
-def get_contradictions(conn: sqlite3.Connection) -> list[dict[str, Any]]:
-    rows = conn.execute(
-        "SELECT id, focus, doc_id_a, doc_id_b, snippet_a, snippet_b, created_at FROM contradictions ORDER BY id"
-    ).fetchall()
+def get_contradictions(conn: sqlite3.Connection, topic: str | None = None) -> list[dict[str, Any]]:
+    """Stored contradictions, optionally only those found for topic."""
+    cols = "id, focus, doc_id_a, doc_id_b, snippet_a, snippet_b, created_at, topic, run_id"
+    if topic is None:
+        rows = conn.execute(f"SELECT {cols} FROM contradictions ORDER BY id").fetchall()
+    else:
+        rows = conn.execute(f"SELECT {cols} FROM contradictions WHERE topic = ? ORDER BY id", (topic,)).fetchall()
     return [dict(r) for r in rows]
 
 
@@ -206,20 +1115,27 @@ def insert_report(
     report_json: dict[str, Any],
     report_md: str,
     confidence: float,
+    topic: str | None = None,
+    run_id: int | None = None,
 ) -> int:
     generated_at = datetime.utcnow().isoformat() + "Z"
     cur = conn.execute(
-        "INSERT INTO reports (report_json, report_md, confidence, generated_at) VALUES (?, ?, ?, ?)",
-        (json.dumps(report_json), report_md, confidence, generated_at),
+        "INSERT INTO reports (report_json, report_md, confidence, generated_at, topic, run_id) VALUES (?, ?, ?, ?, ?, ?)",
+        (json.dumps(report_json), report_md, confidence, generated_at, topic or "", run_id),
     )
     conn.commit()
     return cur.lastrowid or 0
 
 
-def get_latest_report(conn: sqlite3.Connection) -> dict[str, Any] | None:
-    row = conn.execute(
-        "SELECT id, report_json, report_md, confidence, generated_at FROM reports ORDER BY id DESC LIMIT 1"
-    ).fetchone()
+def get_latest_report(conn: sqlite3.Connection, topic: str | None = None) -> dict[str, Any] | None:
+    """Most recent report, optionally the most recent one for topic."""
+    cols = "id, report_json, report_md, confidence, generated_at"
+    if topic is None:
+        row = conn.execute(f"SELECT {cols} FROM reports ORDER BY id DESC LIMIT 1").fetchone()
+    else:
+        row = conn.execute(
+            f"SELECT {cols} FROM reports WHERE topic = ? ORDER BY generated_at DESC, id DESC LIMIT 1", (topic,)
+        ).fetchone()
     if not row:
         return None
     return {
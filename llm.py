@@ -1,39 +1,326 @@
 """Shared LLM helpers: one place for OpenAI client and simple completion."""
 
+import hashlib
 import json
+import logging
 import os
+import sqlite3
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from pathlib import Path
+from typing import Callable
+
+import tracking
+
+logger = logging.getLogger(__name__)
+
+MAX_IN_FLIGHT = int(os.environ.get("LLM_MAX_CONCURRENCY", "8"))
+# Retries after a rate-limit, timeout, connection or 5xx error (exponential backoff), counted per call.
+RETRIES = int(os.environ.get("LLM_RETRIES", "2"))
+# USD per 1M (prompt, completion) tokens, for cost estimates. LLM_PRICE_PER_MTOK="in,out" overrides.
+PRICES = {
+    "gpt-4o-mini": (0.15, 0.60),
+    "gpt-4o": (2.50, 10.00),
+    "gpt-4.1": (2.00, 8.00),
+    "gpt-4.1-mini": (0.40, 1.60),
+    "gpt-4.1-nano": (0.10, 0.40),
+}
+
+_CLIENT = None
+_CLIENT_KEY: str | None = None
+_CLIENT_LOCK = threading.Lock()
+_INJECTED = None  # set_client()
+
+
+class _RateLimiter:
+    """Sliding 60 s window over requests and (estimated) tokens. 0 = no limit."""
+
+    def __init__(self, rpm: int = 0, tpm: int = 0):
+        self.rpm = rpm
+        self.tpm = tpm
+        self._events: deque[tuple[float, int]] = deque()
+        self._tokens = 0
+        self._lock = threading.Lock()
+
+    def acquire(self, tokens: int) -> None:
+        if not self.rpm and not self.tpm:
+            return
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                while self._events and now - self._events[0][0] >= 60:
+                    self._tokens -= self._events.popleft()[1]
+                rpm_ok = not self.rpm or len(self._events) < self.rpm
+                # A single request larger than the whole budget still goes through once the window is empty.
+                tpm_ok = not self.tpm or not self._events or self._tokens + tokens <= self.tpm
+                if rpm_ok and tpm_ok:
+                    self._events.append((now, tokens))
+                    self._tokens += tokens
+                    return
+                wait_for = 60 - (now - self._events[0][0])
+            time.sleep(max(0.05, min(wait_for, 1.0)))
+
+
+class _ResponseCache:
+    """
+    SQLite-backed prompt → response cache with TTL and size-bounded LRU eviction.
+    Lives in its own file (default data/llm_cache.db) so it never contends with pipeline writes.
+    """
+
+    EVICT_EVERY = 100
+
+    def __init__(self, ttl_sec: float, max_entries: int):
+        self.ttl_sec = ttl_sec
+        self.max_entries = max_entries
+        self.path: Path | None = None
+        self.stats = {"hits": 0, "misses": 0, "writes": 0, "evictions": 0}
+        self._conn: sqlite3.Connection | None = None
+        self._lock = threading.Lock()
+        self._puts = 0
+
+    def _db(self) -> sqlite3.Connection:
+        if self._conn is None:
+            if self.path is None:
+                from ingestion.storage import get_db_path
+                self.path = get_db_path().parent / "llm_cache.db"
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(self.path), timeout=30, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript("""
+                CREATE TABLE IF NOT EXISTS llm_cache (
+                    key TEXT PRIMARY KEY,
+                    model TEXT,
+                    response TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    last_used REAL NOT NULL,
+                    hits INTEGER NOT NULL DEFAULT 0
+                );
+                CREATE INDEX IF NOT EXISTS idx_llm_cache_last_used ON llm_cache(last_used);
+            """)
+            self._conn = conn
+        return self._conn
+
+    def get(self, key: str) -> str | None:
+        now = time.time()
+        with self._lock:
+            try:
+                db = self._db()
+                row = db.execute("SELECT response, created_at FROM llm_cache WHERE key = ?", (key,)).fetchone()
+                if row and self.ttl_sec and now - row[1] > self.ttl_sec:
+                    db.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+                    db.commit()
+                    row = None
+                if row is None:
+                    self.stats["misses"] += 1
+                    return None
+                db.execute("UPDATE llm_cache SET last_used = ?, hits = hits + 1 WHERE key = ?", (now, key))
+                db.commit()
+                self.stats["hits"] += 1
+                return row[0]
+            except sqlite3.Error as e:
+                logger.debug("LLM cache read failed: %s", e)
+                return None
+
+    def put(self, key: str, model: str, response: str) -> None:
+        now = time.time()
+        with self._lock:
+            try:
+                db = self._db()
+                db.execute(
+                    "INSERT OR REPLACE INTO llm_cache (key, model, response, created_at, last_used) VALUES (?, ?, ?, ?, ?)",
+                    (key, model, response, now, now),
+                )
+                self.stats["writes"] += 1
+                self._puts += 1
+                if self.max_entries and self._puts % self.EVICT_EVERY == 1:
+                    n = db.execute("SELECT COUNT(*) FROM llm_cache").fetchone()[0]
+                    if n > self.max_entries:
+                        db.execute(
+                            "DELETE FROM llm_cache WHERE key IN (SELECT key FROM llm_cache ORDER BY last_used LIMIT ?)",
+                            (n - self.max_entries,),
+                        )
+                        self.stats["evictions"] += n - self.max_entries
+                db.commit()
+            except sqlite3.Error as e:
+                logger.debug("LLM cache write failed: %s", e)
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            try:
+                db = self._db()
+                db.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+                db.commit()
+            except sqlite3.Error as e:
+                logger.debug("LLM cache delete failed: %s", e)
+
+
+def _env_flag(name: str, default: str) -> bool:
+    return os.environ.get(name, default).lower() in ("1", "true", "yes")
+
+
+_IN_FLIGHT = threading.BoundedSemaphore(max(1, MAX_IN_FLIGHT))
+_LIMITER = _RateLimiter(int(os.environ.get("LLM_RPM", "0")), int(os.environ.get("LLM_TPM", "0")))
+_CACHE = _ResponseCache(
+    ttl_sec=float(os.environ.get("LLM_CACHE_TTL_HOURS", "168")) * 3600,
+    max_entries=int(os.environ.get("LLM_CACHE_MAX_ENTRIES", "20000")),
+)
+
+
+def set_cache_path(path: str | Path) -> None:
+    """Use a different file for the LLM response cache (default: data/llm_cache.db)."""
+    with _CACHE._lock:
+        if _CACHE._conn is not None:
+            _CACHE._conn.close()
+            _CACHE._conn = None
+        _CACHE.path = Path(path)
+
+
+def cache_stats() -> dict[str, int]:
+    """Hit/miss/write/eviction counters of the LLM response cache for this process."""
+    return dict(_CACHE.stats)
+
+
+def _cache_key(prompt: str, temperature: float, model: str) -> str:
+    return hashlib.sha256(json.dumps([model, temperature, prompt]).encode("utf-8")).hexdigest()
+
+
+def _drop_cached(prompt: str, temperature: float, model: str | None = None) -> None:
+    """Forget a cached answer (e.g. one that did not parse) so the next call asks again."""
+    if _env_flag("LLM_CACHE", "1"):
+        _CACHE.delete(_cache_key(prompt, temperature, get_model(model)))
+
+
+def set_client(client) -> None:
+    """Use client (anything with chat.completions.create, e.g. benchmarks' fake) instead of OpenAI; None undoes it."""
+    global _INJECTED
+    _INJECTED = client
 
 
 def get_client():
-    """Return OpenAI client or None if key missing."""
-    try:
-        from openai import OpenAI
-        key = os.environ.get("OPENAI_API_KEY")
-        return OpenAI(api_key=key) if key else None
-    except Exception:
+    """Return the shared OpenAI client (built once per API key) or None if key missing; see set_client()."""
+    global _CLIENT, _CLIENT_KEY
+    if _INJECTED is not None:
+        return _INJECTED
+    key = os.environ.get("OPENAI_API_KEY")
+    if not key:
         return None
+    if _CLIENT is not None and _CLIENT_KEY == key:
+        return _CLIENT
+    with _CLIENT_LOCK:
+        if _CLIENT is None or _CLIENT_KEY != key:
+            try:
+                from openai import OpenAI
+                _CLIENT, _CLIENT_KEY = OpenAI(api_key=key, max_retries=0), key  # complete() retries
+            except Exception:
+                return None
+    return _CLIENT
+
+
+def get_model(model: str | None = None) -> str:
+    """Model name for LLM calls: explicit argument, else OPENAI_MODEL, else gpt-4o-mini."""
+    return model or os.environ.get("OPENAI_MODEL", "gpt-4o-mini")
+
+
+def _estimate_tokens(prompt: str) -> int:
+    return len(prompt) // 4 + 1
+
+
+def _price(model: str) -> tuple[float, float]:
+    override = os.environ.get("LLM_PRICE_PER_MTOK", "")
+    if override:
+        try:
+            p_in, p_out = (float(x) for x in override.split(","))
+            return p_in, p_out
+        except ValueError:
+            logger.warning("LLM_PRICE_PER_MTOK must be 'input,output' USD per 1M tokens: %r", override)
+    # Dated snapshots (gpt-4o-mini-2024-07-18) are priced like their base model.
+    base = max((m for m in PRICES if model.startswith(m)), key=len, default=None)
+    return PRICES[base] if base else (0.0, 0.0)
 
 
-def complete(prompt: str, temperature: float = 0.2, model: str | None = None) -> str | None:
-    """One LLM call. Returns content string or None on failure."""
+def estimate_cost(model: str, prompt_tokens: int, completion_tokens: int) -> float:
+    """Estimated USD cost of one call (0 for models without a known price)."""
+    p_in, p_out = _price(model)
+    return (prompt_tokens * p_in + completion_tokens * p_out) / 1_000_000
+
+
+def _retryable(e: Exception) -> bool:
+    status = getattr(e, "status_code", None)
+    if status is not None:
+        return status in (408, 409, 429) or status >= 500
+    return type(e).__name__ in ("APIConnectionError", "APITimeoutError")
+
+
+def complete(
+    prompt: str,
+    temperature: float = 0.2,
+    model: str | None = None,
+    use_cache: bool = True,
+    on_send: Callable[[], None] | None = None,
+) -> str | None:
+    """
+    One LLM call. Returns content string or None on failure. on_send is called when the first
+    request actually goes out (after the concurrency and rate limits let it through).
+    Safe to call from many threads: at most LLM_MAX_CONCURRENCY requests are in flight
+    process-wide, paced by the LLM_RPM / LLM_TPM limits.
+    Responses are cached by (model, temperature, prompt) unless use_cache=False or LLM_CACHE=0;
+    LLM_CACHE_REFRESH=1 skips cache reads (forced refresh) but still stores fresh answers.
+    Transient API errors are retried up to LLM_RETRIES times. Every call (tokens from the
+    response's usage, API latency, cache hit, retries, errors) is recorded with
+    tracking.record_llm_call() under the calling step.
+    """
+    model = get_model(model)
+    caching = use_cache and _env_flag("LLM_CACHE", "1")
+    key = _cache_key(prompt, temperature, model) if caching else None
+    if caching and not _env_flag("LLM_CACHE_REFRESH", "0"):
+        cached = _CACHE.get(key)
+        if cached is not None:
+            tracking.record_llm_call(model, cache_hit=True)
+            return cached
     client = get_client()
     if not client:
         return None
-    model = model or os.environ.get("OPENAI_MODEL", "gpt-4o-mini")
-    try:
-        r = client.chat.completions.create(
-            model=model,
-            messages=[{"role": "user", "content": prompt}],
-            temperature=temperature,
-        )
-        return (r.choices[0].message.content or "").strip()
-    except Exception:
-        return None
+    latency, retries = 0.0, 0
+    while True:
+        _LIMITER.acquire(_estimate_tokens(prompt))
+        try:
+            with _IN_FLIGHT:
+                t0 = time.monotonic()
+                if on_send is not None and not retries:
+                    on_send()
+                try:
+                    r = client.chat.completions.create(
+                        model=model,
+                        messages=[{"role": "user", "content": prompt}],
+                        temperature=temperature,
+                    )
+                finally:
+                    latency += time.monotonic() - t0
+            content = (r.choices[0].message.content or "").strip()
+            break
+        except Exception as e:
+            if retries >= RETRIES or not _retryable(e):
+                logger.debug("LLM call failed after %s retries: %s", retries, e)
+                tracking.record_llm_call(model, latency_sec=latency, error=True, retries=retries)
+                return None
+            time.sleep(min(8.0, 0.5 * 2 ** retries))
+            retries += 1
+    usage = getattr(r, "usage", None)
+    prompt_tokens = getattr(usage, "prompt_tokens", 0) or 0
+    completion_tokens = getattr(usage, "completion_tokens", 0) or 0
+    tracking.record_llm_call(
+        model, prompt_tokens, completion_tokens, latency,
+        estimate_cost(model, prompt_tokens, completion_tokens), retries=retries,
+    )
+    if caching and content:
+        _CACHE.put(key, model, content)
+    return content
 
 
-def complete_json(prompt: str, temperature: float = 0.2) -> dict | None:
-    """Like complete() but strips markdown and parses JSON. Returns dict or None."""
-    content = complete(prompt, temperature=temperature)
+def _parse_json(content: str | None) -> dict | None:
     if not content:
         return None
     if "```" in content:
@@ -44,3 +331,67 @@ def complete_json(prompt: str, temperature: float = 0.2) -> dict | None:
         return json.loads(content)
     except json.JSONDecodeError:
         return None
+
+
+def complete_json(prompt: str, temperature: float = 0.2) -> dict | None:
+    """Like complete() but strips markdown and parses JSON. Returns dict or None."""
+    content = complete(prompt, temperature=temperature)
+    out = _parse_json(content)
+    if content and out is None:
+        _drop_cached(prompt, temperature)
+    return out
+
+
+def complete_many(
+    prompts: list[str],
+    temperature: float = 0.2,
+    model: str | None = None,
+    max_workers: int | None = None,
+    timeout: float | None = None,
+) -> list[str | None]:
+    """
+    Run complete() for each prompt concurrently; results come back in prompt order.
+    A prompt that fails, or is still running timeout seconds after its request was sent, yields
+    None. Time spent queued for a concurrency slot or the rate limit does not count.
+    """
+    if not prompts:
+        return []
+    workers = max(1, min(len(prompts), max_workers or MAX_IN_FLIGHT))
+    step = tracking.current_step()
+    pool = ThreadPoolExecutor(
+        max_workers=workers, thread_name_prefix="llm", initializer=tracking.set_thread_step, initargs=(step,)
+    )
+    sent: list[float | None] = [None] * len(prompts)
+
+    def _mark(i: int) -> Callable[[], None]:
+        return lambda: sent.__setitem__(i, time.monotonic())
+
+    try:
+        futures = [pool.submit(complete, p, temperature, model, True, _mark(i)) for i, p in enumerate(prompts)]
+        pending = set(range(len(futures)))
+        while pending:
+            if timeout is None:
+                wait([futures[i] for i in pending])
+                break
+            now = time.monotonic()
+            pending = {i for i in pending if not futures[i].done() and (sent[i] is None or now - sent[i] < timeout)}
+            if not pending:
+                break
+            deadlines = [sent[i] + timeout for i in pending if sent[i] is not None]
+            # Queued prompts have no deadline yet; look again shortly in case one was sent meanwhile.
+            wake = min(deadlines) - now if deadlines else 1.0
+            wait([futures[i] for i in pending], timeout=max(0.0, min(wake, 1.0)), return_when=FIRST_COMPLETED)
+        return [f.result() if f.done() and not f.cancelled() else None for f in futures]
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+def complete_json_many(prompts: list[str], temperature: float = 0.2, **kwargs) -> list[dict | None]:
+    """complete_many() + JSON parsing per result (unparseable answers are dropped from the cache)."""
+    results = []
+    for prompt, content in zip(prompts, complete_many(prompts, temperature=temperature, **kwargs)):
+        out = _parse_json(content)
+        if content and out is None:
+            _drop_cached(prompt, temperature, kwargs.get("model"))
+        results.append(out)
+    return results
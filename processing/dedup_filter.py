@@ -1,56 +1,72 @@
 """Deduplicate by URL and filter by recency and source tier."""
 
 import logging
+import sqlite3
 from datetime import datetime, timedelta, timezone
 
-from ingestion.storage import get_connection, get_raw_docs, init_schema, insert_processed_doc
+from ingestion.storage import get_connection, get_stage_state, init_schema, set_stage_state
 from config import get_time_window_days
+from processing.near_dup import run_near_dedup
 
 logger = logging.getLogger(__name__)
 
 # official=3, news=2, rss=2, forum=1
 SOURCE_TIER = {"news_api": 2, "rss": 2, "hn": 1, "reddit": 1}
+STAGE = "dedup_filter"
 
+# Doc date as SQLite sees it: published_at, else fetched_at. NULL (unparseable) docs are kept.
+_DOC_DAY = "julianday(COALESCE(NULLIF(published_at, ''), fetched_at))"
 
-def _parse_date(s: str | None) -> datetime | None:
-    if not s:
-        return None
-    try:
-        if s.endswith("Z"):
-            s = s.replace("Z", "+00:00")
-        return datetime.fromisoformat(s.replace("Z", "+00:00"))
-    except Exception:
-        return None
 
+def _tier_case() -> tuple[str, list]:
+    """SQL CASE expression mapping source_type → tier, plus its parameters."""
+    whens = " ".join("WHEN ? THEN ?" for _ in SOURCE_TIER)
+    params = [v for item in SOURCE_TIER.items() for v in item]
+    return f"CASE source_type {whens} ELSE 1 END", params
 
-def run_dedup_and_filter() -> int:
+
+def run_dedup_and_filter(
+    full: bool = False,
+    near_dedup: bool = True,
+    conn: sqlite3.Connection | None = None,
+) -> int:
     """
-    Read raw_docs, dedupe by URL (already enforced in raw_docs), filter by time window,
-    assign source_tier, write to processed_docs. Returns count of processed docs.
+    Move new raw_docs into processed_docs (dedupe by URL is enforced in raw_docs), filtering
+    by time window and assigning source_tier in SQL. Only raw ids above the stored high-water
+    mark are read unless full=True or the time window changed; docs that have aged out of the
+    window are evicted from processed_docs. With near_dedup, syndicated copies of the same
+    story are folded to their highest-tier representative. Returns count of processed docs.
+    Pass conn to run on a caller-owned connection (left open); cheap to call per micro-batch.
     """
-    conn = get_connection()
-    init_schema(conn)
-    raw = get_raw_docs(conn)
+    own = conn is None
+    if own:
+        conn = get_connection()
+        init_schema(conn)
     window_days = get_time_window_days()
-    cutoff = datetime.now(timezone.utc) - timedelta(days=window_days)
-    count = 0
-    for row in raw:
-        published = _parse_date(row.get("published_at") or row.get("fetched_at"))
-        if published and published.replace(tzinfo=timezone.utc) < cutoff:
-            continue
-        tier = SOURCE_TIER.get(row["source_type"], 1)
-        insert_processed_doc(
-            conn,
-            doc_id=row["id"],
-            url=row["url"],
-            title=row["title"] or "",
-            body=(row["body"] or "")[:100000],
-            source_type=row["source_type"],
-            source_tier=tier,
-            published_at=row.get("published_at"),
-            fetched_at=row["fetched_at"],
-        )
-        count += 1
-    conn.close()
-    logger.info("Dedup & filter: %s docs in processed_docs", count)
+    cutoff = (datetime.now(timezone.utc) - timedelta(days=window_days)).isoformat()
+    state = get_stage_state(conn, STAGE)
+    last_id = 0 if full or state.get("window_days") != window_days else int(state.get("last_raw_id", 0))
+    max_id = conn.execute("SELECT COALESCE(MAX(id), 0) FROM raw_docs").fetchone()[0]
+    tier_sql, tier_params = _tier_case()
+
+    with conn:
+        added = conn.execute(
+            f"""INSERT OR REPLACE INTO processed_docs
+                    (id, url, title, body, source_type, source_tier, published_at, fetched_at)
+                SELECT id, url, COALESCE(title, ''), substr(COALESCE(body, ''), 1, 100000), source_type,
+                       {tier_sql}, COALESCE(published_at, ''), fetched_at
+                FROM raw_docs
+                WHERE id > ? AND id <= ? AND ({_DOC_DAY} IS NULL OR {_DOC_DAY} >= julianday(?))""",
+            (*tier_params, last_id, max_id, cutoff),
+        ).rowcount
+        evicted = conn.execute(
+            f"DELETE FROM processed_docs WHERE {_DOC_DAY} < julianday(?)", (cutoff,)
+        ).rowcount
+        set_stage_state(conn, STAGE, {"last_raw_id": max_id, "window_days": window_days}, commit=False)
+    if near_dedup:
+        run_near_dedup(conn)
+    count = conn.execute("SELECT COUNT(*) FROM processed_docs").fetchone()[0]
+    if own:
+        conn.close()
+    logger.info("Dedup & filter: +%s new, -%s expired, %s docs in processed_docs", added, evicted, count)
     return count
@@ -1,18 +1,42 @@
-"""Extract entities, events, and signal tags from each processed doc using LLM."""
+"""Extract entities, events, and signal tags from each processed doc using LLM (or local rules)."""
 
+import hashlib
 import logging
 import os
-from ingestion.storage import get_connection, get_processed_docs, init_schema, insert_extraction
+import sqlite3
+from datetime import datetime, timedelta
+from ingestion.storage import (
+    get_connection, get_extraction_failures, get_extraction_keys, get_processed_docs, get_processed_docs_by_ids,
+    init_schema, insert_extraction,
+)
 from config import get_topic_name
-from llm import get_client, complete_json
+from llm import MAX_IN_FLIGHT, get_client, get_model, complete_json, complete_json_many
+from processing import local_extract
 
 logger = logging.getLogger(__name__)
 SIGNAL_TAGS = ["market", "regulation", "technology", "risk", "opportunity"]
+# Bump when the prompt or output shape changes so stored extractions are redone.
+PROMPT_VERSION = "extract-v1"
+# Pack several docs into one prompt up to this many (estimated) tokens; 0 = one doc per prompt.
+BATCH_TOKENS = int(os.environ.get("EXTRACT_BATCH_TOKENS", "0"))
+# llm: every doc to the LLM; local: rules only; hybrid: rules for all, LLM for the docs rules flag as worth it.
+BACKEND = os.environ.get("EXTRACT_BACKEND", "llm").lower()
+# A doc whose LLM extraction failed f times is retried after RETRY_BACKOFF_HOURS x 2^(f-1) (capped at 2^9).
+RETRY_BACKOFF_HOURS = float(os.environ.get("EXTRACT_RETRY_BACKOFF_HOURS", "1"))
+_WARNED_NO_CLIENT = False
 
 
-def _extract_one(text: str, topic: str) -> dict:
-    """One doc → {entities, events, signal_tags}. Uses placeholder if LLM fails."""
-    prompt = f'''Analyze this text about "{topic}" and extract:
+def _content_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def _extraction_key(content_hash: str, topic: str, model: str, version: str = PROMPT_VERSION) -> str:
+    """Identity of one extraction: same text, topic, prompt and model → same result."""
+    return hashlib.sha256(f"{content_hash}|{topic}|{version}|{model}".encode("utf-8")).hexdigest()
+
+
+def _prompt(text: str, topic: str) -> str:
+    return f'''Analyze this text about "{topic}" and extract:
 1. entities: list of companies, people, products, regulations, or geographies (e.g. ["OpenAI", "EU AI Act"])
 2. events: list of "who did what, when" (e.g. ["EU passed AI Act in March 2024"])
 3. signal_tags: one or more of {SIGNAL_TAGS} (e.g. ["regulation", "risk"])
@@ -23,11 +47,41 @@ Text:
 ---
 
 Respond with ONLY a JSON object with keys: entities, events, signal_tags. Arrays only.'''
-    out = complete_json(prompt, temperature=0.1)
-    if not out:
-        if not get_client():
-            logger.warning("OpenAI not available; using placeholder extractions.")
-        return {"entities": [], "events": [], "signal_tags": ["market"]}
+
+
+def _batch_prompt(items: list[tuple[int, str]], topic: str) -> str:
+    docs = "\n\n".join(f"=== doc_id={doc_id} ===\n{text[:8000]}" for doc_id, text in items)
+    return f'''Analyze each document below about "{topic}". For EACH document extract:
+1. entities: list of companies, people, products, regulations, or geographies (e.g. ["OpenAI", "EU AI Act"])
+2. events: list of "who did what, when" (e.g. ["EU passed AI Act in March 2024"])
+3. signal_tags: one or more of {SIGNAL_TAGS} (e.g. ["regulation", "risk"])
+
+Documents:
+{docs}
+
+Respond with ONLY a JSON object keyed by doc_id (as a string), e.g. {{"12": {{"entities": [], "events": [], "signal_tags": []}}}}.
+Include every doc_id above. Arrays only.'''
+
+
+def _pack(items: list[tuple[int, str]], budget_tokens: int) -> list[list[tuple[int, str]]]:
+    """Group (doc_id, text) items into batches whose estimated prompt size fits the budget."""
+    batches, current, used = [], [], 0
+    for doc_id, text in items:
+        cost = min(len(text), 8000) // 4 + 20
+        if current and used + cost > budget_tokens:
+            batches.append(current)
+            current, used = [], 0
+        current.append((doc_id, text))
+        used += cost
+    if current:
+        batches.append(current)
+    return batches
+
+
+def _clean(out: dict | None) -> dict | None:
+    """Validate/trim one parsed LLM answer; None if there is nothing usable."""
+    if not out or not isinstance(out, dict):
+        return None
     tags = [t for t in out.get("signal_tags", []) if t in SIGNAL_TAGS] or ["market"]
     return {
         "entities": (out.get("entities") or [])[:30],
@@ -36,25 +90,179 @@ Respond with ONLY a JSON object with keys: entities, events, signal_tags. Arrays
     }
 
 
-def run_extraction(max_docs: int | None = 50) -> int:
-    """Extract entities, events, signal_tags per doc; store in extractions. Returns count."""
-    conn = get_connection()
-    init_schema(conn)
-    docs = get_processed_docs(conn)
-    topic = get_topic_name()
-    if max_docs:
-        docs = docs[:max_docs]
+def _extract_one(text: str, topic: str) -> dict | None:
+    """One doc → {entities, events, signal_tags}. None if the LLM is unavailable or fails."""
+    return _clean(complete_json(_prompt(text, topic), temperature=0.1))
+
+
+def _extract_many(items: list[tuple[int, str]], topic: str, batch_tokens: int = 0) -> list[dict | None]:
+    """
+    (doc_id, text) items → cleaned extractions in the same order (None where the LLM failed).
+    With batch_tokens, docs are packed into multi-doc prompts; docs missing from or malformed
+    in a batch answer are retried with single-doc prompts.
+    """
+    results: dict[int, dict | None] = {}
+    if batch_tokens > 0:
+        batches = [b for b in _pack(items, batch_tokens) if len(b) > 1]
+        answers = complete_json_many([_batch_prompt(b, topic) for b in batches], temperature=0.1)
+        for batch, out in zip(batches, answers):
+            for doc_id, _ in batch:
+                got = out.get(str(doc_id)) if isinstance(out, dict) else None
+                results[doc_id] = _clean(got)
+    retry = [(doc_id, text) for doc_id, text in items if results.get(doc_id) is None]
+    outs = complete_json_many([_prompt(text, topic) for _, text in retry], temperature=0.1)
+    for (doc_id, _), out in zip(retry, outs):
+        results[doc_id] = _clean(out)
+    return [results.get(doc_id) for doc_id, _ in items]
+
+
+def _retry_due(failed: tuple[int, str] | None, now: datetime) -> bool:
+    """Whether a doc with (failures, last attempt) from get_extraction_failures may go to the LLM again."""
+    if failed is None:
+        return True
+    failures, last = failed
+    delay = timedelta(hours=RETRY_BACKOFF_HOURS * 2 ** (min(failures, 10) - 1))
+    try:
+        return datetime.fromisoformat(last.rstrip("Z")) + delay <= now
+    except ValueError:
+        return True
+
+
+def _accepted_keys(backend: str, llm_key: str, local_key: str) -> tuple[str, ...]:
+    """Stored extraction keys that count as up to date for this backend."""
+    if backend == "llm":
+        return (llm_key,)
+    if backend == "local":
+        return (local_key,)
+    return (llm_key, local_key)
+
+
+def run_extraction(
+    max_docs: int | None = 50,
+    batch_tokens: int | None = None,
+    backend: str | None = None,
+    conn: sqlite3.Connection | None = None,
+    doc_ids: list[int] | None = None,
+    topic: str | None = None,
+    run_id: int | None = None,
+) -> int:
+    """
+    Extract entities, events, signal_tags per doc; store in extractions. Returns count.
+    Incremental: docs whose (text, topic, prompt version, model) already have a stored
+    extraction are skipped, so only new or changed content reaches the LLM. max_docs caps
+    the number of docs sent to the LLM this run (in hybrid, on-topic docs over the cap get a
+    provisional rule-based result and go to the LLM on a later run). batch_tokens (default EXTRACT_BATCH_TOKENS)
+    packs several docs per prompt. backend (default EXTRACT_BACKEND) is "llm", "local" or
+    "hybrid"; without an OpenAI client, "llm" falls back to "local". doc_ids limits the run to
+    those processed docs (default: the topic's partition, see processing.topics); with conn the
+    caller's connection is used and left open. topic defaults to the configured topic
+    (get_topic_name()). run_id is recorded on the stored extractions.
+    """
+    own = conn is None
+    if own:
+        conn = get_connection()
+        init_schema(conn)
+    topic = topic or get_topic_name()
+    if doc_ids is None:
+        docs = get_processed_docs(conn, topic=topic)
+    else:
+        docs = list(get_processed_docs_by_ids(conn, doc_ids).values())
+    model = get_model()
+    backend = (backend or BACKEND).lower()
+    if backend != "local" and not get_client():
+        global _WARNED_NO_CLIENT
+        if not _WARNED_NO_CLIENT:
+            logger.warning("OpenAI not available; using local rule-based extraction.")
+            _WARNED_NO_CLIENT = True
+        backend = "local"
     log_progress = os.environ.get("TRACK_PROGRESS", "").lower() in ("1", "true", "yes")
-    count = 0
+
+    todo = []
     for doc in docs:
         text = (doc.get("title") or "") + "\n\n" + (doc.get("body") or "")
         if len(text.strip()) < 50:
             continue
-        out = _extract_one(text, topic)
-        insert_extraction(conn, doc["id"], out["entities"], out["events"], out["signal_tags"])
+        content_hash = _content_hash(text)
+        todo.append((
+            doc, text, content_hash,
+            _extraction_key(content_hash, topic, model),
+            _extraction_key(content_hash, topic, local_extract.MODEL, local_extract.VERSION),
+        ))
+    done = get_extraction_keys(conn, [k for t in todo for k in _accepted_keys(backend, t[3], t[4])])
+    todo = [t for t in todo if not done.intersection(_accepted_keys(backend, t[3], t[4]))]
+    failures = {}
+    if backend != "local":
+        # Docs whose LLM call keeps failing wait out a backoff and queue behind never-failed docs,
+        # so they cannot take the max_docs budget from new docs on every run.
+        failures = get_extraction_failures(conn, [t[0]["id"] for t in todo], topic)
+        now = datetime.utcnow()
+        waiting = [t for t in todo if not _retry_due(failures.get(t[0]["id"]), now)]
+        if waiting:
+            logger.info("Extraction: %s docs with failed LLM calls wait for their retry backoff", len(waiting))
+            todo = [t for t in todo if _retry_due(failures.get(t[0]["id"]), now)]
+        todo.sort(key=lambda t: failures.get(t[0]["id"], (0,))[0])  # stable: id order within each count
+
+    local_out = {}
+    if backend != "llm":
+        local_out = {t[0]["id"]: local_extract.extract_local(t[1]) for t in todo}
+    if backend == "local":
+        llm_todo = []
+    elif backend == "hybrid":
+        llm_todo = [t for t in todo if local_extract.merits_llm(local_out[t[0]["id"]], t[1], topic)]
+    else:
+        llm_todo = todo
+    worthy_ids = {t[0]["id"] for t in llm_todo}
+    if max_docs is not None:
+        llm_todo = llm_todo[:max_docs]
+    llm_ids = {t[0]["id"] for t in llm_todo}
+    deferred_ids = worthy_ids - llm_ids  # on-topic docs past max_docs: rules for now, LLM on a later run
+    logger.info("Extraction (%s): %s up to date, %s local, %s to LLM", backend, len(done),
+                len([t for t in todo if t[0]["id"] in local_out and t[0]["id"] not in llm_ids]), len(llm_todo))
+
+    count = 0
+    for doc, text, content_hash, _, local_key in todo:
+        if doc["id"] in llm_ids or doc["id"] not in local_out:
+            continue
+        out = local_out[doc["id"]]
+        if doc["id"] in deferred_ids:
+            # Keyless, like a failed LLM call: the local key would mark the doc up to date for hybrid.
+            insert_extraction(conn, doc["id"], out["entities"], out["events"], out["signal_tags"], topic=topic,
+                              commit=False, run_id=run_id, llm_failures=failures.get(doc["id"], (0,))[0])
+        else:
+            insert_extraction(
+                conn, doc["id"], out["entities"], out["events"], out["signal_tags"], topic=topic,
+                extraction_key=local_key, content_hash=content_hash, prompt_version=local_extract.VERSION,
+                model=local_extract.MODEL, commit=False, run_id=run_id,
+            )
         count += 1
-        if log_progress and count % 5 == 0:
-            logger.info("Extract progress: %s/%s", count, len(docs))
-    conn.close()
-    logger.info("Extraction: %s docs", count)
+    conn.commit()
+    local_count, failed = count, 0
+
+    batch_tokens = BATCH_TOKENS if batch_tokens is None else batch_tokens
+    chunk_size = MAX_IN_FLIGHT * (8 if batch_tokens > 0 else 2)
+    for start in range(0, len(llm_todo), chunk_size):
+        chunk = llm_todo[start : start + chunk_size]
+        outs = _extract_many([(doc["id"], text) for doc, text, *_ in chunk], topic, batch_tokens)
+        for (doc, text, content_hash, key, _), out in zip(chunk, outs):
+            if out is None:
+                # LLM failed: keep a keyless rule-based result; the doc is retried after a backoff.
+                out = local_out.get(doc["id"]) or local_extract.extract_local(text)
+                insert_extraction(conn, doc["id"], out["entities"], out["events"], out["signal_tags"],
+                                  topic=topic, commit=False, run_id=run_id,
+                                  llm_failures=failures.get(doc["id"], (0,))[0] + 1)
+                failed += 1
+            else:
+                insert_extraction(
+                    conn, doc["id"], out["entities"], out["events"], out["signal_tags"], topic=topic,
+                    extraction_key=key, content_hash=content_hash, prompt_version=PROMPT_VERSION, model=model,
+                    commit=False, run_id=run_id,
+                )
+            count += 1
+            if log_progress and count % 5 == 0:
+                logger.info("Extract progress: %s/%s", count, local_count + len(llm_todo))
+        conn.commit()
+    if own:
+        conn.close()
+    logger.info("Extraction: %s rows stored (%s by LLM, %s by rules, %s by rules after a failed LLM call)",
+                count, count - local_count - failed, local_count, failed)
     return count
@@ -0,0 +1,114 @@
+"""Offline rule-based extraction: gazetteer/regex entities, keyword signal tags, dated event sentences."""
+
+import re
+from collections import Counter
+
+from config import get_gazetteer
+
+VERSION = "rules-v2"
+MODEL = "local-rules"
+
+# Seed gazetteer; extend per deployment with extraction.gazetteer in topic_config.yaml.
+GAZETTEER = [
+    "OpenAI", "Anthropic", "Google", "Alphabet", "DeepMind", "Microsoft", "Meta", "Apple", "Amazon", "AWS",
+    "Nvidia", "NVIDIA", "AMD", "Intel", "TSMC", "Samsung", "Tesla", "BYD", "CATL", "Panasonic", "LG Energy Solution",
+    "IBM", "Oracle", "Salesforce", "Mistral", "Hugging Face", "xAI", "Stripe", "PayPal", "Visa", "Mastercard",
+    "SEC", "FTC", "FCC", "FDA", "DOJ", "CFPB", "Federal Reserve", "European Commission", "European Union", "EU",
+    "EU AI Act", "GDPR", "Digital Markets Act", "Digital Services Act", "CHIPS Act", "Inflation Reduction Act",
+    "United States", "US", "USA", "China", "India", "Japan", "Taiwan", "South Korea", "Germany", "France",
+    "United Kingdom", "UK", "Canada", "Brazil",
+]
+
+# Keywords match whole words (plurals included); a trailing "*" marks a stem that takes any ending.
+SIGNAL_KEYWORDS = {
+    "market": ["market", "revenue", "sales", "pricing", "price", "customers", "demand", "share", "earnings",
+               "acquisition", "acquire", "merger", "funding", "raised", "valuation", "ipo", "investors"],
+    "regulation": ["regulat*", "law", "legislat*", "compliance", "antitrust", "lawsuit", "court", "ban", "policy",
+                   "senate", "congress", "parliament", "commission", "fine", "probe", "investigation", "tariff"],
+    "technology": ["model", "chip", "gpu", "software", "open source", "benchmark", "algorithm", "battery",
+                   "launch", "released", "api", "research", "patent", "prototype", "architecture"],
+    "risk": ["risk", "breach", "outage", "vulnerab*", "decline", "layoff", "shortage", "delay", "recall",
+             "warning", "threat", "loss", "downturn", "concern", "crisis"],
+    "opportunity": ["opportunit*", "growth", "expand*", "partnership", "new market", "adoption", "surge",
+                    "record", "demand for", "invest*", "breakthrough"],
+}
+
+_STOP_CAPS = {
+    "The", "This", "That", "These", "Those", "A", "An", "In", "On", "At", "For", "And", "But", "Or", "It", "Its",
+    "We", "Our", "They", "He", "She", "I", "You", "If", "When", "While", "As", "After", "Before", "With", "By",
+    "From", "To", "Of", "Is", "Are", "Was", "Were", "Why", "How", "What", "Who", "Show", "Ask", "Tell", "New",
+}
+_CAPS = re.compile(r"\b(?:[A-Z][a-zA-Z0-9&.-]+)(?:\s+(?:[A-Z][a-zA-Z0-9&.-]+|of)){1,3}\b")
+_ACRONYM = re.compile(r"\b[A-Z]{2,6}\b")
+_WORD = re.compile(r"\w+")
+_TOPIC_STOP = {"and", "or", "of", "the", "for", "in", "on", "market", "markets", "intelligence"}
+_SENTENCE = re.compile(r"(?<=[.!?])\s+")
+_MONTHS = "January|February|March|April|May|June|July|August|September|October|November|December"
+_DATE = re.compile(
+    rf"\b(?:(?:{_MONTHS})(?:\s+\d{{1,2}})?(?:,?\s+\d{{4}})?|(?:19|20)\d{{2}}|Q[1-4]|"
+    r"Monday|Tuesday|Wednesday|Thursday|Friday|Saturday|Sunday|yesterday|today|last (?:week|month|year))\b"
+)
+_KEYWORD_TAG = {k.rstrip("*"): tag for tag, words in SIGNAL_KEYWORDS.items() for k in words}
+_STEMS = {k.rstrip("*") for words in SIGNAL_KEYWORDS.values() for k in words if k.endswith("*")}
+# One alternation over all keywords (longest first), matched against lowercased text. The group
+# captures just the keyword: word endings are only looked ahead at.
+_KEYWORDS = re.compile(r"\b(" + "|".join(
+    re.escape(k) + ("" if k in _STEMS else r"(?=(?:e?s)?\b)") for k in sorted(_KEYWORD_TAG, key=len, reverse=True)
+) + ")")
+_GAZ_RE: re.Pattern | None = None
+
+
+def _gazetteer_re() -> re.Pattern:
+    global _GAZ_RE
+    if _GAZ_RE is None:
+        names = sorted(set(GAZETTEER) | set(get_gazetteer()), key=len, reverse=True)
+        _GAZ_RE = re.compile(r"(?<![\w-])(?:" + "|".join(re.escape(n) for n in names) + r")(?![\w-])")
+    return _GAZ_RE
+
+
+def _entities(text: str) -> list[str]:
+    counts: Counter[str] = Counter()
+    for m in _gazetteer_re().finditer(text):
+        counts[m.group(0)] += 2  # known names outrank pattern guesses
+    for m in _CAPS.finditer(text):
+        words = m.group(0).split()
+        while words and words[0] in _STOP_CAPS:
+            words = words[1:]
+        while words and words[-1] == "of":
+            words = words[:-1]
+        if len(words) >= 2:
+            counts[" ".join(words)] += 1
+    for m in _ACRONYM.finditer(text):
+        counts[m.group(0)] += 1
+    return [name for name, _ in counts.most_common(30)]
+
+
+def _signal_tags(text: str) -> list[str]:
+    hits = Counter(_KEYWORD_TAG[k] for k in _KEYWORDS.findall(text.lower()))
+    return [tag for tag, _ in hits.most_common()] or ["market"]
+
+
+def _events(text: str, entities: list[str]) -> list[str]:
+    """Sentences that carry a date anchor and mention one of the entities."""
+    events = []
+    top = entities[:15]
+    for sentence in _SENTENCE.split(text.replace("\n", " ")):
+        if len(events) >= 20:
+            break
+        if any(e in sentence for e in top) and _DATE.search(sentence):
+            events.append(sentence.strip()[:200])
+    return events
+
+
+def extract_local(text: str) -> dict:
+    """One doc → {entities, events, signal_tags} without any network call."""
+    text = text[:20000]
+    entities = _entities(text)
+    return {"entities": entities, "events": _events(text, entities), "signal_tags": _signal_tags(text)}
+
+
+def merits_llm(result: dict, text: str, topic: str) -> bool:
+    """Pre-pass filter: does this doc look on-topic and substantive enough to pay for an LLM call?"""
+    words = {w for w in _WORD.findall(topic.lower()) if len(w) > 1} - _TOPIC_STOP
+    on_topic = not words or bool(words & set(_WORD.findall(text.lower())))
+    return on_topic and bool(result["entities"]) and (bool(result["events"]) or result["signal_tags"] != ["market"])
@@ -0,0 +1,119 @@
+"""Near-duplicate detection: MinHash signatures with an LSH band index stored in SQLite."""
+
+import hashlib
+import logging
+import random
+import re
+import sqlite3
+from array import array
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+NUM_PERM = 64
+BANDS = 16
+ROWS = NUM_PERM // BANDS
+SHINGLE_WORDS = 5
+THRESHOLD = 0.8  # estimated Jaccard similarity at which two bodies count as the same story
+
+_PRIME = (1 << 61) - 1
+_rng = random.Random(1)  # fixed seed: signatures must be comparable across runs
+_PERMS = [(_rng.randrange(1, _PRIME), _rng.randrange(0, _PRIME)) for _ in range(NUM_PERM)]
+_WORD = re.compile(r"\w+")
+
+
+def _hash64(s: str) -> int:
+    return int.from_bytes(hashlib.blake2b(s.encode("utf-8"), digest_size=8).digest(), "little")
+
+
+def minhash(text: str) -> list[int]:
+    """MinHash signature over word 5-gram shingles of text."""
+    words = _WORD.findall(text.lower())
+    if len(words) <= SHINGLE_WORDS:
+        shingles = {" ".join(words)}
+    else:
+        shingles = {" ".join(words[i : i + SHINGLE_WORDS]) for i in range(len(words) - SHINGLE_WORDS + 1)}
+    hashes = [_hash64(s) for s in shingles]
+    return [min((a * h + b) % _PRIME for h in hashes) for a, b in _PERMS]
+
+
+def _bands(sig: list[int]) -> list[tuple[int, str]]:
+    return [
+        (i, hashlib.blake2b(array("Q", sig[i * ROWS : (i + 1) * ROWS]).tobytes(), digest_size=8).hexdigest())
+        for i in range(BANDS)
+    ]
+
+
+def _similarity(a: list[int], b: list[int]) -> float:
+    return sum(x == y for x, y in zip(a, b)) / NUM_PERM
+
+
+def _candidates(conn: sqlite3.Connection, bands: list[tuple[int, str]]) -> list[sqlite3.Row]:
+    """Docs still in processed_docs that share at least one LSH band bucket."""
+    values = ",".join("(?, ?)" for _ in bands)
+    # Equality join on (band, bucket) so each pair is a primary-key lookup (a row-value IN scans the table).
+    return conn.execute(
+        f"""WITH v(band, bucket) AS (VALUES {values})
+            SELECT DISTINCT m.doc_id, m.signature, p.source_tier
+            FROM v
+            JOIN minhash_bands b ON b.band = v.band AND b.bucket = v.bucket
+            JOIN doc_minhash m ON m.doc_id = b.doc_id
+            JOIN processed_docs p ON p.id = b.doc_id""",
+        [v for band in bands for v in band],
+    ).fetchall()
+
+
+def run_near_dedup(conn: sqlite3.Connection) -> int:
+    """
+    Index processed_docs not yet signed and fold near-duplicates into one representative per
+    cluster (highest source_tier, then lowest id). Non-representatives are removed from
+    processed_docs and recorded in near_duplicates; their representative joins their topics.
+    Returns number of docs folded this run.
+    """
+    folded = 0
+    now = datetime.utcnow().isoformat() + "Z"
+    with conn:
+        # A full dedup rescan re-adds docs we folded earlier; drop them again.
+        conn.execute("DELETE FROM processed_docs WHERE id IN (SELECT doc_id FROM near_duplicates)")
+        new_docs = conn.execute(
+            """SELECT id, title, body, source_tier FROM processed_docs
+               WHERE id NOT IN (SELECT doc_id FROM doc_minhash) ORDER BY id"""
+        ).fetchall()
+        for doc in new_docs:
+            sig = minhash((doc["title"] or "") + "\n" + (doc["body"] or ""))
+            bands = _bands(sig)
+            best, best_sim = None, 0.0
+            for cand in _candidates(conn, bands):
+                sim = _similarity(sig, array("Q", cand["signature"]).tolist())
+                if sim >= THRESHOLD and sim > best_sim:
+                    best, best_sim = cand, sim
+            conn.execute(
+                "INSERT OR REPLACE INTO doc_minhash (doc_id, signature) VALUES (?, ?)",
+                (doc["id"], array("Q", sig).tobytes()),
+            )
+            conn.executemany(
+                "INSERT OR IGNORE INTO minhash_bands (band, bucket, doc_id) VALUES (?, ?, ?)",
+                [(band, bucket, doc["id"]) for band, bucket in bands],
+            )
+            if best is None:
+                continue
+            if doc["source_tier"] > best["source_tier"]:
+                keep, drop = doc["id"], best["doc_id"]
+                conn.execute("UPDATE near_duplicates SET canonical_id = ? WHERE canonical_id = ?", (keep, drop))
+            else:
+                keep, drop = best["doc_id"], doc["id"]
+            conn.execute(
+                "INSERT OR REPLACE INTO near_duplicates (doc_id, canonical_id, similarity, created_at) VALUES (?, ?, ?, ?)",
+                (drop, keep, best_sim, now),
+            )
+            # The representative stands in for the copy in every topic the copy belonged to.
+            conn.execute(
+                """INSERT OR IGNORE INTO doc_topics (topic, doc_id, run_id, added_at)
+                   SELECT topic, ?, run_id, added_at FROM doc_topics WHERE doc_id = ?""",
+                (keep, drop),
+            )
+            conn.execute("DELETE FROM processed_docs WHERE id = ?", (drop,))
+            folded += 1
+    if folded:
+        logger.info("Near-dup: folded %s docs into existing stories", folded)
+    return folded
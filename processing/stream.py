@@ -0,0 +1,126 @@
+"""Streaming mode: fetch → dedup/filter → extract connected by a bounded queue, on one DB connection."""
+
+import logging
+import os
+import queue
+import sqlite3
+import threading
+import time
+from typing import Any
+
+from config import get_topic_name
+from ingestion.pipeline import source_fetchers
+from ingestion.storage import get_connection, insert_raw_docs_bulk
+from processing.dedup_filter import run_dedup_and_filter
+from processing.extract import run_extraction
+
+logger = logging.getLogger(__name__)
+
+# Fetched items waiting for the DB; fetchers block (backpressure) when this many are queued.
+QUEUE_SIZE = int(os.environ.get("STREAM_QUEUE_SIZE", "200"))
+# Micro-batch: up to this many items, or whatever arrived within FLUSH_SEC of the first one.
+BATCH_SIZE = int(os.environ.get("STREAM_BATCH_SIZE", "25"))
+FLUSH_SEC = 0.5
+
+_DONE = object()
+
+
+def _produce(name: str, fetch, out: queue.Queue, stop: threading.Event) -> None:
+    """Fetcher thread: push one source's items into the queue until exhausted or stopped."""
+    conn = get_connection()  # RSS validators/seen ids; never shared with the consumer
+    n = 0
+    try:
+        for item in fetch(conn):
+            while not stop.is_set():
+                try:
+                    out.put(item, timeout=FLUSH_SEC)
+                    n += 1
+                    break
+                except queue.Full:
+                    continue
+            if stop.is_set():
+                break
+    except Exception as e:
+        logger.warning("Stream source %s failed: %s", name, e)
+    finally:
+        conn.close()
+        out.put(_DONE)
+        logger.info("Stream source %s: %s items", name, n)
+
+
+def _next_batch(items: queue.Queue, size: int) -> tuple[list[dict[str, Any]], int]:
+    """Block for the first item, then take what arrives within FLUSH_SEC (up to size). Returns (batch, sources done)."""
+    batch, done = [], 0
+    item = items.get()
+    deadline = time.monotonic() + FLUSH_SEC
+    while True:
+        if item is _DONE:
+            done += 1
+        else:
+            batch.append(item)
+        if len(batch) >= size:
+            break
+        try:
+            item = items.get(timeout=max(0.0, deadline - time.monotonic()))
+        except queue.Empty:
+            break
+    return batch, done
+
+
+def run_streaming(
+    conn: sqlite3.Connection,
+    max_docs: int | None = None,
+    max_extract: int | None = 50,
+    queue_size: int | None = None,
+    batch_size: int | None = None,
+    topic: str | None = None,
+    run_id: int | None = None,
+) -> dict[str, int]:
+    """
+    Run ingest, dedup/filter and extraction as one stream: each source is fetched in its own
+    thread into a bounded queue, and every micro-batch is inserted into raw_docs, moved to
+    processed_docs and extracted before the next one, so extraction starts with the first
+    fetched items. Memory is bounded by the queue, not the corpus. max_docs caps ingested
+    docs (fetchers stop once reached; items fetched past it are dropped unstored and, since a
+    feed's seen entries are only saved with its stored items, fetched again next run). max_extract is the LLM extraction budget of the whole
+    stream, spent across micro-batches (every stored extraction counts against it; None = no cap).
+    conn is used for all stage writes and left open. topic defaults to get_topic_name(); fetched
+    docs (new or already stored) join its partition and are extracted for it. run_id is recorded on the rows written. Returns counts per stage.
+    """
+    topic = topic or get_topic_name()
+    items: queue.Queue = queue.Queue(maxsize=max(1, queue_size or QUEUE_SIZE))
+    stop = threading.Event()
+    threads = [
+        threading.Thread(target=_produce, args=(name, fetch, items, stop), name=f"fetch-{name}", daemon=True)
+        for name, fetch in source_fetchers(topics=[topic]).items()
+    ]
+    for t in threads:
+        t.start()
+    counts = {"raw_docs": 0, "new_docs": 0, "processed_docs": 0, "extractions": 0, "batches": 0}
+    live = len(threads)
+    while live:
+        batch, done = _next_batch(items, max(1, batch_size or BATCH_SIZE))
+        live -= done
+        if stop.is_set() or not batch:
+            continue  # keep draining so blocked fetchers can exit; drained items stay unseen
+        if max_docs:
+            batch = batch[: max_docs - counts["raw_docs"]]
+        new_ids, existing_ids = insert_raw_docs_bulk(conn, batch, run_id=run_id, topic=topic)
+        counts["raw_docs"] += len(new_ids) + len(existing_ids)
+        counts["batches"] += 1
+        if max_docs and counts["raw_docs"] >= max_docs:
+            stop.set()
+        if new_ids:
+            counts["new_docs"] += len(new_ids)
+            counts["processed_docs"] = run_dedup_and_filter(conn=conn)
+        # Already-stored docs just joined this topic's partition too; up-to-date extractions are skipped.
+        budget = None if max_extract is None else max(0, max_extract - counts["extractions"])
+        counts["extractions"] += run_extraction(
+            max_docs=budget, conn=conn, doc_ids=new_ids + existing_ids, topic=topic, run_id=run_id
+        )
+    for t in threads:
+        t.join(timeout=5)
+    if not counts["processed_docs"]:
+        counts["processed_docs"] = run_dedup_and_filter(conn=conn)
+    logger.info("Stream: %s", counts)
+    return counts
@@ -0,0 +1,40 @@
+"""Per-topic relevance: which processed docs of the shared corpus belong to a topic (doc_topics)."""
+
+import logging
+import os
+import re
+import sqlite3
+
+from ingestion.storage import add_doc_topics, search_docs
+
+logger = logging.getLogger(__name__)
+
+# Most relevant docs (FTS5 bm25) kept per topic in batch mode.
+TOPIC_MAX_DOCS = int(os.environ.get("TOPIC_MAX_DOCS", "500"))
+
+_WORD = re.compile(r"\w+")
+_STOP = {"and", "or", "of", "the", "for", "in", "on", "to", "a", "an", "with", "market", "markets"}
+
+
+def topic_terms(topic: str) -> str:
+    """Topic words worth matching on (stopwords and 1-letter words dropped), space separated."""
+    return " ".join(w for w in _WORD.findall(topic.lower()) if len(w) > 1 and w not in _STOP)
+
+
+def topic_doc_ids(conn: sqlite3.Connection, topic: str, limit: int | None = None) -> list[int]:
+    """Ids of the processed docs most relevant to topic (any topic word matches, bm25-ranked)."""
+    terms = topic_terms(topic)
+    if not terms:
+        return [r["id"] for r in conn.execute("SELECT id FROM processed_docs ORDER BY id DESC LIMIT ?",
+                                              (limit or TOPIC_MAX_DOCS,))]
+    hits = search_docs(conn, terms, limit=limit or TOPIC_MAX_DOCS, match_any=True)
+    logger.info("Topic %r: %s relevant docs", topic, len(hits))
+    return [h["id"] for h in hits]
+
+
+def refresh_topic_docs(conn: sqlite3.Connection, topic: str, run_id: int | None = None, limit: int | None = None) -> int:
+    """Add the docs most relevant to topic to its partition; returns how many joined it."""
+    added = add_doc_topics(conn, topic, topic_doc_ids(conn, topic, limit), run_id)
+    if added:
+        logger.info("Topic %r: +%s docs in partition", topic, added)
+    return added
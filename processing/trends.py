@@ -1,81 +1,185 @@
 """Trend detection and contradiction detection."""
 
+import hashlib
+import heapq
 import logging
-import os
+import math
+import sqlite3
 from collections import defaultdict
-from ingestion.storage import get_connection, get_processed_docs, get_extractions, init_schema, insert_contradiction
+from datetime import datetime, timezone
+from ingestion.storage import (
+    get_connection, get_contradiction_verdicts, get_entity_postings, get_events_sample, get_processed_docs_by_ids,
+    get_rising_entities, get_signal_counts, get_signal_trends, get_top_entities, get_topic_doc_count, init_schema,
+    insert_contradiction, save_contradiction_verdict,
+)
 from config import get_topic_name
-from llm import complete
+from llm import MAX_IN_FLIGHT, complete_many, get_model
 
 logger = logging.getLogger(__name__)
 
+# Entities mentioned by more docs than this are too generic to suggest a conflict (and would
+# make pair generation quadratic); they are left out of the candidate index.
+MAX_POSTING = 50
+RECENCY_DAYS = 7.0
+# "Rising" = mentions in the last TREND_WINDOW_DAYS vs the BASELINE_DAYS before them (entity_daily / signal_daily).
+TREND_WINDOW_DAYS = 7
+BASELINE_DAYS = 28
+# Bump when the contradiction prompt changes so stored verdicts are re-asked.
+PROMPT_VERSION = "contradict-v1"
 
-def _contradicts(snippet_a: str, snippet_b: str, topic: str) -> bool:
-    """True if LLM says the two snippets contradict."""
-    prompt = f"""Topic: {topic}
+
+def _contradiction_prompt(snippet_a: str, snippet_b: str, topic: str) -> str:
+    return f"""Topic: {topic}
 Snippet A: {snippet_a[:1500]}
 Snippet B: {snippet_b[:1500]}
 Do these CONTRADICT each other (different/opposing facts)? Answer only: YES or NO."""
-    ans = complete(prompt, temperature=0)
-    return bool(ans and "YES" in (ans or "").upper())
-
-
-def run_trends_and_contradictions(max_contradiction_pairs: int = 10) -> tuple[dict, list[dict]]:
-    """Aggregate extractions into trend summary; find contradictions. Returns (trend_summary, contradictions)."""
-    conn = get_connection()
-    init_schema(conn)
-    docs = get_processed_docs(conn)
-    extractions = get_extractions(conn)
-    topic = get_topic_name()
-    doc_by_id = {d["id"]: d for d in docs}
-    ext_by_doc = defaultdict(list)
-    for e in extractions:
-        ext_by_doc[e["doc_id"]].append(e)
-
-    # Trends
-    signal_counts = defaultdict(int)
-    entity_counts = defaultdict(int)
-    all_events = []
-    for e in extractions:
-        for t in e.get("signal_tags", []):
-            signal_counts[t] += 1
-        for ent in e.get("entities", []):
-            entity_counts[str(ent)] += 1
-        all_events.extend(e.get("events", []))
+
+
+def _is_yes(ans: str | None) -> bool:
+    return bool(ans and "YES" in ans.upper())
+
+
+def _text_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def _pair_key(hash_a: str, hash_b: str, topic: str, model: str) -> str:
+    """Verdict identity: the two snippets (order-independent), topic, prompt version and model."""
+    lo, hi = sorted((hash_a, hash_b))
+    return hashlib.sha256(f"{lo}|{hi}|{topic}|{PROMPT_VERSION}|{model}".encode("utf-8")).hexdigest()
+
+
+def _doc_time(doc: dict) -> datetime | None:
+    s = doc.get("published_at") or doc.get("fetched_at")
+    try:
+        dt = datetime.fromisoformat(s.replace("Z", "+00:00"))
+        return dt if dt.tzinfo else dt.replace(tzinfo=timezone.utc)
+    except Exception:
+        return None
+
+
+def _candidate_pairs(
+    postings: dict[int, tuple[str, list[int]]],
+    n_docs: int,
+    times: dict[int, datetime | None],
+    top_k: int,
+) -> list[tuple[float, int, int, list[str]]]:
+    """
+    Score doc pairs through an entity → doc-id inverted index: each shared entity adds its
+    IDF, and the sum is damped by the publication gap. Returns the top_k
+    (score, doc_id_a, doc_id_b, shared entity names), best first.
+    postings maps entity_id → (name, sorted doc ids), see get_entity_postings().
+    """
+    n = max(n_docs, 1)
+    scores = defaultdict(float)
+    for _, ids in postings.values():
+        idf = math.log(1 + n / len(ids))
+        for i, a in enumerate(ids):
+            for b in ids[i + 1 :]:
+                scores[(a, b)] += idf
+
+    def damped(item):
+        (a, b), score = item
+        ta, tb = times.get(a), times.get(b)
+        if ta and tb:
+            score /= 1 + abs((ta - tb).total_seconds()) / 86400 / RECENCY_DAYS
+        return score, -a, -b
+
+    best = heapq.nlargest(top_k, scores.items(), key=damped)
+    wanted = {d for (a, b), _ in best for d in (a, b)}
+    doc_entities = defaultdict(list)
+    for name, ids in postings.values():
+        for doc_id in ids:
+            if doc_id in wanted:
+                doc_entities[doc_id].append(name)
+    out = []
+    for (a, b), score in best:
+        names_b = set(doc_entities[b])
+        out.append((damped(((a, b), score))[0], a, b, [x for x in doc_entities[a] if x in names_b]))
+    return out
+
+
+def run_trends_and_contradictions(
+    max_contradiction_pairs: int = 10,
+    max_candidate_pairs: int = 40,
+    conn: sqlite3.Connection | None = None,
+    topic: str | None = None,
+    run_id: int | None = None,
+) -> tuple[dict, list[dict]]:
+    """
+    Aggregate extractions into trend summary; find contradictions. Returns (trend_summary, contradictions).
+    The summary includes rising entities and per-signal velocity/burst (last TREND_WINDOW_DAYS vs the
+    BASELINE_DAYS before). Only the max_candidate_pairs best-scoring doc pairs (shared-entity IDF,
+    recency) are sent to the LLM. With conn the caller's connection is used and left open;
+    topic defaults to get_topic_name(), and only that topic's extractions and partition are read.
+    Contradictions are stored under the topic with run_id.
+    """
+    own = conn is None
+    if own:
+        conn = get_connection()
+        init_schema(conn)
+    topic = topic or get_topic_name()
+
+    # Trends: indexed GROUP BY over the normalized extraction tables, velocity/burst from the daily aggregates
+    signal_counts = get_signal_counts(conn, topic=topic)
     trend_summary = {
-        "signal_counts": dict(signal_counts),
-        "top_entities": sorted(entity_counts.items(), key=lambda x: -x[1])[:25],
-        "events_sample": all_events[:30],
-        "num_docs": len(docs),
+        "signal_counts": signal_counts,
+        "top_entities": get_top_entities(conn, 25, topic=topic),
+        "rising_entities": get_rising_entities(conn, TREND_WINDOW_DAYS, BASELINE_DAYS, limit=10, topic=topic),
+        "signal_trends": get_signal_trends(conn, TREND_WINDOW_DAYS, BASELINE_DAYS, topic=topic),
+        "events_sample": get_events_sample(conn, 30, topic=topic),
+        "num_docs": get_topic_doc_count(conn, topic),
     }
 
-    # Contradictions: sample doc pairs that share an entity
+    # Contradictions: rank doc pairs that share entities, via the entity → doc inverted index
+    postings, n_docs = get_entity_postings(conn, min_docs=2, max_docs=MAX_POSTING, topic=topic)
+    posted = sorted({d for _, ids in postings.values() for d in ids})
+    times = {}
+    for i in range(0, len(posted), 500):
+        chunk = posted[i : i + 500]
+        marks = ",".join("?" * len(chunk))
+        for r in conn.execute(f"SELECT id, published_at, fetched_at FROM processed_docs WHERE id IN ({marks})", chunk):
+            times[r["id"]] = _doc_time(dict(r))
+    ranked = _candidate_pairs(postings, n_docs, times, max_candidate_pairs)
+    doc_by_id = get_processed_docs_by_ids(conn, sorted({d for _, a, b, _ in ranked for d in (a, b)}))
+    candidates = []
+    for _, doc_id_a, doc_id_b, names in ranked:
+        da, db = doc_by_id[doc_id_a], doc_by_id[doc_id_b]
+        sa = (da.get("title") or "") + " " + (da.get("body") or "")[:1200]
+        sb = (db.get("title") or "") + " " + (db.get("body") or "")[:1200]
+        candidates.append((doc_id_a, doc_id_b, ", ".join(names)[:200], sa, sb))
+
+    # Stored YES/NO verdicts first; only never-judged pairs go to the LLM, in concurrent batches.
+    model = get_model()
+    keyed = []
+    for cand in candidates:
+        ha, hb = _text_hash(cand[3]), _text_hash(cand[4])
+        keyed.append((cand, ha, hb, _pair_key(ha, hb, topic, model)))
+    verdicts = get_contradiction_verdicts(conn, [k for *_, k in keyed])
+    hits = sum(1 for *_, k in keyed if k in verdicts)
     contradictions_found = []
-    doc_ids = [d["id"] for d in docs]
-    seen = set()
-    for i, doc_id_a in enumerate(doc_ids):
+    batch = MAX_IN_FLIGHT
+    for start in range(0, len(keyed), batch):
         if len(contradictions_found) >= max_contradiction_pairs:
             break
-        entities_a = {str(x) for e in ext_by_doc.get(doc_id_a, []) for x in e.get("entities", [])}
-        if not entities_a:
-            continue
-        for doc_id_b in doc_ids[i + 1 : i + 6]:
-            if doc_id_a == doc_id_b:
-                continue
-            pair = (min(doc_id_a, doc_id_b), max(doc_id_a, doc_id_b))
-            if pair in seen:
-                continue
-            seen.add(pair)
-            entities_b = {str(x) for e in ext_by_doc.get(doc_id_b, []) for x in e.get("entities", [])}
-            if not (entities_a & entities_b):
+        chunk = keyed[start : start + batch]
+        ask = [item for item in chunk if item[3] not in verdicts]
+        answers = complete_many([_contradiction_prompt(c[3], c[4], topic) for c, *_ in ask], temperature=0)
+        for (_, ha, hb, key), ans in zip(ask, answers):
+            if ans is None:
+                continue  # LLM failure: leave unjudged so it is asked again next run
+            verdicts[key] = _is_yes(ans)
+            save_contradiction_verdict(conn, key, ha, hb, topic, verdicts[key], PROMPT_VERSION, model, commit=False)
+        for (doc_id_a, doc_id_b, focus, sa, sb), _, _, key in chunk:
+            if len(contradictions_found) >= max_contradiction_pairs or not verdicts.get(key):
                 continue
-            da, db = doc_by_id.get(doc_id_a, {}), doc_by_id.get(doc_id_b, {})
-            sa = (da.get("title") or "") + " " + (da.get("body") or "")[:1200]
-            sb = (db.get("title") or "") + " " + (db.get("body") or "")[:1200]
-            if _contradicts(sa, sb, topic):
-                focus = ", ".join(entities_a & entities_b)[:200]
-                insert_contradiction(conn, focus, doc_id_a, doc_id_b, sa[:2000], sb[:2000])
-                contradictions_found.append({"focus": focus, "doc_id_a": doc_id_a, "doc_id_b": doc_id_b, "snippet_a": sa[:500], "snippet_b": sb[:500]})
-    conn.close()
+            insert_contradiction(
+                conn, focus, doc_id_a, doc_id_b, sa[:2000], sb[:2000], commit=False, topic=topic, run_id=run_id
+            )
+            contradictions_found.append({"focus": focus, "doc_id_a": doc_id_a, "doc_id_b": doc_id_b, "snippet_a": sa[:500], "snippet_b": sb[:500]})
+        conn.commit()
+    logger.info("Contradictions: %s/%s candidate verdicts from store", hits, len(keyed))
+    if own:
+        conn.close()
     logger.info("Trends: %s signals, %s contradictions", len(signal_counts), len(contradictions_found))
     return trend_summary, contradictions_found
@@ -0,0 +1,163 @@
+"""
+Opt-in per-step profiling (TRACK_PROFILE=cpu,mem or python run.py --profile), driven by
+tracking.start_step / end_step. For each step it writes into data/profiles/<run>/:
+
+    NN_<step>.pstats      cProfile stats (python -m pstats, snakeviz)
+    NN_<step>.cpu.txt     top functions by cumulative time
+    NN_<step>.collapsed   folded stacks for flamegraph.pl / speedscope, in microseconds
+    NN_<step>.mem.txt     tracemalloc peak and top allocation sites still live at step end
+
+cProfile sees the thread that runs the step: work on pool threads (parallel fetches, concurrent
+LLM calls) shows up as time waiting on their results.
+"""
+
+import cProfile
+import io
+import logging
+import os
+import pstats
+import re
+import tracemalloc
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+MODES = ("cpu", "mem")
+TOP_N = int(os.environ.get("TRACK_PROFILE_TOP", "30"))
+FRAMES = int(os.environ.get("TRACK_PROFILE_FRAMES", "1"))  # tracemalloc traceback depth (>1 groups by traceback)
+MIN_STACK_SEC = 0.0005  # collapsed stacks: paths carrying less cumulative time are dropped
+MAX_DEPTH = 128
+
+_UNSAFE = re.compile(r"[^\w.-]+")
+
+
+def parse_modes(value: str | None) -> frozenset[str]:
+    """'cpu', 'mem', 'cpu,mem', or 1/true/yes/all for both; empty, 0 or unknown words = off."""
+    words = {w.strip().lower() for w in (value or "").split(",") if w.strip()}
+    if words & {"1", "true", "yes", "all"}:
+        return frozenset(MODES)
+    unknown = words - set(MODES) - {"0", "false", "no", "off"}
+    if unknown:
+        logger.warning("Profiling: ignoring unknown mode(s) %s (use %s)", ", ".join(sorted(unknown)), ",".join(MODES))
+    return frozenset(words & set(MODES))
+
+
+def _frame(func: tuple[str, int, str]) -> str:
+    filename, lineno, name = func
+    label = name if filename == "~" else f"{name} ({os.path.basename(filename)}:{lineno})"
+    return label.replace(";", ",")
+
+
+def collapsed_stacks(stats: pstats.Stats) -> dict[str, int]:
+    """
+    Folded stacks ("root;caller;func" → self time in µs) rebuilt from cProfile's caller/callee
+    edges. cProfile keeps no full stacks, so a function's time is split across the paths leading
+    to it in proportion to each edge's cumulative time: exact for trees, approximate otherwise.
+    """
+    raw = stats.stats  # func -> (cc, nc, tottime, cumtime, callers{caller: (cc, nc, tottime, cumtime)})
+    children: dict[tuple, list[tuple[tuple, float]]] = {}
+    for func, (_, _, _, _, callers) in raw.items():
+        for caller, edge in callers.items():
+            children.setdefault(caller, []).append((func, edge[3]))
+    out: dict[str, int] = {}
+
+    def walk(func: tuple, path: list[str], seen: set, frac: float) -> None:
+        _, _, tottime, cumtime, _ = raw[func]
+        path = path + [_frame(func)]
+        self_us = int(tottime * frac * 1_000_000)
+        if self_us:
+            key = ";".join(path)
+            out[key] = out.get(key, 0) + self_us
+        if len(path) >= MAX_DEPTH:
+            return
+        seen = seen | {func}
+        for callee, edge_ct in children.get(func, ()):
+            callee_ct = raw[callee][3]
+            if callee in seen or callee_ct <= 0 or edge_ct * frac < MIN_STACK_SEC:
+                continue
+            walk(callee, path, seen, frac * edge_ct / callee_ct)
+
+    for func, (_, _, _, _, callers) in raw.items():
+        if not callers:
+            walk(func, [], set(), 1.0)
+    return out
+
+
+class StepProfiler:
+    """CPU (cProfile) and/or memory (tracemalloc) profile of one step; start() then stop()."""
+
+    def __init__(self, step: str, modes: frozenset[str]):
+        self.step = step
+        self.modes = modes
+        self._cpu: cProfile.Profile | None = None
+        self._own_tracemalloc = False
+
+    def start(self) -> "StepProfiler":
+        if "mem" in self.modes:
+            if tracemalloc.is_tracing():
+                tracemalloc.clear_traces()
+                tracemalloc.reset_peak()
+            else:
+                tracemalloc.start(max(1, FRAMES))
+                self._own_tracemalloc = True
+        if "cpu" in self.modes:
+            self._cpu = cProfile.Profile()
+            try:
+                self._cpu.enable()
+            except ValueError as e:  # another profiler is already active (python -m cProfile run.py)
+                logger.warning("Profiling: CPU profile skipped: %s", e)
+                self._cpu = None
+        return self
+
+    def stop(self, directory: Path, name: str) -> list[Path]:
+        """Stop profiling and write the step's artifacts to directory/name.*; returns their paths."""
+        snapshot, peak = None, 0
+        if self._cpu is not None:
+            self._cpu.disable()
+        if "mem" in self.modes and tracemalloc.is_tracing():
+            snapshot = tracemalloc.take_snapshot()
+            peak = tracemalloc.get_traced_memory()[1]
+            if self._own_tracemalloc:
+                tracemalloc.stop()
+        directory.mkdir(parents=True, exist_ok=True)
+        written = []
+        if self._cpu is not None:
+            written += self._write_cpu(directory, name)
+        if snapshot is not None:
+            written.append(self._write_mem(directory / f"{name}.mem.txt", snapshot, peak))
+        return written
+
+    def _write_cpu(self, directory: Path, name: str) -> list[Path]:
+        stats = pstats.Stats(self._cpu)
+        pstats_path = directory / f"{name}.pstats"
+        stats.dump_stats(str(pstats_path))
+        text = io.StringIO()
+        pstats.Stats(self._cpu, stream=text).sort_stats("cumulative").print_stats(TOP_N)
+        text_path = directory / f"{name}.cpu.txt"
+        text_path.write_text(text.getvalue())
+        stacks_path = directory / f"{name}.collapsed"
+        stacks = collapsed_stacks(stats)
+        stacks_path.write_text("".join(f"{k} {v}\n" for k, v in sorted(stacks.items())))
+        return [pstats_path, text_path, stacks_path]
+
+    def _write_mem(self, path: Path, snapshot: tracemalloc.Snapshot, peak: int) -> Path:
+        snapshot = snapshot.filter_traces([
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap*>"),
+        ])
+        by_traceback = FRAMES > 1
+        top = snapshot.statistics("traceback" if by_traceback else "lineno")[:TOP_N]
+        live = sum(t.size for t in snapshot.traces)
+        lines = [f"peak traced: {peak / 1048576:.1f} MiB, live at step end: {live / 1048576:.1f} MiB", ""]
+        for i, stat in enumerate(top, 1):
+            frame = stat.traceback[-1]  # allocating line (frames run oldest → most recent)
+            lines.append(f"#{i}: {frame.filename}:{frame.lineno}: {stat.size / 1024:.1f} KiB in {stat.count} blocks")
+            if by_traceback:
+                lines += ["    " + line for line in stat.traceback.format()]
+        path.write_text("\n".join(lines) + "\n")
+        return path
+
+
+def artifact_name(index: int, step: str) -> str:
+    """File stem for the index-th profiled step of a run, e.g. 02_dedup_filter."""
+    return f"{index:02d}_{_UNSAFE.sub('_', step).strip('_') or 'step'}"
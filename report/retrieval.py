@@ -0,0 +1,179 @@
+"""Per-section evidence retrieval: a BM25 index over processed_docs, persisted in SQLite."""
+
+import logging
+import math
+import re
+import sqlite3
+from collections import Counter, defaultdict
+
+logger = logging.getLogger(__name__)
+
+K1 = 1.2
+B = 0.75
+TAG_BOOST = 0.5  # score multiplier bonus for docs whose extraction carries the section's signal tag
+INDEX_CHARS = 20000
+
+SECTION_QUERIES = {
+    "executive_summary": "",
+    "market": "market revenue sales pricing customers demand competition share funding acquisition valuation",
+    "regulation": "regulation regulator law policy compliance antitrust government ban lawsuit court commission",
+    "technology": "technology model chip software hardware launch research benchmark release platform",
+    "risks": "risk threat breach outage shortage decline lawsuit layoffs delay concern",
+    "opportunities": "opportunity growth expansion partnership adoption investment demand launch",
+}
+SECTION_TAGS = {
+    "market": "market",
+    "regulation": "regulation",
+    "technology": "technology",
+    "risks": "risk",
+    "opportunities": "opportunity",
+}
+
+_TOKEN = re.compile(r"[a-z0-9]{2,}")
+_STOP = {
+    "the", "and", "for", "that", "with", "this", "from", "are", "was", "were", "has", "have", "had", "its", "but",
+    "not", "you", "they", "their", "will", "would", "can", "could", "been", "more", "than", "into", "about", "also",
+    "which", "what", "when", "who", "how", "all", "our", "out", "new", "said", "says", "one", "two", "his", "her",
+}
+
+
+def _tokens(text: str) -> list[str]:
+    return [t for t in _TOKEN.findall(text.lower()) if t not in _STOP]
+
+
+def update_index(conn: sqlite3.Connection) -> tuple[int, int]:
+    """
+    Index processed_docs not yet indexed (new, or content changed since indexing) and drop docs
+    that left processed_docs. Returns (added, removed).
+    """
+    with conn:
+        removed = conn.execute(
+            "DELETE FROM bm25_docs WHERE doc_id NOT IN (SELECT id FROM processed_docs)"
+        ).rowcount
+        if removed:
+            conn.execute("DELETE FROM bm25_postings WHERE doc_id NOT IN (SELECT doc_id FROM bm25_docs)")
+        rows = conn.execute(
+            "SELECT id, title, body FROM processed_docs WHERE id NOT IN (SELECT doc_id FROM bm25_docs)"
+        ).fetchall()
+        # Docs whose content changed were dropped from bm25_docs by a trigger; clear their old postings.
+        conn.executemany("DELETE FROM bm25_postings WHERE doc_id = ?", [(r["id"],) for r in rows])
+        for r in rows:
+            terms = Counter(_tokens((r["title"] or "") + " " + (r["body"] or "")[:INDEX_CHARS]))
+            conn.execute("INSERT INTO bm25_docs (doc_id, length) VALUES (?, ?)", (r["id"], sum(terms.values())))
+            conn.executemany(
+                "INSERT OR REPLACE INTO bm25_postings (term, doc_id, tf) VALUES (?, ?, ?)",
+                [(t, r["id"], n) for t, n in terms.items()],
+            )
+    if rows or removed:
+        logger.info("Retrieval index: +%s docs, -%s docs", len(rows), removed)
+    return len(rows), removed
+
+
+def _tagged(conn: sqlite3.Connection, doc_ids: list[int], tag: str, topic: str | None) -> set[int]:
+    """Subset of doc_ids whose extraction (for topic, when given) carries signal tag."""
+    found: set[int] = set()
+    where = "tag = ?" + (" AND topic = ?" if topic else "")
+    for i in range(0, len(doc_ids), 500):
+        chunk = doc_ids[i : i + 500]
+        marks = ",".join("?" * len(chunk))
+        params = [tag] + ([topic] if topic else []) + chunk
+        found.update(r[0] for r in conn.execute(
+            f"SELECT DISTINCT doc_id FROM doc_signal_tags WHERE {where} AND doc_id IN ({marks})", params
+        ))
+    return found
+
+
+def _has_partition(conn: sqlite3.Connection, topic: str | None) -> bool:
+    return bool(topic) and conn.execute("SELECT 1 FROM doc_topics WHERE topic = ? LIMIT 1", (topic,)).fetchone() is not None
+
+
+def search(
+    conn: sqlite3.Connection,
+    query: str,
+    limit: int = 50,
+    boost_tag: str | None = None,
+    topic: str | None = None,
+) -> list[tuple[int, float]]:
+    """
+    BM25-ranked (doc_id, score) for query, optionally boosting docs tagged boost_tag. With topic,
+    only docs in its partition (doc_topics) are ranked, unless the partition is empty, and only
+    the topic's own extractions count for the boost.
+    """
+    terms = list(dict.fromkeys(_tokens(query)))
+    if not terms:
+        return []
+    n, total = conn.execute("SELECT COUNT(*), COALESCE(SUM(length), 0) FROM bm25_docs").fetchone()
+    if not n:
+        return []
+    avgdl = total / n or 1.0
+    members = set()
+    if _has_partition(conn, topic):
+        members = {r[0] for r in conn.execute("SELECT doc_id FROM doc_topics WHERE topic = ?", (topic,))}
+    scores: dict[int, float] = defaultdict(float)
+    for term in terms:
+        postings = conn.execute(
+            "SELECT p.doc_id, p.tf, d.length FROM bm25_postings p JOIN bm25_docs d ON d.doc_id = p.doc_id WHERE p.term = ?",
+            (term,),
+        ).fetchall()
+        if not postings:
+            continue
+        idf = math.log(1 + (n - len(postings) + 0.5) / (len(postings) + 0.5))  # corpus-wide IDF
+        for doc_id, tf, length in postings:
+            if members and doc_id not in members:
+                continue
+            scores[doc_id] += idf * tf * (K1 + 1) / (tf + K1 * (1 - B + B * length / avgdl))
+    ranked = sorted(scores.items(), key=lambda x: (-x[1], x[0]))[: limit * 2]
+    if boost_tag and ranked:
+        tagged = _tagged(conn, [d for d, _ in ranked], boost_tag, topic)
+        ranked = [(d, s * (1 + TAG_BOOST) if d in tagged else s) for d, s in ranked]
+        ranked.sort(key=lambda x: (-x[1], x[0]))
+    return ranked[:limit]
+
+
+def select_evidence(
+    conn: sqlite3.Connection,
+    topic: str,
+    section: str,
+    max_docs: int,
+    budget_chars: int,
+) -> list[int]:
+    """
+    Best doc ids for one report section: BM25 over topic + section keywords with a signal-tag
+    boost, packed until budget_chars of evidence (title + 2000 body chars per doc) is used.
+    Only docs in the topic's partition are considered when it has any. Falls back to the most
+    recent (partition) docs when nothing matches.
+    """
+    ranked = [d for d, _ in search(conn, f"{topic} {SECTION_QUERIES.get(section, section.replace('_', ' '))}",
+                                   limit=max_docs, boost_tag=SECTION_TAGS.get(section), topic=topic)]
+    if not ranked and _has_partition(conn, topic):
+        ranked = [r["id"] for r in conn.execute(
+            """SELECT p.id FROM doc_topics t JOIN processed_docs p ON p.id = t.doc_id WHERE t.topic = ?
+               ORDER BY p.published_at DESC, p.id DESC LIMIT ?""",
+            (topic, max_docs),
+        )]
+    elif not ranked:
+        ranked = [r["id"] for r in conn.execute(
+            "SELECT id FROM processed_docs ORDER BY published_at DESC, id DESC LIMIT ?", (max_docs,)
+        )]
+    picked, used = [], 0
+    for doc_id, size in _evidence_sizes(conn, ranked):
+        if picked and used + size > budget_chars:
+            break
+        picked.append(doc_id)
+        used += size
+    return picked
+
+
+def _evidence_sizes(conn: sqlite3.Connection, doc_ids: list[int]) -> list[tuple[int, int]]:
+    if not doc_ids:
+        return []
+    marks = ",".join("?" * len(doc_ids))
+    sizes: dict[int, int] = {
+        r["id"]: r["size"]
+        for r in conn.execute(
+            f"SELECT id, LENGTH(COALESCE(title, '')) + MIN(LENGTH(COALESCE(body, '')), 2000) + 20 AS size "
+            f"FROM processed_docs WHERE id IN ({marks})",
+            doc_ids,
+        )
+    }
+    return [(d, sizes[d]) for d in doc_ids if d in sizes]
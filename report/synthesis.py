@@ -2,17 +2,24 @@
 
 import json
 import logging
+import os
+import sqlite3
 from datetime import datetime
 from typing import Any
-from ingestion.storage import get_connection, get_processed_docs, get_extractions, insert_report
+from ingestion.storage import get_connection, get_processed_docs_by_ids, get_topic_doc_count, init_schema, insert_report
 from config import get_topic_name, get_topic_description, get_report_sections
 from reasoning.self_critique import run_self_critique
-from llm import complete
+from report.retrieval import select_evidence, update_index
+from llm import complete_many
 
 logger = logging.getLogger(__name__)
+# Sections are written concurrently; one still running this many seconds after its request was sent
+# (time queued behind LLM_MAX_CONCURRENCY does not count) is reported as skipped.
+SECTION_TIMEOUT = float(os.environ.get("SYNTHESIS_SECTION_TIMEOUT", "120"))
+EVIDENCE_CHARS = 12000
 
 
-def _write_section(
+def _section_prompt(
     topic: str,
     description: str,
     evidence: str,
@@ -21,22 +28,23 @@ def _write_section(
     weighting_note: str,
     section: str,
 ) -> str:
-    """One report section with citations."""
     contra_text = "\n".join(
         f"- {c.get('focus', '')}: A: {c.get('snippet_a', '')[:200]}... | B: {c.get('snippet_b', '')[:200]}..."
         for c in contradictions[:5]
     ) if contradictions else "None."
-    prompt = f"""Topic: {topic}. Description: {description}
+    return f"""Topic: {topic}. Description: {description}
 Evidence (cite with [doc_id]):
 ---
-{evidence[:12000]}
+{evidence[:EVIDENCE_CHARS]}
 ---
 Trends: {json.dumps(trend_summary)[:1500]}
 Contradictions: {contra_text}
 {weighting_note}
 Write section "{section}" in 2-4 paragraphs. Use ONLY the evidence. Cite every claim with [doc_id]. No invented sources."""
-    out = complete(prompt, temperature=0.3)
-    return out or f"[Section '{section}' skipped: no LLM]"
+
+
+def _skipped(section: str) -> str:
+    return f"[Section '{section}' skipped: no LLM]"
 
 
 def run_synthesis(
@@ -44,31 +52,57 @@ def run_synthesis(
     contradictions: list[dict],
     weighting_result: dict,
     max_docs_for_context: int = 25,
+    conn: sqlite3.Connection | None = None,
+    topic: str | None = None,
+    run_id: int | None = None,
 ) -> tuple[dict[str, Any], str, float]:
-    """Build evidence, generate sections, self-critique, return (report_json, report_md, confidence)."""
-    conn = get_connection()
-    docs = get_processed_docs(conn)
-    topic = get_topic_name()
+    """
+    Build evidence, generate sections, self-critique, return (report_json, report_md, confidence).
+    Each section gets its own evidence: up to max_docs_for_context docs ranked by BM25 relevance
+    to the topic and section (see report.retrieval). Sections are written concurrently and assembled in config order; a section that fails or
+    runs longer than SYNTHESIS_SECTION_TIMEOUT (from its own start) gets the "skipped" text instead of blocking the others.
+    With conn the caller's connection is used and left open; topic defaults to get_topic_name().
+    Evidence comes from the topic's partition; the report is stored under the topic with run_id.
+    """
+    own = conn is None
+    if own:
+        conn = get_connection()
+        init_schema(conn)
+    update_index(conn)
+    topic = topic or get_topic_name()
+    num_docs = get_topic_doc_count(conn, topic)
     description = get_topic_description()
     sections_config = get_report_sections()
-    evidence_docs = docs[:max_docs_for_context]
+    content_sections = [s for s in sections_config if s != "appendix_citations"]
+    section_doc_ids = {
+        sec: select_evidence(conn, topic, sec, max_docs_for_context, EVIDENCE_CHARS) for sec in content_sections
+    }
+    docs_by_id = get_processed_docs_by_ids(conn, [d for ids in section_doc_ids.values() for d in ids])
 
-    # One loop: evidence text + citations list
-    evidence_parts = []
+    # Evidence text per section + one citations list (first use order)
     citations_list = []
-    for d in evidence_docs:
-        did, title, body = d["id"], d.get("title") or "", (d.get("body") or "")[:2000]
-        evidence_parts.append(f"[doc_id={did}]\n{title}\n{body}\n")
-        citations_list.append({"id": did, "url": d.get("url", ""), "snippet": (title + " " + body)[:200]})
-    evidence_with_ids = "\n---\n".join(evidence_parts)
+    cited = set()
+    evidence_by_section = {}
+    for sec in content_sections:
+        evidence_parts = []
+        for did in section_doc_ids[sec]:
+            d = docs_by_id.get(did)
+            if not d:
+                continue
+            title, body = d.get("title") or "", (d.get("body") or "")[:2000]
+            evidence_parts.append(f"[doc_id={did}]\n{title}\n{body}\n")
+            if did not in cited:
+                cited.add(did)
+                citations_list.append({"id": did, "url": d.get("url", ""), "snippet": (title + " " + body)[:200]})
+        evidence_by_section[sec] = "\n---\n".join(evidence_parts)
     weighting_note = weighting_result.get("source_summary", "")
 
-    content_sections = [s for s in sections_config if s != "appendix_citations"]
-    section_contents = {}
-    for sec in content_sections:
-        section_contents[sec] = _write_section(
-            topic, description, evidence_with_ids, trend_summary, contradictions, weighting_note, sec
-        )
+    prompts = [
+        _section_prompt(topic, description, evidence_by_section[sec], trend_summary, contradictions, weighting_note, sec)
+        for sec in content_sections
+    ]
+    outs = complete_many(prompts, temperature=0.3, max_workers=len(prompts), timeout=SECTION_TIMEOUT)
+    section_contents = {sec: out or _skipped(sec) for sec, out in zip(content_sections, outs)}
 
     initial_conf = weighting_result.get("weighted_confidence", 0.5)
     final_confidence, critique = run_self_critique(section_contents, topic, initial_conf)
@@ -79,10 +113,10 @@ def run_synthesis(
     report_json = {
         "topic": topic,
         "generated_at": datetime.utcnow().isoformat() + "Z",
-        "sections": {k: {"content": v, "citations": []} for k, v in section_contents.items()},
+        "sections": {k: {"content": v, "citations": section_doc_ids.get(k, [])} for k, v in section_contents.items()},
         "citations": citations_list,
         "confidence": final_confidence,
-        "metadata": {"source_weighting": weighting_result, "self_critique": critique, "num_sources": len(docs), "num_contradictions": len(contradictions)},
+        "metadata": {"source_weighting": weighting_result, "self_critique": critique, "num_sources": num_docs, "num_contradictions": len(contradictions)},
     }
     md_lines = [f"# {topic}\n", f"*{report_json['generated_at']}*", f"**Confidence: {final_confidence:.2f}**\n"]
     for sec in sections_config:
@@ -91,7 +125,8 @@ def run_synthesis(
     md_lines.append(f"\n---\n**Self-critique:** {critique}")
     report_md = "\n".join(md_lines)
 
-    insert_report(conn, report_json, report_md, final_confidence)
-    conn.close()
+    insert_report(conn, report_json, report_md, final_confidence, topic=topic, run_id=run_id)
+    if own:
+        conn.close()
     logger.info("Report confidence %.2f", final_confidence)
     return report_json, report_md, final_confidence
@@ -6,13 +6,19 @@ Autonomous Market Intelligence Agent — full pipeline.
 Run from agent_ai/:  python run.py
   - Prompts: "Which market/area do you want to analyze?" (or pass topic as CLI arg)
   - Example:  python run.py "EV battery supply chain"
+  - Streaming:  python run.py --stream "EV battery supply chain"   (or PIPELINE_STREAM=1)
+  - Daemon:     python run.py --daemon "EV battery supply chain"   (or PIPELINE_DAEMON=1; see schedule in config)
+  - Batch:      python run.py --batch "EV battery supply chain" "AI chips"   (or topics: in config)
+  - Profiling:  python run.py --profile "EV battery supply chain"   (or TRACK_PROFILE=cpu,mem; artifacts in data/profiles/)
 Env: OPENAI_API_KEY (required), NEWS_API_KEY (optional), MAX_DOCS_PER_RUN, TRACK_STATUS_FILE
 """
 
 import json
 import logging
 import os
+import re
 import sys
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
 from datetime import datetime
 
@@ -35,14 +41,18 @@ except ImportError:
                     if k and v and k not in os.environ:
                         os.environ[k] = v.strip('"').strip("'")
 
-from config import get_topic_name
-from ingestion.storage import get_connection, init_schema, get_processed_docs, get_extractions
+from config import get_topic_name, get_topics
+from ingestion.storage import finish_run_record, get_connection, init_schema, start_run_record
 from ingestion.pipeline import run_ingestion
 from processing.dedup_filter import run_dedup_and_filter
 from processing.extract import run_extraction
+from processing.stream import run_streaming
+from processing.topics import refresh_topic_docs
 from processing.trends import run_trends_and_contradictions
 from reasoning.source_weighting import apply_source_weighting
+from report.retrieval import update_index
 from report.synthesis import run_synthesis
+from scheduler import run_daemon
 import tracking
 
 logging.basicConfig(
@@ -51,6 +61,15 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 MAX_DOCS = int(os.environ.get("MAX_DOCS_PER_RUN", "0")) or None
+TOPIC_WORKERS = int(os.environ.get("TOPIC_WORKERS", "4"))
+
+
+def _flag(name: str, env: str) -> bool:
+    """--<name> on the command line (removed from argv) or env=1."""
+    if f"--{name}" in sys.argv:
+        sys.argv.remove(f"--{name}")
+        return True
+    return os.environ.get(env, "").lower() in ("1", "true", "yes")
 
 
 def _get_topic_from_user() -> str:
@@ -66,65 +85,216 @@ def _get_topic_from_user() -> str:
     return topic
 
 
+def _begin(step: str, track: bool) -> None:
+    if track:
+        tracking.start_step(step)
+    else:
+        tracking.set_thread_step(step)  # batch topic threads: attribute LLM usage without touching run status
+
+
+def _end(step: str, counts: dict, track: bool) -> None:
+    if track:
+        tracking.end_step(step, counts)
+    else:
+        tracking.set_thread_step(None)
+
+
+def _prepare(conn, topic: str, run_id: int | None = None, track: bool = True, dedup: bool = True) -> None:
+    """
+    Dedup/filter whatever ingestion has added (corpus-wide, incremental), add the docs relevant to
+    topic to its partition, and extract the partition.
+    """
+    if dedup:
+        _begin("dedup_filter", track)
+        processed_count = run_dedup_and_filter(
+            full=os.environ.get("DEDUP_FULL", "").lower() in ("1", "true", "yes"), conn=conn
+        )
+        _end("dedup_filter", {"processed_docs": processed_count}, track)
+
+    _begin("extract", track)
+    refresh_topic_docs(conn, topic, run_id)
+    extract_count = run_extraction(max_docs=MAX_DOCS or 50, conn=conn, topic=topic, run_id=run_id)
+    _end("extract", {"extractions": extract_count}, track)
+
+
+def _report(conn, topic: str, run_id: int | None = None, track: bool = True, slug: bool = False) -> tuple[str, float]:
+    """
+    Trends → weighting → synthesis; writes samples/report_*.{md,json} (with a topic slug in the
+    name when slug is set). Returns (report_md, confidence).
+    """
+    _begin("trends_contradictions", track)
+    trend_summary, contradictions = run_trends_and_contradictions(
+        max_contradiction_pairs=5, conn=conn, topic=topic, run_id=run_id
+    )
+    _end("trends_contradictions", {"contradictions": len(contradictions)}, track)
+
+    _begin("source_weighting", track)
+    # Weighting only looks at source tiers; don't load bodies or extractions for it.
+    docs = [dict(r) for r in conn.execute(
+        "SELECT p.id, p.source_tier FROM doc_topics t JOIN processed_docs p ON p.id = t.doc_id WHERE t.topic = ?",
+        (topic,),
+    )]
+    weighting_result = apply_source_weighting(docs, [], contradictions)
+    _end("source_weighting", {"confidence": weighting_result.get("weighted_confidence")}, track)
+
+    _begin("synthesis", track)
+    report_json, report_md, confidence = run_synthesis(
+        trend_summary, contradictions, weighting_result, max_docs_for_context=20, conn=conn, topic=topic,
+        run_id=run_id,
+    )
+    _end("synthesis", {"confidence": confidence}, track)
+
+    out_dir = _agent_ai_root / "samples"
+    out_dir.mkdir(parents=True, exist_ok=True)
+    stamp = datetime.utcnow().strftime("%Y%m%d_%H%M")
+    if slug:
+        stamp += "_" + (re.sub(r"[^a-z0-9]+", "_", topic.lower()).strip("_")[:40] or "topic")
+    (out_dir / f"report_{stamp}.md").write_text(report_md, encoding="utf-8")
+    (out_dir / f"report_{stamp}.json").write_text(json.dumps(report_json, indent=2), encoding="utf-8")
+    logger.info("Report: samples/report_%s.md  Confidence: %.2f", stamp, confidence)
+    return report_md, confidence
+
+
+def _run_topic(topic: str) -> float:
+    """
+    Batch mode, one topic: partition the shared corpus by relevance, extract, report. Own
+    connection and runs row.
+    """
+    conn = get_connection()
+    run_id = start_run_record(conn, topic, "batch")
+    try:
+        _prepare(conn, topic, run_id, track=False, dedup=False)
+        confidence = _report(conn, topic, run_id, track=False, slug=True)[1]
+        finish_run_record(conn, run_id)
+        return confidence
+    except Exception as e:
+        finish_run_record(conn, run_id, success=False, error=str(e))
+        raise
+    finally:
+        conn.close()
+
+
+def _run_batch(conn, topics: list[str], run_id: int | None = None) -> None:
+    """
+    Fetch every source once for all topics (under run_id, the batch's runs row without a topic),
+    filter once, then analyze topics in parallel.
+    """
+    tracking.start_step("ingest")
+    run_ingestion(max_docs=MAX_DOCS, conn=conn, topics=topics, run_id=run_id)
+    tracking.end_step("ingest", {"raw_docs": conn.execute("SELECT COUNT(*) FROM raw_docs").fetchone()[0]})
+    tracking.start_step("dedup_filter")
+    processed_count = run_dedup_and_filter(conn=conn)
+    tracking.end_step("dedup_filter", {"processed_docs": processed_count})
+    update_index(conn)
+
+    tracking.start_step("topics")
+    # Topics share the process-wide LLM budget (LLM_MAX_CONCURRENCY / LLM_RPM / LLM_TPM) in llm.py.
+    results = {}
+    with ThreadPoolExecutor(max_workers=max(1, min(TOPIC_WORKERS, len(topics))), thread_name_prefix="topic") as pool:
+        futures = {pool.submit(_run_topic, t): t for t in topics}
+        for fut in as_completed(futures):
+            topic = futures[fut]
+            try:
+                results[topic] = fut.result()
+            except Exception as e:
+                logger.exception("Topic %r failed", topic)
+                results[topic] = f"failed: {e}"
+    tracking.end_step("topics", results)
+
+
+def _daemon_report(conn, topic: str) -> None:
+    """One report cycle in daemon mode, tracked like a run."""
+    run_id = start_run_record(conn, topic, "daemon")
+    tracking.start_run(run_id, {"topic": topic, "mode": "daemon"})
+    try:
+        _prepare(conn, topic, run_id)
+        _report(conn, topic, run_id)
+        tracking.end_run(success=True)
+        finish_run_record(conn, run_id)
+    except Exception as e:
+        tracking.end_run(success=False, error=str(e))
+        finish_run_record(conn, run_id, success=False, error=str(e))
+        raise
+
+
 def main():
     if not os.environ.get("OPENAI_API_KEY"):
         logger.warning("OPENAI_API_KEY not set. Set it in .env for extraction and report.")
+    streaming = _flag("stream", "PIPELINE_STREAM")
+    daemon = _flag("daemon", "PIPELINE_DAEMON")
+    batch = _flag("batch", "PIPELINE_BATCH")
+    if os.environ.get("TRACK_STATUS_FILE", "1") == "1":
+        tracking.set_status_path(_agent_ai_root / "data" / "run_status.json")
+    tracking.set_metrics_path(os.environ.get("TRACK_METRICS_FILE") or None)
+    tracking.set_profile("cpu,mem" if _flag("profile", "TRACK_PROFILE") else os.environ.get("TRACK_PROFILE"),
+                         _agent_ai_root / "data" / "profiles")
+    conn = get_connection()
+    init_schema(conn)
+
+    if batch:
+        topics = [t.strip() for t in sys.argv[1:] if t.strip()] or get_topics()
+        if not topics:
+            conn.close()
+            sys.exit("Batch mode needs topics: python run.py --batch \"topic A\" \"topic B\" or topics: in config.")
+        logger.info("Batch: %s topics", len(topics))
+        run_id = start_run_record(conn, None, "batch")
+        tracking.start_run(run_id, {"topic": "", "mode": "batch"})
+        try:
+            _run_batch(conn, topics, run_id)
+            tracking.end_run(success=True)
+            finish_run_record(conn, run_id)
+        except Exception as e:
+            logger.exception("Batch failed")
+            tracking.end_run(success=False, error=str(e))
+            finish_run_record(conn, run_id, success=False, error=str(e))
+            raise
+        finally:
+            conn.close()
+        return
+
     # User chooses area to analyze
     user_topic = _get_topic_from_user()
     if user_topic:
-        os.environ["TOPIC_OVERRIDE"] = user_topic
         print(f"Analyzing: {user_topic}\n")
-    if os.environ.get("TRACK_STATUS_FILE", "1") == "1":
-        tracking.set_status_path(_agent_ai_root / "data" / "run_status.json")
-    tracking.start_run()
-    logger.info("Topic: %s", get_topic_name())
+    topic = user_topic or get_topic_name()
+    logger.info("Topic: %s", topic)
 
-    try:
-        tracking.start_step("ingest")
-        run_ingestion(max_docs=MAX_DOCS)
-        conn = get_connection()
-        init_schema(conn)
-        raw_count = len(conn.execute("SELECT id FROM raw_docs").fetchall())
-        tracking.end_step("ingest", {"raw_docs": raw_count})
-        logger.info("Raw docs: %s", raw_count)
-
-        tracking.start_step("dedup_filter")
-        processed_count = run_dedup_and_filter()
-        tracking.end_step("dedup_filter", {"processed_docs": processed_count})
-
-        tracking.start_step("extract")
-        extract_count = run_extraction(max_docs=MAX_DOCS or 50)
-        tracking.end_step("extract", {"extractions": extract_count})
-
-        tracking.start_step("trends_contradictions")
-        trend_summary, contradictions = run_trends_and_contradictions(max_contradiction_pairs=5)
-        tracking.end_step("trends_contradictions", {"contradictions": len(contradictions)})
-
-        tracking.start_step("source_weighting")
-        conn = get_connection()
-        docs, extractions = get_processed_docs(conn), get_extractions(conn)
-        conn.close()
-        weighting_result = apply_source_weighting(docs, extractions, contradictions)
-        tracking.end_step("source_weighting", {"confidence": weighting_result.get("weighted_confidence")})
+    if daemon:
+        try:
+            run_daemon(conn, lambda c: _daemon_report(c, topic), topics=[topic])
+        except KeyboardInterrupt:
+            logger.info("Daemon interrupted")
+        finally:
+            conn.close()
+        return
 
-        tracking.start_step("synthesis")
-        report_json, report_md, confidence = run_synthesis(
-            trend_summary, contradictions, weighting_result, max_docs_for_context=20
-        )
-        tracking.end_step("synthesis", {"confidence": confidence})
+    mode = "stream" if streaming else "run"
+    run_id = start_run_record(conn, topic, mode)
+    tracking.start_run(run_id, {"topic": topic, "mode": mode})
+    try:
+        if streaming:
+            tracking.start_step("stream")
+            counts = run_streaming(conn, max_docs=MAX_DOCS, max_extract=MAX_DOCS or 50, topic=topic, run_id=run_id)
+            tracking.end_step("stream", counts)
+        else:
+            tracking.start_step("ingest")
+            run_ingestion(max_docs=MAX_DOCS, conn=conn, topics=[topic], run_id=run_id)
+            raw_count = conn.execute("SELECT COUNT(*) FROM raw_docs").fetchone()[0]
+            tracking.end_step("ingest", {"raw_docs": raw_count})
+            logger.info("Raw docs: %s", raw_count)
+            _prepare(conn, topic, run_id)
 
-        out_dir = _agent_ai_root / "samples"
-        out_dir.mkdir(parents=True, exist_ok=True)
-        stamp = datetime.utcnow().strftime("%Y%m%d_%H%M")
-        (out_dir / f"report_{stamp}.md").write_text(report_md, encoding="utf-8")
-        (out_dir / f"report_{stamp}.json").write_text(json.dumps(report_json, indent=2), encoding="utf-8")
+        report_md, confidence = _report(conn, topic, run_id)
         tracking.end_run(success=True)
-        logger.info("Report: samples/report_%s.md  Confidence: %.2f", stamp, confidence)
+        finish_run_record(conn, run_id)
         print("\n--- Preview ---\n", report_md[:1200], "\n--- Done ---")
     except Exception as e:
         logger.exception("Pipeline failed")
         tracking.end_run(success=False, error=str(e))
+        finish_run_record(conn, run_id, success=False, error=str(e))
         raise
+    finally:
+        conn.close()
 
 
 if __name__ == "__main__":
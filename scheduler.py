@@ -0,0 +1,128 @@
+"""
+Daemon mode: poll each source on its own interval and regenerate the report on a timer or
+once enough new docs have arrived. One process, one DB connection, warm HTTP/LLM clients.
+"""
+
+import logging
+import sqlite3
+import threading
+import time
+from typing import Any, Callable
+
+from config import get_schedule, get_topic_name
+from ingestion.pipeline import INGEST_BATCH, source_fetchers
+from ingestion.sources.http import get_session
+from ingestion.storage import insert_raw_docs_bulk
+from llm import get_client
+
+logger = logging.getLogger(__name__)
+
+MAX_DOUBLINGS = 32  # cap on the backoff exponent: 2.0 ** n overflows a float past ~1023
+
+
+class _Job:
+    """One source's polling state: next due time, consecutive failures and empty polls."""
+
+    def __init__(self, name: str, fetch: Callable, interval: float):
+        self.name = name
+        self.fetch = fetch
+        self.interval = max(1.0, float(interval))
+        self.next_at = 0.0
+        self.failures = 0
+        self.idle = 0
+
+    def succeeded(self, new_docs: int, now: float, max_idle: float) -> None:
+        """Polls that bring nothing new stretch the interval (x2 each, up to max_idle)."""
+        self.failures = 0
+        self.idle = 0 if new_docs else self.idle + 1
+        self.next_at = now + min(self.interval * 2 ** min(self.idle, MAX_DOUBLINGS), max(self.interval, max_idle))
+
+    def failed(self, now: float, max_backoff: float) -> float:
+        """Exponential backoff: interval x 2^failures, capped at max_backoff. Returns the delay."""
+        self.failures += 1
+        delay = min(self.interval * 2 ** min(self.failures, MAX_DOUBLINGS), max(self.interval, max_backoff))
+        self.next_at = now + delay
+        return delay
+
+
+def _jobs(schedule: dict[str, Any], topics: list[str] | None) -> list[_Job]:
+    jobs = []
+    for name, fetch in source_fetchers(strict=True, split_feeds=True, topics=topics).items():
+        if name.startswith("rss:"):
+            interval = (schedule.get("rss_feeds") or {}).get(name[4:], schedule["rss"])
+        else:
+            interval = schedule.get(name, schedule["hn"])
+        jobs.append(_Job(name, fetch, interval))
+    return jobs
+
+
+def _ingest(conn: sqlite3.Connection, items, topic: str | None = None) -> int:
+    """Insert one poll's items in batches (joining topic's partition); returns the number of new raw docs."""
+    new, batch = 0, []
+    for item in items:
+        batch.append(item)
+        if len(batch) >= INGEST_BATCH:
+            new += len(insert_raw_docs_bulk(conn, batch, topic=topic)[0])
+            batch = []
+    if batch:
+        new += len(insert_raw_docs_bulk(conn, batch, topic=topic)[0])
+    return new
+
+
+def run_daemon(
+    conn: sqlite3.Connection,
+    report: Callable[[sqlite3.Connection], Any],
+    stop: threading.Event | None = None,
+    schedule: dict[str, Any] | None = None,
+    topics: list[str] | None = None,
+) -> None:
+    """
+    Poll sources forever (until stop is set) on the intervals from the config schedule section.
+    A failing source backs off exponentially; a source that keeps returning nothing new is polled
+    less often. report(conn) runs when report_min_new_docs new docs have been ingested, or when
+    the report interval has passed and anything new arrived since the last report. topics is
+    passed to source_fetchers() (default: the configured topic).
+    """
+    schedule = schedule or get_schedule()
+    stop = stop or threading.Event()
+    get_session()
+    get_client()  # build the OpenAI client once, not per report
+    jobs = _jobs(schedule, topics)
+    topics = topics or [get_topic_name()]
+    member = topics[0] if len(topics) == 1 else None
+    report_every = float(schedule["report"])
+    min_new = int(schedule["report_min_new_docs"])
+    next_report = time.monotonic() + report_every
+    new_since_report = 0
+    logger.info("Daemon: %s", ", ".join(f"{j.name} every {j.interval:.0f}s" for j in jobs) or "no sources")
+
+    while not stop.is_set():
+        now = time.monotonic()
+        for job in [j for j in jobs if j.next_at <= now]:
+            if stop.is_set():
+                break
+            try:
+                new = _ingest(conn, job.fetch(conn), member)
+            except Exception as e:
+                delay = job.failed(time.monotonic(), float(schedule["max_backoff"]))
+                logger.warning("Daemon: %s failed (%s in a row), retry in %.0fs: %s", job.name, job.failures, delay, e)
+                continue
+            job.succeeded(new, time.monotonic(), float(schedule["max_idle_interval"]))
+            new_since_report += new
+            logger.info("Daemon: %s +%s docs, next poll in %.0fs", job.name, new, job.next_at - time.monotonic())
+
+        now = time.monotonic()
+        if new_since_report and (new_since_report >= min_new or now >= next_report):
+            logger.info("Daemon: regenerating report (%s new docs)", new_since_report)
+            try:
+                report(conn)
+            except Exception:
+                logger.exception("Daemon: report failed")
+            new_since_report = 0
+            next_report = time.monotonic() + report_every
+        elif now >= next_report:
+            next_report = now + report_every
+
+        wake = min([j.next_at for j in jobs] + [next_report])
+        stop.wait(max(0.5, wake - time.monotonic()))
+    logger.info("Daemon stopped")
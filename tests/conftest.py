@@ -0,0 +1,37 @@
+import sys
+from pathlib import Path
+
+import pytest
+import yaml
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import llm
+from benchmarks.fake_llm import FakeClient
+from benchmarks.stub_server import StubServer, SyntheticCorpus
+from config import set_config_path
+from ingestion.storage import get_connection, init_schema, set_db_path
+
+
+@pytest.fixture
+def conn(tmp_path):
+    """Fresh DB, LLM cache and fake LLM client under tmp_path."""
+    set_db_path(tmp_path / "test.db")
+    llm.set_cache_path(tmp_path / "llm_cache.db")
+    llm.set_client(FakeClient(latency_ms=0))
+    c = get_connection()
+    init_schema(c)
+    yield c
+    c.close()
+    llm.set_client(None)
+
+
+@pytest.fixture
+def rss_feeds(tmp_path):
+    """Local stand-in serving 40 synthetic "battery" entries over two feeds, set as the only source."""
+    server = StubServer(SyntheticCorpus(0, 40, 20, "battery", seed=1)).start()
+    config_path = tmp_path / "config.yaml"
+    config_path.write_text(yaml.safe_dump({"sources": {"hn": False, "rss_feeds": server.feed_urls(), "news_api": False}}))
+    set_config_path(config_path)
+    yield server
+    server.stop()
@@ -0,0 +1,29 @@
+from datetime import datetime, timezone
+
+from ingestion.storage import get_topic_doc_count, insert_raw_docs_bulk
+from processing.dedup_filter import run_dedup_and_filter
+
+STORY = (
+    "Acme Energy said on Monday it will build a new battery cell plant in Nevada, "
+    "adding twelve gigawatt hours of capacity for grid storage customers by next year. "
+)
+
+
+def _doc(url: str, source_type: str, tail: str) -> dict:
+    now = datetime.now(timezone.utc).isoformat()
+    return {"url": url, "title": "Acme plans Nevada battery plant", "body": STORY * 4 + tail,
+            "source_type": source_type, "published_at": now}
+
+
+def test_fold_keeps_the_copys_topics(conn):
+    (hn_id,), _ = insert_raw_docs_bulk(conn, [_doc("https://hn.example/1", "hn", "Via HN.")], topic="battery storage")
+    (rss_id,), _ = insert_raw_docs_bulk(conn, [_doc("https://rss.example/1", "rss", "Via RSS.")], topic="grid storage")
+
+    run_dedup_and_filter(conn=conn)
+
+    kept = [r[0] for r in conn.execute("SELECT id FROM processed_docs")]
+    assert kept == [rss_id]  # higher source tier wins
+    topics = {r[0] for r in conn.execute("SELECT topic FROM doc_topics WHERE doc_id = ?", (rss_id,))}
+    assert topics == {"battery storage", "grid storage"}
+    assert get_topic_doc_count(conn, "battery storage") == 1
+    assert get_topic_doc_count(conn, "grid storage") == 1
@@ -0,0 +1,17 @@
+from processing.stream import run_streaming
+
+
+def test_max_docs_leaves_the_rest_for_the_next_run(conn, rss_feeds):
+    first = run_streaming(conn, max_docs=7, max_extract=0, topic="battery storage")
+    second = run_streaming(conn, max_docs=7, max_extract=0, topic="battery storage")
+
+    assert first["raw_docs"] == 7 and first["new_docs"] == 7
+    assert second["new_docs"] == 7
+    assert conn.execute("SELECT COUNT(*) FROM raw_docs").fetchone()[0] == 14
+
+
+def test_topics_sharing_a_first_word_keep_their_own_feed_cache(conn, rss_feeds):
+    run_streaming(conn, max_extract=0, topic="battery storage")
+    other = run_streaming(conn, max_extract=0, topic="battery supply chain")
+
+    assert other["raw_docs"] > 0
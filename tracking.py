@@ -1,19 +1,63 @@
 """
-Process tracking: step timing, counts, and optional status file for monitoring.
+Process tracking: step timing, counts, CPU/RSS and LLM usage per step, an optional status file
+for monitoring, run history in SQLite (runs / run_steps), a Prometheus textfile export and
+opt-in per-step CPU/memory profiles (see profiling.py).
+
+    python tracking.py [--last 10] [--topic T] [--mode run] [--check]
+
+prints per-step trends over the last runs and flags regressions (--check exits 1 on any).
 """
 
 import json
 import logging
+import math
 import os
+import sqlite3
+import statistics
+import sys
+import threading
 import time
+from datetime import datetime
 from pathlib import Path
 from typing import Any
 
+try:
+    import resource
+except ImportError:  # Windows: no peak RSS
+    resource = None
+
 logger = logging.getLogger(__name__)
 
+try:
+    _PAGE = os.sysconf("SC_PAGE_SIZE")
+except (AttributeError, ValueError, OSError):
+    _PAGE = 0
+
+# Latest value above FACTOR x the median of the earlier runs (and above the metric's floor) is a regression.
+REGRESSION_FACTOR = float(os.environ.get("TRACK_REGRESSION_FACTOR", "1.5"))
+REGRESSION_FLOORS = {"duration_sec": 1.0, "cpu_sec": 1.0, "peak_rss_mb": 50.0, "llm_cost_usd": 0.01}
+
 _STATUS_PATH: Path | None = None
+_METRICS_PATH: Path | None = None
 _START_TIME: float = 0.0
 _STEP_START: float = 0.0
+_STEP: str | None = None
+_STEP_STARTED_AT: str = ""
+_CPU_START: float = 0.0
+_STEP_CPU: float = 0.0
+_RUN_ID: int | None = None
+_LABELS: dict[str, str] = {}
+_STEPS: list[dict[str, Any]] = []
+_HISTORY: sqlite3.Connection | None = None
+_THREAD = threading.local()
+_LLM: dict[str, dict[str, Any]] = {}
+_LLM_LOCK = threading.Lock()
+_PROFILE: frozenset[str] = frozenset()
+_PROFILE_DIR: Path | None = None
+_PROFILER = None  # profiling.StepProfiler of the running step
+_PROFILED = 0
+_STEP_RSS = None  # PeakRSS sampler of the running step
+_RUN_RSS = None  # PeakRSS sampler of the whole run
 
 
 def set_status_path(path: str | Path | None) -> None:
@@ -22,6 +66,154 @@ def set_status_path(path: str | Path | None) -> None:
     _STATUS_PATH = Path(path) if path else None
 
 
+def set_metrics_path(path: str | Path | None) -> None:
+    """Prometheus textfile (e.g. <node_exporter textfile dir>/market_intel.prom) rewritten at end_run. None = disabled."""
+    global _METRICS_PATH
+    _METRICS_PATH = Path(path) if path else None
+
+
+def set_profile(modes: str | None, directory: str | Path | None = None) -> None:
+    """
+    Profile every step: modes "cpu", "mem" or "cpu,mem" (see profiling.parse_modes); artifacts go
+    to directory/<run>/ (default data/profiles next to the database). None or "" = disabled.
+    """
+    global _PROFILE, _PROFILE_DIR
+    if not modes:
+        _PROFILE = frozenset()
+        return
+    import profiling
+    _PROFILE = profiling.parse_modes(modes)
+    _PROFILE_DIR = Path(directory) if directory else None
+    if _PROFILE:
+        logger.info("Profiling steps: %s", ",".join(sorted(_PROFILE)))
+
+
+def _profile_dir() -> Path:
+    base = _PROFILE_DIR
+    if base is None:
+        from ingestion.storage import get_db_path
+        base = get_db_path().parent / "profiles"
+    run = f"run_{_RUN_ID}" if _RUN_ID is not None else f"run_{datetime.fromtimestamp(_START_TIME or time.time()):%Y%m%d_%H%M%S}"
+    return base / run
+
+
+def _start_profile(step: str) -> None:
+    global _PROFILER
+    import profiling
+    _stop_profile()  # a step started before the previous one ended
+    _PROFILER = profiling.StepProfiler(step, _PROFILE).start()
+
+
+def _stop_profile() -> None:
+    global _PROFILER, _PROFILED
+    if _PROFILER is None:
+        return
+    import profiling
+    profiler, _PROFILER = _PROFILER, None
+    _PROFILED += 1
+    try:
+        paths = profiler.stop(_profile_dir(), profiling.artifact_name(_PROFILED, profiler.step))
+        logger.info("Profile of %s: %s", profiler.step, ", ".join(str(p) for p in paths))
+    except Exception as e:
+        logger.warning("Could not write profile of step %s: %s", profiler.step, e)
+
+
+def _process_peak_rss_mb() -> float | None:
+    """Process high-water RSS so far (ru_maxrss is KiB on Linux, bytes on macOS); never goes down."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def rss_mb() -> float | None:
+    """Current RSS from /proc (Linux); None elsewhere."""
+    if not _PAGE:
+        return None
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * _PAGE / (1024 * 1024)
+    except OSError:
+        return None
+
+
+class PeakRSS:
+    """
+    Highest RSS seen between start() and stop(), sampled every interval seconds on a daemon
+    thread. Unlike ru_maxrss it is scoped to that window, so each step gets its own peak.
+    peak_mb stays None where /proc is unavailable. Also usable as a context manager.
+    """
+
+    def __init__(self, interval: float = 0.05):
+        self.interval = interval
+        self.peak_mb = None
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="rss-sampler", daemon=True)
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            self._sample()
+
+    def _sample(self) -> None:
+        now = rss_mb()
+        if now is not None and (self.peak_mb is None or now > self.peak_mb):
+            self.peak_mb = now
+
+    def start(self) -> "PeakRSS":
+        self._sample()
+        if self.peak_mb is not None:
+            self._thread.start()
+        return self
+
+    def stop(self) -> float | None:
+        """Stop sampling; returns the peak in MB (one decimal) or None."""
+        self._stop.set()
+        if self._thread.is_alive():
+            self._thread.join()
+        self._sample()
+        return round(self.peak_mb, 1) if self.peak_mb is not None else None
+
+    def __enter__(self) -> "PeakRSS":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+
+def _history() -> sqlite3.Connection:
+    global _HISTORY
+    if _HISTORY is None:
+        from ingestion.storage import get_connection
+        _HISTORY = get_connection()
+    return _HISTORY
+
+
+def _save_step(step: str, status: str, counts: dict[str, Any] | None, error: str | None) -> None:
+    """Keep the finished step for the metrics export and, with a run id, in run_steps."""
+    global _STEP_RSS
+    peak_rss = _STEP_RSS.stop() if _STEP_RSS is not None else None
+    _STEP_RSS = None
+    row = {
+        "step": step,
+        "status": status,
+        "started_at": _STEP_STARTED_AT,
+        "duration_sec": round(time.time() - _STEP_START, 3),
+        "cpu_sec": round(time.process_time() - _STEP_CPU, 3),
+        "peak_rss_mb": peak_rss,
+        "counts": counts,
+        "llm": llm_summary().get(step),
+        "error": error,
+    }
+    _STEPS.append(row)
+    if _RUN_ID is None:
+        return
+    try:
+        from ingestion.storage import insert_run_step
+        insert_run_step(_history(), _RUN_ID, **row)
+    except sqlite3.Error as e:
+        logger.warning("Could not record step %s in run history: %s", step, e)
+
+
 def _write_status(step: str, status: str, counts: dict[str, Any] | None = None, error: str | None = None) -> None:
     if _STATUS_PATH is None:
         return
@@ -39,44 +231,335 @@ def _write_status(step: str, status: str, counts: dict[str, Any] | None = None,
             data["counts"] = counts
         if error:
             data["error"] = error
+        if _LLM:
+            data["llm"] = llm_summary()
         with open(_STATUS_PATH, "w") as f:
             json.dump(data, f, indent=2)
     except Exception as e:
         logger.debug("Could not write status file: %s", e)
 
 
-def start_run() -> None:
-    """Call at pipeline start. Resets timers and writes initial status."""
-    global _START_TIME, _STEP_START
+def start_run(run_id: int | None = None, labels: dict[str, str] | None = None) -> None:
+    """
+    Call at pipeline start. Resets timers and LLM usage and writes initial status. With run_id
+    (a runs row, see ingestion.storage.start_run_record) every step is kept in run_steps.
+    labels (e.g. topic, mode) are attached to the exported metrics.
+    """
+    global _START_TIME, _STEP_START, _STEP, _CPU_START, _RUN_ID, _LABELS, _PROFILED, _RUN_RSS
+    if _RUN_RSS is not None:
+        _RUN_RSS.stop()
+    _RUN_RSS = PeakRSS().start()
     _START_TIME = time.time()
     _STEP_START = _START_TIME
+    _CPU_START = time.process_time()
+    _STEP = None
+    _RUN_ID = run_id
+    _LABELS = dict(labels or {})
+    _PROFILED = 0
+    _STEPS.clear()
+    with _LLM_LOCK:
+        _LLM.clear()
     _write_status("start", "running", {})
 
 
 def start_step(step_name: str) -> None:
     """Call at the start of each pipeline step."""
-    global _STEP_START
+    global _STEP_START, _STEP, _STEP_CPU, _STEP_STARTED_AT, _STEP_RSS
+    if _STEP_RSS is not None:
+        _STEP_RSS.stop()
+    _STEP_RSS = PeakRSS().start()
     _STEP_START = time.time()
+    _STEP_CPU = time.process_time()
+    _STEP_STARTED_AT = datetime.utcnow().isoformat() + "Z"
+    _STEP = step_name
     _write_status(step_name, "running")
     logger.info("Step: %s (started)", step_name)
+    if _PROFILE:
+        _start_profile(step_name)
 
 
 def end_step(step_name: str, counts: dict[str, Any] | None = None) -> float:
     """Call at the end of each step. Returns step duration in seconds."""
+    global _STEP
     elapsed = time.time() - _STEP_START
     _write_status(step_name, "done", counts)
+    _save_step(step_name, "done", counts, None)
+    if _PROFILER is not None:
+        _stop_profile()  # after _save_step so writing the artifacts is not timed as part of the step
+    _STEP = None
     logger.info("Step: %s done in %.1fs", step_name, elapsed)
     return elapsed
 
 
 def end_run(success: bool = True, error: str | None = None) -> None:
-    """Call when the full pipeline finishes."""
+    """
+    Call when the full pipeline finishes. A step still running is recorded as failed. Stores the
+    run's totals in its runs row, rewrites the metrics file and logs the per-step LLM summary.
+    """
+    global _STEP, _RUN_RSS
     status = "done" if success else "failed"
+    if _STEP is not None:
+        _save_step(_STEP, status, None, error)
+        _STEP = None
+    if _PROFILER is not None:
+        _stop_profile()
     _write_status("end", status, error=error)
     total = time.time() - _START_TIME
+    cost = llm_summary().get("total", {}).get("cost_usd")
+    peak_rss = _RUN_RSS.stop() if _RUN_RSS is not None else None
+    _RUN_RSS = None
+    if peak_rss is None:
+        peak_rss = _process_peak_rss_mb()  # no /proc: process-wide high-water mark instead
+    if _RUN_ID is not None:
+        try:
+            from ingestion.storage import update_run_usage
+            update_run_usage(
+                _history(), _RUN_ID, round(total, 3), round(time.process_time() - _CPU_START, 3), peak_rss, cost
+            )
+        except sqlite3.Error as e:
+            logger.warning("Could not record run %s in run history: %s", _RUN_ID, e)
+    _write_metrics(success, total, cost)
     logger.info("Pipeline %s in %.1fs", status, total)
+    for step, s in llm_summary().items():
+        logger.info(
+            "LLM %s: %s calls (%s cached, %s errors, %s retries), %s+%s tokens, ~$%.4f, p50 %.2fs p95 %.2fs",
+            step, s["calls"], s["cache_hits"], s["errors"], s["retries"], s["prompt_tokens"],
+            s["completion_tokens"], s["cost_usd"], s["latency_p50_sec"], s["latency_p95_sec"],
+        )
 
 
 def step_elapsed() -> float:
     """Seconds since start_step was last called."""
     return time.time() - _STEP_START if _STEP_START else 0
+
+
+def current_step() -> str:
+    """Step that work on this thread belongs to: set_thread_step() label, else the running step."""
+    return getattr(_THREAD, "step", None) or _STEP or "other"
+
+
+def set_thread_step(step_name: str | None) -> None:
+    """Label this thread's LLM calls with step_name without touching the run status (worker threads)."""
+    _THREAD.step = step_name
+
+
+def record_llm_call(
+    model: str,
+    prompt_tokens: int = 0,
+    completion_tokens: int = 0,
+    latency_sec: float = 0.0,
+    cost_usd: float = 0.0,
+    cache_hit: bool = False,
+    error: bool = False,
+    retries: int = 0,
+    step: str | None = None,
+) -> None:
+    """Add one LLM call to the current run's usage, under step (default: current_step())."""
+    step = step or current_step()
+    with _LLM_LOCK:
+        s = _LLM.setdefault(step, {
+            "calls": 0, "cache_hits": 0, "errors": 0, "retries": 0, "prompt_tokens": 0,
+            "completion_tokens": 0, "cost_usd": 0.0, "latencies": [], "models": set(),
+        })
+        s["calls"] += 1
+        s["cache_hits"] += int(cache_hit)
+        s["errors"] += int(error)
+        s["retries"] += retries
+        s["prompt_tokens"] += prompt_tokens
+        s["completion_tokens"] += completion_tokens
+        s["cost_usd"] += cost_usd
+        s["models"].add(model)
+        if not cache_hit:
+            s["latencies"].append(latency_sec)
+
+
+def _percentile(values: list[float], q: float) -> float:
+    """Nearest-rank percentile; 0 for no values."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, math.ceil(q * len(ordered)) - 1))]
+
+
+def llm_summary() -> dict[str, dict[str, Any]]:
+    """
+    LLM usage of the current run per step, plus "total": calls, cache_hits, errors, retries,
+    prompt/completion tokens, estimated cost_usd and p50/p95 latency of the API calls (cache
+    hits excluded).
+    """
+    with _LLM_LOCK:
+        steps = {k: dict(v, latencies=list(v["latencies"]), models=set(v["models"])) for k, v in _LLM.items()}
+    if not steps:
+        return {}
+    total = {"calls": 0, "cache_hits": 0, "errors": 0, "retries": 0, "prompt_tokens": 0,
+             "completion_tokens": 0, "cost_usd": 0.0, "latencies": [], "models": set()}
+    for s in steps.values():
+        for k in total:
+            total[k] = total[k] | s[k] if k == "models" else total[k] + s[k]
+    steps["total"] = total
+    out = {}
+    for step, s in steps.items():
+        latencies = s.pop("latencies")
+        out[step] = dict(
+            s,
+            models=sorted(s["models"]),
+            cost_usd=round(s["cost_usd"], 6),
+            latency_p50_sec=round(_percentile(latencies, 0.5), 3),
+            latency_p95_sec=round(_percentile(latencies, 0.95), 3),
+        )
+    return out
+
+
+def _escape(value: Any) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", " ")
+
+
+def _labels(**extra: str) -> str:
+    labels = {**_LABELS, **extra}
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in sorted(labels.items())) + "}"
+
+
+def _write_metrics(success: bool, total: float, cost: float | None) -> None:
+    """Prometheus text exposition of the finished run, written atomically for the node_exporter textfile collector."""
+    if _METRICS_PATH is None:
+        return
+    metrics: list[tuple[str, str, str, list[tuple[str, float]]]] = [
+        ("market_intel_run_duration_seconds", "gauge", "Wall time of the last run.", [(_labels(), total)]),
+        ("market_intel_run_success", "gauge", "1 if the last run succeeded.", [(_labels(), float(success))]),
+        ("market_intel_run_last_timestamp_seconds", "gauge", "Unix time the last run finished.",
+         [(_labels(), time.time())]),
+        ("market_intel_run_llm_cost_usd", "gauge", "Estimated LLM cost of the last run.", [(_labels(), cost or 0.0)]),
+    ]
+    per_step: dict[str, list[tuple[str, float]]] = {}
+    for row in _STEPS:
+        lab = _labels(step=row["step"])
+        per_step.setdefault("duration", []).append((lab, row["duration_sec"]))
+        per_step.setdefault("cpu", []).append((lab, row["cpu_sec"]))
+        if row["peak_rss_mb"] is not None:
+            per_step.setdefault("rss", []).append((lab, row["peak_rss_mb"] * 1024 * 1024))
+        llm = row["llm"] or {}
+        if llm:
+            per_step.setdefault("calls", []).append((lab, llm["calls"]))
+            per_step.setdefault("errors", []).append((lab, llm["errors"]))
+            per_step.setdefault("cost", []).append((lab, llm["cost_usd"]))
+            per_step.setdefault("tokens", []).extend([
+                (_labels(step=row["step"], kind="prompt"), llm["prompt_tokens"]),
+                (_labels(step=row["step"], kind="completion"), llm["completion_tokens"]),
+            ])
+            per_step.setdefault("latency", []).extend([
+                (_labels(step=row["step"], quantile="0.5"), llm["latency_p50_sec"]),
+                (_labels(step=row["step"], quantile="0.95"), llm["latency_p95_sec"]),
+            ])
+    for key, name, help_text in [
+        ("duration", "market_intel_step_duration_seconds", "Wall time per step of the last run."),
+        ("cpu", "market_intel_step_cpu_seconds", "Process CPU time per step of the last run."),
+        ("rss", "market_intel_step_peak_rss_bytes", "Peak RSS sampled during each step."),
+        ("calls", "market_intel_step_llm_calls", "LLM calls per step (cache hits included)."),
+        ("errors", "market_intel_step_llm_errors", "Failed LLM calls per step."),
+        ("tokens", "market_intel_step_llm_tokens", "LLM tokens per step."),
+        ("cost", "market_intel_step_llm_cost_usd", "Estimated LLM cost per step."),
+        ("latency", "market_intel_step_llm_latency_seconds", "LLM API latency quantiles per step."),
+    ]:
+        if per_step.get(key):
+            metrics.append((name, "gauge", help_text, per_step[key]))
+    lines = []
+    for name, kind, help_text, samples in metrics:
+        lines += [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}"]
+        lines += [f"{name}{lab} {float(value)!r}" for lab, value in samples]
+    try:
+        _METRICS_PATH.parent.mkdir(parents=True, exist_ok=True)
+        tmp = _METRICS_PATH.with_name(_METRICS_PATH.name + ".tmp")
+        tmp.write_text("\n".join(lines) + "\n", encoding="utf-8")
+        os.replace(tmp, _METRICS_PATH)
+    except OSError as e:
+        logger.debug("Could not write metrics file: %s", e)
+
+
+def _metric(row: dict[str, Any], metric: str) -> float | None:
+    if metric == "llm_cost_usd":
+        return (row.get("llm") or {}).get("cost_usd", row.get("llm_cost_usd"))
+    return row.get(metric)
+
+
+def find_regressions(runs: list[dict[str, Any]], factor: float | None = None) -> list[dict[str, Any]]:
+    """
+    Compare the newest run (runs as from get_run_history(), newest first) with the median of the
+    others, per step and for the run total. Returns [{step, metric, latest, baseline, ratio}].
+    """
+    factor = factor or REGRESSION_FACTOR
+    if len(runs) < 2:
+        return []
+    latest, earlier = runs[0], runs[1:]
+    rows = [("(run)", latest, list(earlier))]
+    rows += [(step, row, [r["steps"][step] for r in earlier if step in r["steps"]])
+             for step, row in latest["steps"].items()]
+    found = []
+    for step, row, history in rows:
+        for metric, floor in REGRESSION_FLOORS.items():
+            value = _metric(row, metric)
+            past = [v for v in (_metric(h, metric) for h in history) if v is not None]
+            if value is None or not past:
+                continue
+            baseline = statistics.median(past)
+            if value > floor and value > factor * baseline:
+                found.append({"step": step, "metric": metric, "latest": value, "baseline": baseline,
+                              "ratio": round(value / baseline, 2) if baseline else None})
+    return found
+
+
+def format_history(runs: list[dict[str, Any]], regressions: list[dict[str, Any]]) -> str:
+    """Per-step durations over the runs (oldest → newest) with the latest CPU/RSS/LLM cost and flagged regressions."""
+    if not runs:
+        return "No finished runs recorded."
+    head = runs[0]
+    lines = [
+        f"Last {len(runs)} runs (newest: #{head['id']} {head['mode'] or ''} {head['topic'] or '(all topics)'}, "
+        f"{head['status']}, {head['started_at']})",
+        f"{'step':<24} {'duration_sec oldest -> newest':<44} {'cpu_sec':>8} {'rss_mb':>8} {'llm_usd':>8}",
+    ]
+    steps = list(dict.fromkeys(s for r in reversed(runs) for s in r["steps"]))
+    for step in ["(run)"] + steps:
+        series = [r if step == "(run)" else r["steps"].get(step) for r in reversed(runs)]
+        trend = " ".join("-" if x is None or x.get("duration_sec") is None else f"{x['duration_sec']:.1f}"
+                         for x in series)
+        last = series[-1] or {}
+        cost = _metric(last, "llm_cost_usd")
+        lines.append(
+            f"{step:<24} {trend[-44:]:<44} {last.get('cpu_sec') or 0:>8.1f} {last.get('peak_rss_mb') or 0:>8.1f} "
+            f"{cost or 0:>8.4f}"
+        )
+    if regressions:
+        lines.append("")
+        lines += [
+            f"REGRESSION {r['step']} {r['metric']}: {r['latest']:g} vs median {r['baseline']:g}"
+            + (f" (x{r['ratio']})" if r["ratio"] else "")
+            for r in regressions
+        ]
+    else:
+        lines.append("\nNo regressions.")
+    return "\n".join(lines)
+
+
+def main(argv: list[str] | None = None) -> int:
+    import argparse
+
+    from ingestion.storage import get_connection, get_run_history, init_schema
+
+    parser = argparse.ArgumentParser(description="Run history: per-step trends and regressions.")
+    parser.add_argument("--last", type=int, default=10, help="runs to compare (default 10)")
+    parser.add_argument("--topic", help="only runs of this topic ('' = batch ingest runs)")
+    parser.add_argument("--mode", help="only runs of this mode (run, stream, daemon, batch)")
+    parser.add_argument("--factor", type=float, default=REGRESSION_FACTOR, help="regression threshold vs median")
+    parser.add_argument("--check", action="store_true", help="exit 1 when a regression is found")
+    args = parser.parse_args(argv)
+    conn = get_connection()
+    init_schema(conn)
+    runs = get_run_history(conn, args.last, topic=args.topic, mode=args.mode)
+    conn.close()
+    regressions = find_regressions(runs, args.factor)
+    print(format_history(runs, regressions))
+    return 1 if args.check and regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())